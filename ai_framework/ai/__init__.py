@@ -3,3 +3,7 @@ __copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
 __version__ = "0.0.1"
 
 from .ai import AI
+from .ai_diary import AIDiary
+from .structured_diary_entry import StructuredDiaryEntry, structured_diary_entry
+from .concurrent_action_executor import ConcurrentActionExecutor, PlannedAction, ActionTimedOut
+from .action_metrics import ActionMetrics
@@ -0,0 +1,64 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to keep the most recent latencies of each action
+from collections import deque
+
+# needed to record metrics from actions taken at the same time
+import threading
+
+
+class ActionMetrics:
+    """
+    Counts the actions the ai takes and how long they take, by action name.
+
+    The latencies of the most recent max_latencies_per_action actions of each name are kept to report latency
+    percentiles. Counts of actions taken, failed and timed out cover every action since the metrics were created.
+    """
+
+    def __init__(self, max_latencies_per_action=1000):
+        self._lock = threading.Lock()
+        self._max_latencies_per_action = max_latencies_per_action
+        self._latencies = {}
+        self._counts = {}
+
+    def record(self, action_name, seconds_to_act, succeeded, timed_out=False):
+        with self._lock:
+            latencies = self._latencies.get(action_name)
+            if latencies is None:
+                latencies = deque(maxlen=self._max_latencies_per_action)
+                self._latencies[action_name] = latencies
+                self._counts[action_name] = {"taken": 0, "failed": 0, "timed_out": 0}
+            latencies.append(seconds_to_act)
+
+            counts = self._counts[action_name]
+            counts["taken"] += 1
+            if not succeeded:
+                counts["failed"] += 1
+            if timed_out:
+                counts["timed_out"] += 1
+
+    def timeouts(self, action_name=None):
+        # the number of timeouts of the named action, or of every action
+        with self._lock:
+            if action_name is not None:
+                return self._counts.get(action_name, {}).get("timed_out", 0)
+            return sum(counts["timed_out"] for counts in self._counts.values())
+
+    def summary(self):
+        # counts and latency percentiles in seconds, by action name
+        with self._lock:
+            summary = {}
+            for action_name, latencies in self._latencies.items():
+                sorted_latencies = sorted(latencies)
+                summary[action_name] = dict(self._counts[action_name],
+                                            p50=_percentile(sorted_latencies, 0.50),
+                                            p95=_percentile(sorted_latencies, 0.95),
+                                            p99=_percentile(sorted_latencies, 0.99),
+                                            max=sorted_latencies[-1])
+            return summary
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
@@ -6,12 +6,23 @@ __version__ = "0.0.1"
 # used to create and access centralized ai_infrastructure
 from ai_framework.ai_infrastructure import LocalNetwork
 
+# used to keep a bounded, indexed record of ai iterations
+from .ai_diary import AIDiary
+
+# used to find the next goal to pursue without re-sorting every goal on every iteration
+from ai_framework.ai_goals import GoalScheduler
+
+# used to take actions for unrelated goals at the same time
+from .concurrent_action_executor import ConcurrentActionExecutor
+
 
 class AI:
     _network = LocalNetwork.instance()
     _prioritized_goal_list = []
+    _goal_scheduler = GoalScheduler()
     _capabilities = []
-    _diary = []
+    _diary = AIDiary()
+    _action_executor = ConcurrentActionExecutor(_network, _diary)
 
     def network(self):
         pass
@@ -35,4 +46,18 @@ class AI:
         pass
 
     def diary(self):
-        pass
+        return self._diary
+
+    def goal_scheduler(self):
+        # ai implementations add their goals to the scheduler and take the next goal to pursue from it
+        return self._goal_scheduler
+
+    def world_changed(self, world_state_names):
+        # re-evaluate only the goals on the world states that changed
+        world_states = self._network.the_world_states()
+        for world_state_name in world_state_names:
+            if world_state_name in world_states:
+                self._goal_scheduler.world_state_changed(world_state_name, world_states[world_state_name])
+
+    def action_executor(self):
+        return self._action_executor
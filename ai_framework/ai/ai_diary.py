@@ -0,0 +1,271 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to hold the indexes of diary entries
+from collections import deque, namedtuple
+
+# needed to find entries by time
+import bisect
+
+# needed to time stamp diary entries
+import time
+
+# needed to serialize diary entries
+import json
+
+# needed to keep diary entries in a structured form
+from .structured_diary_entry import structured_diary_entry
+
+# needed to spill diary entries to disk
+import os
+
+# needed to keep the diary consistent when written and read from different threads
+import threading
+
+
+# a diary entry as it is kept in the diary: its position in the diary, when it was written, its index keys, the
+# entry itself and the entry in structured form
+DiaryRecord = namedtuple('DiaryRecord', 'cursor time_stamp goal action status entry structured_entry')
+
+
+class AIDiary:
+    """
+    A bounded diary of ai iterations.
+
+    The most recent entries are kept in memory, up to max_entries_in_memory. Older entries are dropped, or written
+    to json lines segment files in spill_folder if one is given. Entries in memory are indexed by goal, action and
+    action status, and can be queried by time range.
+
+    Every entry gets a cursor: a number that increases by one with every entry. Readers can ask for the entries
+    written since the last cursor they saw.
+
+    Each entry is converted to a structured diary entry once, when it is written. Indexes and serialization use
+    the structured entry.
+
+    The diary can stand in for the list the ai used to keep: it supports append, len, iteration and indexing.
+    """
+
+    def __init__(self, max_entries_in_memory=1000, spill_folder=None, entries_per_segment=1000):
+        self._lock = threading.RLock()
+        self._max_entries_in_memory = max_entries_in_memory
+        self._spill_folder = spill_folder
+        self._entries_per_segment = entries_per_segment
+
+        # records in memory keyed by cursor, oldest first
+        self._records = {}
+        self._first_cursor = 0
+        self._next_cursor = 0
+
+        # cursors of the records in memory, by index key, oldest first
+        self._cursors_by_goal = {}
+        self._cursors_by_action = {}
+        self._cursors_by_status = {}
+
+        # records dropped from memory and waiting to be written to the next spill segment
+        self._records_to_spill = []
+
+    def configure(self, max_entries_in_memory=None, spill_folder=None, entries_per_segment=None):
+        # change the diary limits. entries beyond the new memory limit are dropped or spilled right away
+        with self._lock:
+            if max_entries_in_memory is not None:
+                self._max_entries_in_memory = max_entries_in_memory
+            if spill_folder is not None:
+                self._spill_folder = spill_folder or None
+                if self._spill_folder is not None:
+                    os.makedirs(self._spill_folder, exist_ok=True)
+            if entries_per_segment is not None:
+                self._entries_per_segment = entries_per_segment
+            self._drop_oldest_entries()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter([record.entry for record in self.records()])
+
+    def __getitem__(self, index):
+        # index the entries in memory the way a list would be indexed
+        with self._lock:
+            if isinstance(index, slice):
+                return [record.entry for record in self._records.values()][index]
+
+            if index < 0:
+                index += len(self._records)
+            if not 0 <= index < len(self._records):
+                raise IndexError("diary index out of range")
+            return self._records[self._first_cursor + index].entry
+
+    def append(self, entry):
+        # add an entry to the diary and return its cursor
+        with self._lock:
+            cursor = self._next_cursor
+            self._next_cursor += 1
+
+            time_stamp = time.time()
+            seconds_since_previous_entry = None
+            if self._records:
+                seconds_since_previous_entry = time_stamp - self._records[cursor - 1].time_stamp
+            structured_entry = structured_diary_entry(entry, time_stamp, seconds_since_previous_entry)
+
+            record = DiaryRecord(cursor, time_stamp, goal_key(structured_entry), structured_entry.action,
+                                 structured_entry.status, entry, structured_entry)
+            self._records[cursor] = record
+            self._cursors_by_goal.setdefault(record.goal, deque()).append(cursor)
+            self._cursors_by_action.setdefault(record.action, deque()).append(cursor)
+            self._cursors_by_status.setdefault(record.status, deque()).append(cursor)
+
+            self._drop_oldest_entries()
+            return cursor
+
+    def clear(self):
+        with self._lock:
+            self._flush_spilled_records()
+            self._records = {}
+            self._first_cursor = self._next_cursor
+            self._cursors_by_goal = {}
+            self._cursors_by_action = {}
+            self._cursors_by_status = {}
+
+    def cursor(self):
+        # the cursor of the latest entry, or -1 if nothing has been written
+        return self._next_cursor - 1
+
+    def records(self):
+        with self._lock:
+            return list(self._records.values())
+
+    def latest_record(self):
+        # the record of the latest entry still in memory, or None if there is none
+        with self._lock:
+            return self._records.get(self._next_cursor - 1)
+
+    def since(self, cursor, limit=None):
+        # returns the records written after the given cursor, oldest first.
+        # records that have already left memory are not included
+        with self._lock:
+            first_cursor = max(cursor + 1, self._first_cursor)
+            last_cursor = self._next_cursor if limit is None else min(self._next_cursor, first_cursor + limit)
+            return [self._records[c] for c in range(first_cursor, last_cursor)]
+
+    def query(self, goal=None, action=None, status=None, start_time=None, end_time=None, limit=None):
+        # returns the records in memory that match every given filter, oldest first.
+        # goals are given as "goal_state_name-goal_state_value", times as seconds since the epoch
+        with self._lock:
+            candidate_cursors = self._time_range(start_time, end_time)
+
+            # narrow the candidates using the smallest of the requested indexes
+            indexed_cursors = [index.get(key, ()) for index, key in ((self._cursors_by_goal, goal),
+                                                                      (self._cursors_by_action, action),
+                                                                      (self._cursors_by_status, status))
+                               if key is not None]
+            if indexed_cursors:
+                first, last = candidate_cursors.start, candidate_cursors.stop
+                candidate_cursors = [c for c in min(indexed_cursors, key=len) if first <= c < last]
+
+            matching_records = []
+            for cursor in candidate_cursors:
+                record = self._records[cursor]
+                if goal is not None and record.goal != goal:
+                    continue
+                if action is not None and record.action != action:
+                    continue
+                if status is not None and record.status != status:
+                    continue
+                matching_records.append(record)
+                if limit is not None and len(matching_records) >= limit:
+                    break
+            return matching_records
+
+    def _time_range(self, start_time, end_time):
+        # returns the range of cursors in memory whose entries were written within the given times. entries are
+        # written in time order, so the range is found by binary search
+        first_cursor, last_cursor = self._first_cursor, self._next_cursor
+        if start_time is not None:
+            first_cursor = self._bisect_time(start_time, bisect.bisect_left)
+        if end_time is not None:
+            last_cursor = self._bisect_time(end_time, bisect.bisect_right)
+        return range(first_cursor, max(first_cursor, last_cursor))
+
+    def _bisect_time(self, time_stamp, bisect_function):
+        time_stamps = _TimeStamps(self._records, self._first_cursor, len(self._records))
+        return self._first_cursor + bisect_function(time_stamps, time_stamp)
+
+    def _drop_oldest_entries(self):
+        while len(self._records) > self._max_entries_in_memory:
+            record = self._records.pop(self._first_cursor)
+            self._first_cursor += 1
+
+            # the oldest record is at the front of each of its indexes
+            for index, key in ((self._cursors_by_goal, record.goal),
+                               (self._cursors_by_action, record.action),
+                               (self._cursors_by_status, record.status)):
+                cursors = index[key]
+                cursors.popleft()
+                if not cursors:
+                    del index[key]
+
+            if self._spill_folder is not None:
+                self._records_to_spill.append(record)
+                if len(self._records_to_spill) >= self._entries_per_segment:
+                    self._flush_spilled_records()
+
+    def _flush_spilled_records(self):
+        # write the dropped records to a new segment file named after the cursors it contains
+        if not self._records_to_spill or self._spill_folder is None:
+            self._records_to_spill = []
+            return
+
+        first_cursor = self._records_to_spill[0].cursor
+        last_cursor = self._records_to_spill[-1].cursor
+        segment_file_name = os.path.join(self._spill_folder, f"ai_diary_{first_cursor:012d}-{last_cursor:012d}.jsonl")
+        with open(segment_file_name, 'w') as segment_file:
+            for record in self._records_to_spill:
+                segment_file.write(serialize_diary_record(record))
+                segment_file.write("\n")
+        self._records_to_spill = []
+
+    def spilled_segments(self):
+        # returns the paths of the segment files written so far, oldest first
+        if self._spill_folder is None:
+            return []
+        return sorted(os.path.join(self._spill_folder, file_name) for file_name in os.listdir(self._spill_folder)
+                      if file_name.startswith("ai_diary_") and file_name.endswith(".jsonl"))
+
+
+class _TimeStamps:
+    # presents the time stamps of the records in memory as a sequence, so that they can be searched with bisect
+    def __init__(self, records, first_cursor, length):
+        self._records = records
+        self._first_cursor = first_cursor
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        return self._records[self._first_cursor + index].time_stamp
+
+
+def goal_key(structured_entry):
+    # the goal of a diary entry as "goal_state_name-goal_state_value"
+    if structured_entry.goal is None:
+        return None
+    goal_state_name, goal_state_value = structured_entry.goal
+    return f"{goal_state_name}-{goal_state_value}"
+
+
+def serialize_diary_record(record):
+    # a compact, single line json representation of a diary record
+    return json.dumps({"cursor": record.cursor,
+                       "time_stamp": record.time_stamp,
+                       "goal": record.goal,
+                       "action": record.action,
+                       "status": record.status,
+                       "entry": record.structured_entry.to_dict()},
+                      default=str, separators=(',', ':'))
+
+
+def serialize_diary_records(records):
+    # a batch of diary records as a json lines string that can be sent to a client in one piece
+    return "\n".join(serialize_diary_record(record) for record in records)
@@ -0,0 +1,225 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to run actions at the same time
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+# needed to time actions
+import time
+
+# needed to time out remote actions
+import rpyc
+from rpyc.core.netref import BaseNetref
+
+# needed to describe an action chosen by the ai
+from collections import namedtuple
+
+# needed to record the status of each action taken
+from ai_framework.ai_actions import ActionStatus
+
+# needed to name actions and measure them
+from .structured_diary_entry import action_name
+from .action_metrics import ActionMetrics
+
+# needed to record the world after an action without copying it
+from ai_framework.ai_infrastructure.world_snapshot import WorldSnapshot
+
+
+# an action the ai has chosen to take: the goal it pursues as {goal_state_name: goal_state_value}, the plan the action
+# belongs to and the action itself
+PlannedAction = namedtuple('PlannedAction', 'goal plan action')
+
+
+class ActionTimedOut(Exception):
+    pass
+
+
+class ConcurrentActionExecutor:
+    """
+    Takes actions for unrelated goals at the same time.
+
+    Two actions conflict if the world state names in their preconditions and effects overlap. Each run takes the
+    planned actions in the order given, most important first, and runs every action that does not conflict with an
+    action already chosen, up to max_concurrent_actions at once. Actions left out of a run can be planned again in
+    the next one.
+
+    Every action taken is written to the diary as its own entry. The world after an action is the world before the
+    run with the action's own world states as they are once it returns, so an entry never takes credit for the
+    effects of the other actions in the run.
+
+    An action can declare seconds_before_timing_out. Otherwise the executor's default applies, if there is one. An
+    action that runs past its timeout is marked failed and the ai moves on without it. For remote actions, the
+    connection the action lives on is handed to on_action_timeout so that it can be quarantined.
+    """
+
+    def __init__(self, network, diary, max_concurrent_actions=4, seconds_before_timing_out=None,
+                 on_action_timeout=None):
+        self._network = network
+        self._diary = diary
+        self._max_concurrent_actions = max_concurrent_actions
+        self._seconds_before_timing_out = seconds_before_timing_out
+        self._on_action_timeout = on_action_timeout
+        self._metrics = ActionMetrics()
+        self._thread_pool = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_concurrent_actions=None, seconds_before_timing_out=None, on_action_timeout=None):
+        with self._lock:
+            if seconds_before_timing_out is not None:
+                self._seconds_before_timing_out = seconds_before_timing_out or None
+            if on_action_timeout is not None:
+                self._on_action_timeout = on_action_timeout
+            if max_concurrent_actions is not None and max_concurrent_actions != self._max_concurrent_actions:
+                self._max_concurrent_actions = max_concurrent_actions
+                if self._thread_pool is not None:
+                    self._thread_pool.shutdown(wait=False)
+                    self._thread_pool = None
+
+    def max_concurrent_actions(self):
+        return self._max_concurrent_actions
+
+    def metrics(self):
+        return self._metrics
+
+    def run(self, planned_actions):
+        # take every non-conflicting action at once and wait for all of them. returns the diary entries written,
+        # in the order the actions were given
+        chosen_actions = non_conflicting_actions(planned_actions, self._max_concurrent_actions)
+        if not chosen_actions:
+            return []
+
+        # world snapshots are immutable, so the diary can keep them without copying them
+        the_world_state_before = self._network.the_world_states()
+
+        # a single action needs no other thread
+        if len(chosen_actions) == 1:
+            return [self._take_action(chosen_actions[0], the_world_state_before)]
+
+        # actions are submitted holding the lock, so that configure cannot retire the thread pool in the meantime.
+        # a retired pool still finishes the actions submitted to it
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self._max_concurrent_actions,
+                                                       thread_name_prefix="ai_action")
+            futures = [self._thread_pool.submit(self._take_action, planned_action, the_world_state_before)
+                       for planned_action in chosen_actions]
+        return [future.result() for future in futures]
+
+    def _take_action(self, planned_action, the_world_state_before):
+        action = planned_action.action
+        name = action_name(action)
+        names = world_state_names(action)
+        timed_out = False
+        start = time.monotonic()
+        try:
+            self._act(action)
+            action_status = ActionStatus.SUCCESS
+        except ActionTimedOut:
+            action_status = ActionStatus.FAIL
+            timed_out = True
+        except Exception:
+            action_status = ActionStatus.FAIL
+        seconds_to_act = time.monotonic() - start
+        self._metrics.record(name, seconds_to_act, action_status == ActionStatus.SUCCESS, timed_out)
+
+        diary_entry = {"my_goal": planned_action.goal,
+                       "my_plan": planned_action.plan,
+                       "action_taken": action,
+                       "action_status": action_status,
+                       "the_world_state_before": the_world_state_before,
+                       "the_world_state_after": world_state_after(the_world_state_before,
+                                                                  self._network.the_world_states(), names),
+                       "seconds_to_act": seconds_to_act,
+                       "timed_out": timed_out}
+
+        # an action that timed out may still be running, so it is not asked anything more
+        if timed_out:
+            diary_entry["action_taken"] = name
+        else:
+            diary_entry["action_preconditions"] = dict(action.preconditions)
+            diary_entry["post_act_context"] = action.context() if hasattr(action, 'context') else {}
+        self._diary.append(diary_entry)
+
+        if timed_out and self._on_action_timeout is not None and isinstance(action, BaseNetref):
+            self._on_action_timeout(action)
+        return diary_entry
+
+    def _act(self, action):
+        # take the action, raising ActionTimedOut if it runs past its timeout
+        seconds_before_timing_out = getattr(action, 'seconds_before_timing_out', None) or \
+            self._seconds_before_timing_out
+        if seconds_before_timing_out is None:
+            action.act()
+            return
+
+        # remote actions are asked to act with an asynchronous request that expires
+        if isinstance(action, BaseNetref):
+            async_result = rpyc.async_(action.act)()
+            async_result.set_expiry(seconds_before_timing_out)
+            try:
+                async_result.wait()
+            except rpyc.AsyncResultTimeout:
+                raise ActionTimedOut
+            async_result.value
+            return
+
+        # local actions act on a thread of their own that is abandoned if it runs too long
+        outcome = {}
+
+        def act():
+            try:
+                action.act()
+            except Exception as error:
+                outcome["error"] = error
+
+        acting_thread = threading.Thread(target=act, daemon=True)
+        acting_thread.start()
+        acting_thread.join(seconds_before_timing_out)
+        if acting_thread.is_alive():
+            raise ActionTimedOut
+        if "error" in outcome:
+            raise outcome["error"]
+
+    def close(self):
+        with self._lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=True)
+                self._thread_pool = None
+
+
+def world_state_names(action):
+    # the world states an action reads or writes
+    return set(action.preconditions.keys()) | set(action.effects.keys())
+
+
+def world_state_after(world_state_before, world_state_now, names):
+    # the world before an action with only the named world states brought up to date. the world never published
+    # this view, so it has no version
+    changes = [(name, world_state_now[name]) for name in names if name in world_state_now]
+    if isinstance(world_state_before, WorldSnapshot):
+        return world_state_before.updated(changes).unversioned()
+    world_state = dict(world_state_before)
+    world_state.update(changes)
+    return world_state
+
+
+def non_conflicting_actions(planned_actions, max_actions):
+    # choose, in the order given, the planned actions whose world states do not overlap with those of an action
+    # already chosen. the same action is never chosen twice
+    chosen_actions = []
+    claimed_world_state_names = set()
+    chosen_action_ids = set()
+    for planned_action in planned_actions:
+        if len(chosen_actions) >= max_actions:
+            break
+        if id(planned_action.action) in chosen_action_ids:
+            continue
+        names = world_state_names(planned_action.action)
+        if names & claimed_world_state_names:
+            continue
+        chosen_actions.append(planned_action)
+        chosen_action_ids.add(id(planned_action.action))
+        claimed_world_state_names |= names
+    return chosen_actions
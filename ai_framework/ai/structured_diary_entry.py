@@ -0,0 +1,175 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to define the structured diary entry
+from dataclasses import dataclass, field, fields
+
+# needed to time stamp structured diary entries
+import time
+
+# needed to read action statuses
+from enum import Enum
+
+# needed to keep world snapshots without copying them
+from ai_framework.ai_infrastructure.world_snapshot import WorldSnapshot
+
+
+@dataclass(frozen=True)
+class StructuredDiaryEntry:
+    """
+    A diary entry made only of plain values: names, numbers, tuples and dictionaries.
+
+    The entries the ai writes hold live actions, goals and enums, which may be proxies for objects in other
+    processes. A structured entry reads them once, so that the demo, the diary clients and any log can use the entry
+    without calls back to those objects or parsing of their string representations.
+    """
+
+    # the goal pursued as a (goal state name, goal state value) pair, or None if the entry has no goal
+    goal: tuple = None
+
+    # the class names of the actions in the plan to achieve the goal, or None if there was no plan
+    plan: tuple = None
+
+    # the class name of the action taken, or None if no action was taken
+    action: str = None
+
+    # the action status as 'success' or 'fail', or None if unknown
+    status: str = None
+
+    # the preconditions of the action taken and the changes it made to the world
+    preconditions: dict = field(default_factory=dict)
+    effects: dict = field(default_factory=dict)
+
+    # the world before and after the action. these are the immutable world snapshots the ai read, when it read
+    # them from a local world, so that entries share them instead of holding copies
+    world_state_before: dict = field(default_factory=dict)
+    world_state_after: dict = field(default_factory=dict)
+
+    # the versions of the world snapshots before and after the action, or None if the world was not versioned or
+    # the snapshot is a view of the world that the world never published
+    world_version_before: int = None
+    world_version_after: int = None
+
+    # the prioritized goals as (goal state name, goal state value, priority, deferred) tuples
+    prioritized_goals: tuple = ()
+
+    # the resources registered with the ai
+    resources: tuple = ()
+
+    # the context after the action was taken
+    context: dict = field(default_factory=dict)
+
+    # when the entry was written and the seconds since the entry before it, in seconds since the epoch
+    time_stamp: float = 0.0
+    seconds_since_previous_entry: float = None
+
+    # how long the action took, if measured, and whether it ran past its timeout
+    seconds_to_act: float = None
+    timed_out: bool = False
+
+    def is_idle(self):
+        return self.goal == ("NONE", True)
+
+    def is_blocked(self):
+        return self.plan is None
+
+    def to_dict(self):
+        # world snapshots are copied into plain dictionaries only when the entry is serialized
+        return {entry_field.name: _plain_value(getattr(self, entry_field.name)) for entry_field in fields(self)}
+
+
+def structured_diary_entry(entry, time_stamp=None, seconds_since_previous_entry=None):
+    # returns the structured form of the given diary entry. entries that are already structured are returned as is
+    if isinstance(entry, StructuredDiaryEntry):
+        return entry
+
+    world_state_before = _world_state(entry.get('the_world_state_before', {}))
+    world_state_after = _world_state(entry.get('the_world_state_after', {}))
+
+    return StructuredDiaryEntry(goal=_goal(entry.get('my_goal')),
+                                plan=_plan(entry.get('my_plan')),
+                                action=action_name(entry.get('action_taken')),
+                                status=_status(entry.get('action_status')),
+                                preconditions=_plain_value(entry.get('action_preconditions', {})) or {},
+                                effects=world_state_changes(world_state_before, world_state_after),
+                                world_state_before=world_state_before,
+                                world_state_after=world_state_after,
+                                world_version_before=getattr(world_state_before, 'version', None),
+                                world_version_after=getattr(world_state_after, 'version', None),
+                                prioritized_goals=tuple(_prioritized_goal(goal)
+                                                        for goal in entry.get('prioritized_goals', ())),
+                                resources=tuple(str(resource) for resource in entry.get('my_resources', ())),
+                                context=_plain_value(entry.get('post_act_context', {})) or {},
+                                time_stamp=time.time() if time_stamp is None else time_stamp,
+                                seconds_since_previous_entry=seconds_since_previous_entry,
+                                seconds_to_act=entry.get('seconds_to_act'),
+                                timed_out=bool(entry.get('timed_out', False)))
+
+
+def action_name(action):
+    # the class name of an action, or of the action in a plan step
+    if action is None or action == "":
+        return None
+    if isinstance(action, str):
+        return action
+    action = getattr(action, 'action', action)
+    return action.__class__.__name__
+
+
+def world_state_changes(world_before, world_after):
+    # the states in the world after that are new or different from the world before
+    return {world_state_name: world_state_value for world_state_name, world_state_value in world_after.items()
+            if world_state_name not in world_before or world_before[world_state_name] != world_state_value}
+
+
+def _world_state(world_state):
+    # world snapshots never change, so they are kept as they are. other world states are copied
+    if isinstance(world_state, WorldSnapshot):
+        return world_state
+    return _plain_value(world_state) or {}
+
+
+def _goal(goal):
+    # a goal given as {goal_state_name: goal_state_value}
+    try:
+        goal_state_name, goal_state_value = next(iter(goal.items()))
+    except (AttributeError, StopIteration, TypeError):
+        return None
+    return goal_state_name, _plain_value(goal_state_value)
+
+
+def _plan(plan):
+    if plan is None:
+        return None
+    if isinstance(plan, str):
+        return (plan,)
+    return tuple(action_name(step) for step in plan)
+
+
+def _status(action_status):
+    if action_status is None:
+        return None
+    if isinstance(action_status, Enum):
+        return action_status.value
+
+    # statuses from other processes arrive as proxies of the enum
+    action_status = str(action_status)
+    return action_status.split(".")[-1].lower()
+
+
+def _prioritized_goal(goal):
+    return (goal.goal_state_name, goal.goal_state_value, round(goal.sort_index, 2), goal.deferred)
+
+
+def _plain_value(value):
+    # copy dictionaries and lists, including proxies of dictionaries and lists from other processes, into plain values
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, 'items'):
+        return {str(key): _plain_value(item) for key, item in value.items()}
+    if hasattr(value, '__iter__') and not isinstance(value, bytes):
+        return [_plain_value(item) for item in value]
+    return str(value)
@@ -0,0 +1,95 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import json
+import tempfile
+import time
+import unittest
+from enum import Enum
+
+from ai_framework.ai.ai_diary import AIDiary, serialize_diary_records
+from ai_framework.ai.ai import AI
+
+
+class DiaryTestStatus(Enum):
+    SUCCESS = 'success'
+    FAIL = 'fail'
+
+
+def diary_entry(goal_state_name, action_taken, action_status):
+    return {"my_goal": {goal_state_name: True},
+            "action_taken": action_taken,
+            "action_status": action_status}
+
+
+class TestAIDiary(unittest.TestCase):
+    def test_diary_keeps_only_the_most_recent_entries(self):
+        ai_diary = AIDiary(max_entries_in_memory=3)
+        for n in range(5):
+            ai_diary.append(diary_entry(f"goal_{n}", "action", DiaryTestStatus.SUCCESS))
+
+        # the diary behaves like a list of its most recent entries
+        self.assertEqual(3, len(ai_diary))
+        self.assertEqual({"goal_4": True}, ai_diary[-1]['my_goal'])
+        self.assertEqual({"goal_2": True}, ai_diary[0]['my_goal'])
+        self.assertEqual(4, ai_diary.cursor())
+
+        # dropped entries are no longer indexed
+        self.assertEqual([], ai_diary.query(goal="goal_0-True"))
+        self.assertEqual(3, len(ai_diary.query(action="action")))
+
+    def test_since_cursor(self):
+        ai_diary = AIDiary()
+        for n in range(5):
+            ai_diary.append(diary_entry("goal", f"action_{n}", DiaryTestStatus.SUCCESS))
+
+        self.assertEqual([3, 4], [record.cursor for record in ai_diary.since(2)])
+        self.assertEqual([0, 1], [record.cursor for record in ai_diary.since(-1, limit=2)])
+        self.assertEqual([], ai_diary.since(4))
+
+    def test_query_by_index_and_time(self):
+        ai_diary = AIDiary()
+        ai_diary.append(diary_entry("first_goal", "first_action", DiaryTestStatus.SUCCESS))
+        ai_diary.append(diary_entry("second_goal", "second_action", DiaryTestStatus.FAIL))
+        time.sleep(0.01)
+        start_time = time.time()
+        ai_diary.append(diary_entry("first_goal", "second_action", DiaryTestStatus.FAIL))
+
+        self.assertEqual([0, 2], [record.cursor for record in ai_diary.query(goal="first_goal-True")])
+        self.assertEqual([1, 2], [record.cursor for record in ai_diary.query(status="fail")])
+        self.assertEqual([2], [record.cursor for record in ai_diary.query(goal="first_goal-True", status="fail")])
+        self.assertEqual([2], [record.cursor for record in ai_diary.query(start_time=start_time)])
+        self.assertEqual([0, 1], [record.cursor for record in ai_diary.query(end_time=start_time)])
+        self.assertEqual([], ai_diary.query(action="unknown_action"))
+
+    def test_spilling_to_disk(self):
+        with tempfile.TemporaryDirectory() as spill_folder:
+            ai_diary = AIDiary(max_entries_in_memory=2, spill_folder=spill_folder, entries_per_segment=2)
+            for n in range(6):
+                ai_diary.append(diary_entry(f"goal_{n}", "action", DiaryTestStatus.SUCCESS))
+
+            # four entries left memory and were written as two segments of two entries each
+            segments = ai_diary.spilled_segments()
+            self.assertEqual(2, len(segments))
+            with open(segments[0]) as segment_file:
+                spilled_records = [json.loads(line) for line in segment_file]
+            self.assertEqual([0, 1], [record["cursor"] for record in spilled_records])
+            self.assertEqual("success", spilled_records[0]["status"])
+
+    def test_serialized_batches(self):
+        ai_diary = AIDiary()
+        ai_diary.append(diary_entry("goal", "action", DiaryTestStatus.SUCCESS))
+        batch = serialize_diary_records(ai_diary.since(-1))
+        record = json.loads(batch.splitlines()[0])
+        self.assertEqual("goal-True", record["goal"])
+        self.assertEqual("success", record["entry"]["status"])
+
+    def test_the_ai_serves_the_diary_its_actions_write_to(self):
+        ai = AI()
+        self.assertIsInstance(ai.diary(), AIDiary)
+        self.assertIs(ai.diary(), ai.action_executor()._diary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,283 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import threading
+import time
+import unittest
+
+# needed to time out actions in another process
+import rpyc
+from rpyc.utils.server import ThreadedServer
+
+from ai_framework.ai.ai_diary import AIDiary
+from ai_framework.ai.structured_diary_entry import structured_diary_entry
+from ai_framework.ai.concurrent_action_executor import ConcurrentActionExecutor, PlannedAction, \
+    non_conflicting_actions
+from ai_framework.ai_actions import ActionStatus
+from ai_framework.ai_infrastructure.world_snapshot import WorldSnapshot
+
+# needed to run actions that share a pooled connection to the ai
+from ai_framework.ai_actions.ai_connection_pool import ai_connection, close_ai_connections
+
+
+class ExecutorTestNetwork:
+    def __init__(self):
+        self.world_states = {}
+
+    def the_world_states(self):
+        return dict(self.world_states)
+
+
+class SnapshotTestNetwork(ExecutorTestNetwork):
+    # a network that publishes a new world snapshot every time it is read
+    def __init__(self):
+        super().__init__()
+        self.snapshot = WorldSnapshot()
+
+    def the_world_states(self):
+        self.snapshot = self.snapshot.cleared().updated(self.world_states.items())
+        return self.snapshot
+
+
+class ExecutorTestAction:
+    # an action that waits at a barrier, so that it only completes if enough actions run at the same time
+    def __init__(self, network, preconditions, effects, barrier=None, fails=False):
+        self.network = network
+        self.preconditions = preconditions
+        self.effects = effects
+        self.barrier = barrier
+        self.fails = fails
+
+    def act(self):
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        if self.fails:
+            raise RuntimeError("action failed")
+        self.network.world_states.update(self.effects)
+
+    def context(self):
+        return {}
+
+
+class SlowTestAction:
+    def __init__(self, seconds_to_act, seconds_before_timing_out=None):
+        self.preconditions = {}
+        self.effects = {f"action_taking_{seconds_to_act}_seconds_done": True}
+        self.seconds_to_act = seconds_to_act
+        self.seconds_before_timing_out = seconds_before_timing_out
+
+    def act(self):
+        time.sleep(self.seconds_to_act)
+
+    def context(self):
+        return {}
+
+
+class TimedTestAction(SlowTestAction):
+    # a slow action that records when it started and stopped acting
+    def __init__(self, seconds_to_act, acting_times):
+        super().__init__(seconds_to_act)
+        self.acting_times = acting_times
+
+    def act(self):
+        start = time.monotonic()
+        super().act()
+        self.acting_times.append((start, time.monotonic()))
+
+
+class SlowActionService(rpyc.Service):
+    def exposed_slow_action(self, seconds_to_act):
+        return SlowTestAction(seconds_to_act)
+
+
+class ActionRegistryService(rpyc.Service):
+    # a stand-in ai server that keeps the actions registered with it
+    registered_actions = []
+    executor_test_network = ExecutorTestNetwork()
+
+    def exposed_network(self):
+        return self.executor_test_network
+
+    def exposed_add_action(self, action):
+        self.registered_actions.append(action)
+
+
+class TestConcurrentActionExecutor(unittest.TestCase):
+    def setUp(self):
+        self.network = ExecutorTestNetwork()
+        self.diary = AIDiary()
+        self.action_executor = ConcurrentActionExecutor(self.network, self.diary, max_concurrent_actions=2)
+
+    def tearDown(self):
+        self.action_executor.close()
+
+    def test_conflicting_actions_are_not_chosen_together(self):
+        laundry = ExecutorTestAction(self.network, {"laundry_sorted": True}, {"laundry_done": True})
+        temperature = ExecutorTestAction(self.network, {}, {"body_temperature_adjusted": True})
+        more_laundry = ExecutorTestAction(self.network, {}, {"laundry_sorted": True})
+        lights = ExecutorTestAction(self.network, {}, {"lights_on": True})
+
+        planned_actions = [PlannedAction({"goal": True}, None, action)
+                           for action in (laundry, more_laundry, temperature, lights, laundry)]
+        chosen_actions = [planned_action.action for planned_action in non_conflicting_actions(planned_actions, 10)]
+        self.assertEqual([laundry, temperature, lights], chosen_actions)
+
+        # the concurrency limit caps the number of actions chosen
+        self.assertEqual(2, len(non_conflicting_actions(planned_actions, 2)))
+
+    def test_non_conflicting_actions_run_at_the_same_time(self):
+        # neither action can pass the barrier unless both run at once
+        barrier = threading.Barrier(2)
+        laundry = ExecutorTestAction(self.network, {}, {"laundry_done": True}, barrier)
+        temperature = ExecutorTestAction(self.network, {}, {"body_temperature_adjusted": True}, barrier, fails=True)
+
+        diary_entries = self.action_executor.run([PlannedAction({"laundry_done": True}, None, laundry),
+                                                  PlannedAction({"body_temperature_adjusted": True}, None,
+                                                                temperature)])
+
+        # each action has its own diary entry
+        self.assertFalse(barrier.broken)
+        self.assertEqual(2, len(self.diary))
+        self.assertEqual([ActionStatus.SUCCESS, ActionStatus.FAIL],
+                         [diary_entry["action_status"] for diary_entry in diary_entries])
+        self.assertEqual({"laundry_done": True}, diary_entries[0]["the_world_state_after"])
+
+    def test_each_action_records_only_its_own_effects(self):
+        barrier = threading.Barrier(2)
+        laundry = ExecutorTestAction(self.network, {}, {"laundry_done": True}, barrier)
+        temperature = ExecutorTestAction(self.network, {}, {"body_temperature_adjusted": True}, barrier)
+
+        diary_entries = self.action_executor.run([PlannedAction({"laundry_done": True}, None, laundry),
+                                                  PlannedAction({"body_temperature_adjusted": True}, None,
+                                                                temperature)])
+
+        # both actions changed the world, but each entry holds only the change its own action made
+        self.assertEqual({"laundry_done": True}, diary_entries[0]["the_world_state_after"])
+        self.assertEqual({"body_temperature_adjusted": True}, diary_entries[1]["the_world_state_after"])
+
+    def test_the_world_after_an_action_is_not_a_published_version(self):
+        network = SnapshotTestNetwork()
+        network.world_states["body_temperature_monitored"] = True
+        action_executor = ConcurrentActionExecutor(network, self.diary)
+        laundry = ExecutorTestAction(network, {}, {"laundry_done": True})
+        diary_entry = action_executor.run([PlannedAction({"laundry_done": True}, None, laundry)])[0]
+
+        # the world after the action holds the action's own effects, but the world never published it
+        the_world_state_after = diary_entry["the_world_state_after"]
+        self.assertEqual({"body_temperature_monitored": True, "laundry_done": True}, the_world_state_after)
+        self.assertIsNone(the_world_state_after.version)
+
+        entry = structured_diary_entry(diary_entry)
+        self.assertEqual(diary_entry["the_world_state_before"].version, entry.world_version_before)
+        self.assertIsNone(entry.world_version_after)
+
+    def test_configuring_while_running(self):
+        # changing the concurrency limit retires the thread pool, but never under a run that is submitting actions
+        actions = [ExecutorTestAction(self.network, {}, {f"state_{n}": True}) for n in range(2)]
+        errors = []
+
+        def run():
+            for _ in range(200):
+                try:
+                    self.action_executor.run([PlannedAction({"goal": True}, None, action) for action in actions])
+                except RuntimeError as error:
+                    errors.append(error)
+
+        running_thread = threading.Thread(target=run)
+        running_thread.start()
+        for n in range(200):
+            self.action_executor.configure(max_concurrent_actions=2 + n % 2)
+        running_thread.join()
+        self.assertEqual([], errors)
+
+
+class TestActionTimeouts(unittest.TestCase):
+    def setUp(self):
+        self.network = ExecutorTestNetwork()
+        self.diary = AIDiary()
+        self.timed_out_actions = []
+        self.action_executor = ConcurrentActionExecutor(self.network, self.diary,
+                                                        on_action_timeout=self.timed_out_actions.append)
+
+    def tearDown(self):
+        self.action_executor.close()
+
+    def test_a_local_action_that_runs_too_long_fails(self):
+        diary_entries = self.action_executor.run([PlannedAction({"goal": True}, None, SlowTestAction(5, 0.1)),
+                                                  PlannedAction({"goal": True}, None, SlowTestAction(0))])
+        self.assertEqual([ActionStatus.FAIL, ActionStatus.SUCCESS],
+                         [diary_entry["action_status"] for diary_entry in diary_entries])
+        self.assertTrue(diary_entries[0]["timed_out"])
+        self.assertLess(diary_entries[0]["seconds_to_act"], 1)
+
+        # the metrics show the timeout and the latencies
+        metrics = self.action_executor.metrics()
+        self.assertEqual(1, metrics.timeouts())
+        self.assertEqual(2, metrics.summary()["SlowTestAction"]["taken"])
+        self.assertTrue(self.diary.query(status="fail")[0].structured_entry.timed_out)
+
+        # only remote actions have a connection to quarantine
+        self.assertEqual([], self.timed_out_actions)
+
+    def test_a_remote_action_that_runs_too_long_is_quarantined(self):
+        server = ThreadedServer(SlowActionService(), hostname="127.0.0.1", port=0,
+                                protocol_config={"allow_all_attrs": True})
+        server_thread = threading.Thread(target=server.start, daemon=True)
+        server_thread.start()
+        while not server.active:
+            time.sleep(0.01)
+
+        connection = rpyc.connect("127.0.0.1", server.port)
+        try:
+            slow_action = connection.root.slow_action(2)
+            self.action_executor.configure(seconds_before_timing_out=0.2)
+            start = time.monotonic()
+            diary_entries = self.action_executor.run([PlannedAction({"goal": True}, None, slow_action)])
+            self.assertLess(time.monotonic() - start, 2)
+            self.assertEqual(ActionStatus.FAIL, diary_entries[0]["action_status"])
+            self.assertEqual([slow_action], self.timed_out_actions)
+        finally:
+            connection.close()
+            server.close()
+
+
+class TestPooledActions(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadedServer(ActionRegistryService(), hostname="127.0.0.1", port=0,
+                                     protocol_config={"allow_all_attrs": True})
+        server_thread = threading.Thread(target=self.server.start, daemon=True)
+        server_thread.start()
+        while not self.server.active:
+            time.sleep(0.01)
+
+        self.diary = AIDiary()
+        self.action_executor = ConcurrentActionExecutor(ActionRegistryService.executor_test_network, self.diary,
+                                                        max_concurrent_actions=2)
+
+    def tearDown(self):
+        self.action_executor.close()
+        close_ai_connections()
+        self.server.close()
+        ActionRegistryService.registered_actions.clear()
+
+    def test_actions_sharing_a_connection_run_at_the_same_time(self):
+        # both actions live on the one pooled connection to the ai
+        acting_times = []
+        pooled_connection = ai_connection("127.0.0.1", self.server.port)
+        for seconds_to_act in (0.8, 1):
+            pooled_connection.register(TimedTestAction(seconds_to_act, acting_times))
+        self.assertEqual(2, len(ActionRegistryService.registered_actions))
+
+        diary_entries = self.action_executor.run([PlannedAction({"goal": True}, None, action)
+                                                  for action in ActionRegistryService.registered_actions])
+        self.assertEqual([ActionStatus.SUCCESS, ActionStatus.SUCCESS],
+                         [diary_entry["action_status"] for diary_entry in diary_entries])
+
+        # each action started before the other one finished
+        (first_start, first_end), (second_start, second_end) = acting_times
+        self.assertLess(max(first_start, second_start), min(first_end, second_end))
+        self.assertLess(max(first_end, second_end) - min(first_start, second_start), 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import json
+import unittest
+from collections import namedtuple
+from enum import Enum
+
+from ai_framework.ai.ai_diary import AIDiary, serialize_diary_records
+from ai_framework.ai.structured_diary_entry import structured_diary_entry
+from ai_framework.ai_goals.ai_goals import AIGoal
+from ai_framework.ai_infrastructure.world_snapshot import WorldSnapshot
+
+
+class StructuredTestStatus(Enum):
+    SUCCESS = 'success'
+    FAIL = 'fail'
+
+
+class MonitorBodyTemperature:
+    pass
+
+
+class AdjustBodyTemperature:
+    pass
+
+
+# plan steps hold the action they plan to take
+PlanStep = namedtuple('PlanStep', 'action services')
+
+
+def diary_entry():
+    return {"my_goal": {"body_temperature_adjusted": True},
+            "my_plan": [PlanStep(MonitorBodyTemperature(), {}), PlanStep(AdjustBodyTemperature(), {})],
+            "action_taken": AdjustBodyTemperature(),
+            "action_status": StructuredTestStatus.SUCCESS,
+            "action_preconditions": {"body_temperature_monitored": True},
+            "the_world_state_before": {"body_temperature_monitored": True},
+            "the_world_state_after": {"body_temperature_monitored": True, "body_temperature_adjusted": True},
+            "prioritized_goals": [AIGoal("body_temperature_adjusted", True, 0.6, 0.8)],
+            "my_resources": [MonitorBodyTemperature.__name__],
+            "post_act_context": {"readings": (98.6, 99.1)}}
+
+
+class TestStructuredDiaryEntry(unittest.TestCase):
+    def test_entries_are_read_into_plain_values(self):
+        entry = structured_diary_entry(diary_entry(), time_stamp=10.0)
+
+        self.assertEqual(("body_temperature_adjusted", True), entry.goal)
+        self.assertEqual(("MonitorBodyTemperature", "AdjustBodyTemperature"), entry.plan)
+        self.assertEqual("AdjustBodyTemperature", entry.action)
+        self.assertEqual("success", entry.status)
+        self.assertEqual({"body_temperature_adjusted": True}, entry.effects)
+        self.assertEqual((("body_temperature_adjusted", True, 1.0, False),), entry.prioritized_goals)
+        self.assertEqual({"readings": [98.6, 99.1]}, entry.context)
+        self.assertFalse(entry.is_idle())
+        self.assertFalse(entry.is_blocked())
+
+        # structured entries are not structured again
+        self.assertIs(entry, structured_diary_entry(entry))
+
+    def test_world_snapshots_are_kept_with_their_versions(self):
+        world_state_before = WorldSnapshot().updated([("body_temperature_monitored", True)])
+        world_state_after = world_state_before.updated([("body_temperature_adjusted", True)])
+        entry = structured_diary_entry(dict(diary_entry(), the_world_state_before=world_state_before,
+                                            the_world_state_after=world_state_after))
+
+        # snapshots are shared with the world rather than copied, and copied only when serialized
+        self.assertIs(world_state_after, entry.world_state_after)
+        self.assertEqual((world_state_before.version, world_state_after.version),
+                         (entry.world_version_before, entry.world_version_after))
+        self.assertEqual({"body_temperature_adjusted": True}, entry.effects)
+        self.assertEqual({"body_temperature_monitored": True, "body_temperature_adjusted": True},
+                         json.loads(json.dumps(entry.to_dict()))["world_state_after"])
+
+    def test_idle_and_blocked_entries(self):
+        self.assertTrue(structured_diary_entry({"my_goal": {"NONE": True}}).is_idle())
+        self.assertTrue(structured_diary_entry({"my_goal": {"goal": True}, "my_plan": None}).is_blocked())
+
+    def test_the_diary_serializes_structured_entries(self):
+        ai_diary = AIDiary()
+        ai_diary.append(diary_entry())
+        ai_diary.append(diary_entry())
+
+        lines = serialize_diary_records(ai_diary.records()).splitlines()
+        serialized_entry = json.loads(lines[-1])["entry"]
+        self.assertEqual(["body_temperature_adjusted", True], serialized_entry["goal"])
+        self.assertEqual("AdjustBodyTemperature", serialized_entry["action"])
+        self.assertIsNotNone(serialized_entry["seconds_since_previous_entry"])
+
+        # the diary indexes entries by action class name
+        self.assertEqual(2, len(ai_diary.query(action="AdjustBodyTemperature")))
+
+
+if __name__ == '__main__':
+    unittest.main()
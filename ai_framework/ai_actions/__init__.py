@@ -3,3 +3,7 @@ __copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
 __version__ = "0.0.1"
 
 from .ai_actions import AIaction, ActionStatus, AIConnectionLost
+from .reconnect_policy import ReconnectPolicy
+from .async_ai_actions import AsyncAIaction
+from .ai_event_loop import start_monitor, monitor_periodically, run_blocking
+from .framed_transport_client import FramedTransportClient, FramedTransportError
@@ -6,14 +6,11 @@ __version__ = "0.0.1"
 
 # needed to copy the intended effects into the actual effects
 import copy
-# needed to keep the action alive in its thread
-import time
 # defines action status
 from enum import Enum
-from threading import Thread
 
 # needed to connect to the remote server
-import rpyc
+from .ai_connection_pool import ai_connection, is_connection_failure
 from goap.action import Action
 
 # needed for context validation
@@ -26,10 +23,15 @@ class AIConnectionLost(Exception):
 
 class AIaction(Action):
 
-    def __init__(self, preconditions={}, initial_effects={}, server="localhost", port=12345):
+    def __init__(self, preconditions={}, initial_effects={}, server="localhost", port=12345, reconnect_policy=None,
+                 seconds_before_timing_out=None):
         # the preconditions for using this action
         self.preconditions = preconditions
 
+        # how long the ai waits for this action to act before marking it failed and moving on. None leaves it to the
+        # ai server's default
+        self.seconds_before_timing_out = seconds_before_timing_out
+
         # the intended effect of the action on the world
         self.effects = initial_effects
 
@@ -39,62 +41,15 @@ class AIaction(Action):
         # the data context under which this action occurs
         self._context = {}
 
-        # create a connection to the remote ai
-        self._connection = rpyc.connect(server,
-                                        port,
-                                        config={"allow_all_attrs": True,
-                                                "allow_public_attrs": True,
-                                                "allow_setattr": True,
-                                                "instantiate_custom_exceptions": True,
-                                                "import_custom_exceptions": True,
-                                                "sync_request_timeout": None,
-                                                "allow_pickle": True
-                                                })
-
-        # create a connection to the network resources
-        self._network = self._connection.root.network()
+        # share the process-wide connection to the remote ai and its network resources. the reconnect policy
+        # applies if this action is the first to connect to the server
+        self._ai_connection = ai_connection(server, port, reconnect_policy)
 
         # note: the following must be done as last parts of initialization
 
-        # create and register a remote action
-        try:
-            self._connection.root.add_action(self)
-
-        except:
-            # if the connection to the ai server is lost. retry the connection until re-established
-            while True:
-                try:
-                    print("reconnecting")
-                    self._connection = rpyc.connect(server,
-                                                    port,
-                                                    config={"allow_all_attrs": True,
-                                                            "allow_public_attrs": True,
-                                                            "allow_setattr": True,
-                                                            "instantiate_custom_exceptions": True,
-                                                            "import_custom_exceptions": True,
-                                                            "sync_request_timeout": None,
-                                                            "allow_pickle": True
-                                                            })
-
-                    # re-create a connection to the network resources
-                    self._network = self._connection.root.network()
-
-                    # register with the ai once the connection is re-established
-                    self._connection.root.add_action(self)
-                    print("reconnected")
-                    break
-                except:
-                    continue
-
-        # keep the action alive while still able to process incoming requests from the AI
-        thread = Thread(target=self._stay_alive)
-        thread.start()
-
-    @staticmethod
-    def _stay_alive():
-        # keep the action alive in its thread
-        while True:
-            time.sleep(5)
+        # create and register a remote action. if the connection to the ai server is lost, the shared connection
+        # re-establishes it and registers this action again
+        self._ai_connection.register(self)
 
     @staticmethod
     def check_connection():
@@ -104,12 +59,34 @@ class AIaction(Action):
 
     def update_the_world(self, state_name, state_value, context):
         # update the world state
-        # todo this fails when there is a break in connection. how to handle the failure?
+        self._update_network(lambda network: network.update_the_world(state_name, state_value, context))
+
+    def update_the_world_many(self, effects, context):
+        # update the world with every given effect in a single round trip to the ai server.
+        # the effects are sent as a tuple of (state name, state value) pairs so that they travel by value
+        effect_pairs = tuple(effects.items())
+        self._update_network(lambda network: network.update_the_world_many(effect_pairs, context))
+
+    def _update_network(self, update):
+        # apply the given update to the ai's network resources. if the connection to the ai has been lost,
+        # reconnect (following the reconnect policy) and try the update once more
+        connection = self._ai_connection.connection()
+        try:
+            update(self._ai_connection.network())
+            return
+        except Exception as error:
+            if not is_connection_failure(connection, error) or not self._ai_connection.reconnect(connection):
+                raise AIConnectionLost
+
         try:
-            self._network.update_the_world(state_name, state_value, context)
+            update(self._ai_connection.network())
         except:
             raise AIConnectionLost
 
+    def connection_statistics(self):
+        # returns the counters of the connection to the ai shared by this action
+        return self._ai_connection.statistics()
+
     def act(self):
         # assume that the act will have the intended effect
         self.actual_effects = copy.copy(self.effects)
@@ -117,21 +94,22 @@ class AIaction(Action):
         # every AI action runs custom behavior. this behavior may change the actual effects
         self.behavior()
 
+        # tell the world what the action did
+        self._update_the_world_with_actual_effects()
+
+    def _update_the_world_with_actual_effects(self):
         # build a world event then update the world with that new world event
         if self.actual_effects == {}:
             new_world_event_state_name = ""
             new_world_event_state_value = True
             self.update_the_world(new_world_event_state_name, new_world_event_state_value, self._context)
         else:
-            # step through the actual effects and update the world with each actual effect listed
-            new_world_event_state_names = list(self.actual_effects.keys())
-            for new_world_event_state_name in new_world_event_state_names:
-                new_world_event_state_value = self.actual_effects[new_world_event_state_name]
-                self.update_the_world(new_world_event_state_name, new_world_event_state_value, self._context)
+            # update the world with all the actual effects at once
+            self.update_the_world_many(self.actual_effects, self._context)
 
     def _unregister(self):
         # unregisters the action from the ai server
-        self._connection.root.remove_action(self)
+        self._ai_connection.unregister(self)
 
     def behavior(self):
         # custom behavior must be specified by anyone implementing an AI action
@@ -0,0 +1,253 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to connect to the remote server
+import rpyc
+
+# needed to serve requests from the ai and to share connections between threads
+import threading
+
+# needed to pause between reconnection attempts and to measure time spent disconnected
+import time
+
+# needed to decide when to try reconnecting
+from .reconnect_policy import ReconnectPolicy
+
+
+# the protocol used by every connection to the ai server
+ai_connection_config = {"allow_all_attrs": True,
+                        "allow_public_attrs": True,
+                        "allow_setattr": True,
+                        "instantiate_custom_exceptions": True,
+                        "import_custom_exceptions": True,
+                        "sync_request_timeout": None,
+                        "allow_pickle": True
+                        }
+
+# the number of threads that serve requests from the ai on each connection. every action the ai takes at the same
+# time over one connection needs a thread of its own
+serving_threads_per_connection = 4
+
+
+class AIConnection:
+    """
+    A connection to an ai server shared by every action in the process that uses the same server and port.
+
+    The connection holds one reference to the ai's network resources and several threads that serve requests from
+    the ai, so that the ai can take more than one of the connection's actions at the same time. If the connection is
+    lost, it reconnects following its reconnect policy and registers every one of its actions again.
+    Counters of connection attempts and time spent disconnected are kept for monitoring.
+    """
+
+    def __init__(self, server, port, reconnect_policy=None, serving_threads=None):
+        self._server = server
+        self._port = port
+        self._reconnect_policy = reconnect_policy or ReconnectPolicy()
+        self._serving_threads = serving_threads or serving_threads_per_connection
+
+        self._lock = threading.RLock()
+        self._actions = {}
+        self._closed = False
+
+        self._connection = None
+        self._network = None
+
+        # connection counters
+        self._connection_attempts = 0
+        self._failed_connection_attempts = 0
+        self._reconnects = 0
+        self._seconds_disconnected = 0.0
+        self._disconnected_since = time.monotonic()
+
+        # make the first connection under the same policy used to reconnect
+        with self._lock:
+            last_error = self._connect_with_backoff()
+        if last_error is not None:
+            raise ConnectionError(f"unable to connect to the ai server at {server}:{port}") from last_error
+
+    def _connect(self):
+        # create a connection to the remote ai and to its network resources
+        connection = rpyc.connect(self._server, self._port, config=ai_connection_config)
+        self._connection = connection
+        self._network = connection.root.network()
+
+        # serve incoming requests from the ai for as long as the connection is open. this thread also keeps the
+        # process and its actions alive
+        thread = threading.Thread(target=self._serve, args=(connection,))
+        thread.start()
+
+    def _connect_with_backoff(self):
+        # connect and register every action, waiting longer after each failed attempt.
+        # returns None once connected, or the last error if the reconnect policy gives up
+        attempt = 0
+        while True:
+            if self._connection is not None:
+                try:
+                    self._connection.close()
+                except Exception:
+                    pass
+
+            self._connection_attempts += 1
+            try:
+                self._connect()
+
+                # register every action that lives on this connection with the ai again
+                for action in self._actions.values():
+                    self._connection.root.add_action(action)
+                break
+            except Exception as error:
+                self._failed_connection_attempts += 1
+                delay = self._reconnect_policy.delay(attempt)
+                attempt += 1
+                if self._reconnect_policy.gives_up(time.monotonic() - self._disconnected_since + delay):
+                    return error
+                time.sleep(delay)
+
+        # the connection is back
+        self._seconds_disconnected += time.monotonic() - self._disconnected_since
+        self._disconnected_since = None
+        return None
+
+    def _serve(self, connection):
+        # serve on several threads, so that an action taking its time does not hold up requests for the others
+        helping_threads = [threading.Thread(target=serve_requests, args=(connection,), daemon=True)
+                           for _ in range(self._serving_threads - 1)]
+        for helping_thread in helping_threads:
+            helping_thread.start()
+        serve_requests(connection)
+        for helping_thread in helping_threads:
+            helping_thread.join()
+
+        # reconnect if this was the working connection and it was not closed on purpose. connections closed while
+        # reconnecting are already being taken care of
+        with self._lock:
+            lost_working_connection = self._connection is connection and self._disconnected_since is None
+        if lost_working_connection and not self._closed:
+            self.reconnect(connection)
+
+    def connection(self):
+        return self._connection
+
+    def network(self):
+        return self._network
+
+    def root(self):
+        return self._connection.root
+
+    def actions(self):
+        with self._lock:
+            return list(self._actions.values())
+
+    def is_connected(self):
+        return self._disconnected_since is None and not self._closed
+
+    def register(self, action):
+        # register the action with the ai. if the connection is lost along the way, reconnecting registers it
+        with self._lock:
+            self._actions[id(action)] = action
+            connection = self._connection
+        try:
+            connection.root.add_action(action)
+        except Exception as error:
+            if not is_connection_failure(connection, error) or not self.reconnect(connection):
+                raise
+
+    def unregister(self, action):
+        with self._lock:
+            self._actions.pop(id(action), None)
+        self._connection.root.remove_action(action)
+
+    def reconnect(self, lost_connection):
+        # re-establish the given lost connection. returns true if the connection is usable afterwards
+        with self._lock:
+            if self._closed:
+                return False
+
+            # another thread may have already replaced the lost connection
+            if self._connection is not lost_connection and self.is_connected():
+                return True
+
+            print("reconnecting")
+            if self._disconnected_since is None:
+                self._disconnected_since = time.monotonic()
+            if self._connect_with_backoff() is not None:
+                print("unable to reconnect")
+                return False
+
+            self._reconnects += 1
+            print("reconnected")
+            return True
+
+    def statistics(self):
+        # returns the connection counters, including time spent in a disconnection that is still going on
+        seconds_disconnected = self._seconds_disconnected
+        disconnected_since = self._disconnected_since
+        if disconnected_since is not None:
+            seconds_disconnected += time.monotonic() - disconnected_since
+        return {"connected": self.is_connected(),
+                "connection_attempts": self._connection_attempts,
+                "failed_connection_attempts": self._failed_connection_attempts,
+                "reconnects": self._reconnects,
+                "seconds_disconnected": seconds_disconnected}
+
+    def close(self):
+        self._closed = True
+        self._connection.close()
+
+
+def serve_requests(connection, seconds_between_turns=0.05):
+    # serves requests from the ai until the connection closes. one thread at a time receives from a connection, and
+    # rpyc only wakes the others once the request being received has been handled, so a waiting thread takes
+    # another turn every so often instead of waiting to be woken
+    try:
+        while not connection.closed:
+            connection.serve(seconds_between_turns)
+    except Exception:
+        pass
+    finally:
+        connection.close()
+
+
+def is_connection_failure(connection, error):
+    # distinguishes a lost connection from an error raised by the ai server itself
+    return connection.closed or isinstance(error, (EOFError, OSError))
+
+
+# connections to ai servers, shared by every action in the process
+_ai_connections = {}
+_ai_connections_lock = threading.Lock()
+
+# one lock for each server being connected to. connecting can take as long as the reconnect policy allows, so only
+# callers of the same server wait for it
+_ai_connection_locks = {}
+
+
+def ai_connection(server, port, reconnect_policy=None) -> AIConnection:
+    # returns the shared connection to the given ai server, creating it on first use. the reconnect policy is used
+    # only when the connection is created.
+    # ports often come from environment variables, so the same port given as a string or a number is one connection
+    key = (server, str(port))
+    with _ai_connections_lock:
+        connection = _ai_connections.get(key)
+        if connection is not None:
+            return connection
+        connection_lock = _ai_connection_locks.setdefault(key, threading.Lock())
+
+    with connection_lock:
+        with _ai_connections_lock:
+            connection = _ai_connections.get(key)
+        if connection is None:
+            connection = AIConnection(server, port, reconnect_policy)
+            with _ai_connections_lock:
+                _ai_connections[key] = connection
+        return connection
+
+
+def close_ai_connections():
+    # closes every shared connection in the process
+    with _ai_connections_lock:
+        connections = list(_ai_connections.values())
+        _ai_connections.clear()
+    for connection in connections:
+        connection.close()
@@ -0,0 +1,70 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to run action behaviors and monitors as coroutines
+import asyncio
+
+# needed to run the event loop alongside the threads that serve the ai
+import threading
+
+# needed to pass arguments to blocking functions run from coroutines
+import functools
+
+# needed to log failed checks
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# one event loop per process, shared by every asynchronous action and monitor in the process
+_event_loop = None
+_event_loop_thread = None
+_event_loop_lock = threading.Lock()
+
+
+def ai_event_loop():
+    # returns the process-wide event loop, starting it on its own thread on first use
+    global _event_loop, _event_loop_thread
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            _event_loop_thread = threading.Thread(target=_event_loop.run_forever, name="ai_event_loop")
+            _event_loop_thread.daemon = True
+            _event_loop_thread.start()
+        return _event_loop
+
+
+def in_ai_event_loop():
+    # true if called from the thread that runs the process-wide event loop
+    return _event_loop_thread is not None and threading.current_thread() is _event_loop_thread
+
+
+def run_coroutine(coroutine):
+    # schedule a coroutine on the process-wide event loop. returns a concurrent.futures.Future for its result
+    return asyncio.run_coroutine_threadsafe(coroutine, ai_event_loop())
+
+
+def start_monitor(monitor):
+    # run a monitoring coroutine on the process-wide event loop for as long as it runs.
+    # returns a future that can be used to cancel the monitor
+    return run_coroutine(monitor)
+
+
+async def run_blocking(function, *args, **kwargs):
+    # run a blocking function, such as a call to the ai server, without holding up the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *args, **kwargs))
+
+
+async def monitor_periodically(check, seconds_between_checks):
+    # await the given check over and over. a check may return the seconds to wait before the next check, for example
+    # to give the ai time to react to what it found. otherwise the next check comes after seconds_between_checks.
+    # a check that fails is logged and the monitor keeps checking
+    while True:
+        try:
+            seconds_to_wait = await check()
+        except Exception:
+            logger.exception("monitoring check %s failed", getattr(check, '__qualname__', check))
+            seconds_to_wait = None
+        await asyncio.sleep(seconds_between_checks if seconds_to_wait is None else seconds_to_wait)
@@ -0,0 +1,47 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to copy the intended effects into the actual effects
+import copy
+
+# needed to build on the blocking ai action
+from .ai_actions import AIaction
+
+# needed to run behaviors on the process-wide event loop
+from .ai_event_loop import run_coroutine, run_blocking, in_ai_event_loop
+
+
+class AsyncAIaction(AIaction):
+    """
+    An ai action whose behavior is a coroutine.
+
+    Behaviors of every asynchronous action in a process run on one shared event loop, so a process can host many
+    actions and monitors without a thread for each. The ai still asks the action to act over its connection; the
+    action waits for its behavior to finish on the event loop before reporting its effects.
+    """
+
+    def act(self):
+        # a behavior cannot be waited for from the event loop that runs it
+        if in_ai_event_loop():
+            raise RuntimeError("an asynchronous action cannot act from within the ai event loop")
+
+        # assume that the act will have the intended effect
+        self.actual_effects = copy.copy(self.effects)
+
+        # every AI action runs custom behavior. this behavior may change the actual effects
+        run_coroutine(self.behavior()).result()
+
+        # tell the world what the action did
+        self._update_the_world_with_actual_effects()
+
+    async def behavior(self):
+        # custom behavior must be specified by anyone implementing an AI action
+        raise NotImplementedError
+
+    async def update_the_world_async(self, state_name, state_value, context):
+        # update the world state without holding up the event loop while the ai server answers
+        await run_blocking(self.update_the_world, state_name, state_value, context)
+
+    async def update_the_world_many_async(self, effects, context):
+        await run_blocking(self.update_the_world_many, effects, context)
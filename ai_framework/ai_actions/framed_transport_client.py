@@ -0,0 +1,83 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to connect to the ai server
+import socket
+
+# needed to share a client between threads
+import threading
+
+# needed to frame messages
+from ai_framework.ai_infrastructure.framed_messages import encode_frame, decode_message, message_length, \
+    LENGTH_PREFIX_SIZE
+
+
+class FramedTransportError(Exception):
+    pass
+
+
+class FramedTransportClient:
+    """
+    A client for the ai server's framed transport: world updates, world state reads and diary tails as
+    length-prefixed json messages over tcp. Everything is sent by value, so contexts never become proxies.
+
+    update_the_world_pipelined sends many single updates before reading any of the responses, for senders of
+    high volumes of independent updates.
+    """
+
+    def __init__(self, server="localhost", port=12346, seconds_before_timing_out=None):
+        self._socket = socket.create_connection((server, int(port)), timeout=seconds_before_timing_out)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile('rb')
+        self._lock = threading.Lock()
+
+    def update_the_world(self, state_name, state_value, context):
+        self._request({"op": "update", "state_name": state_name, "state_value": state_value, "context": context})
+
+    def update_the_world_many(self, effects, context):
+        self._request({"op": "update_many", "effects": list(effects.items()), "context": context})
+
+    def update_the_world_pipelined(self, updates):
+        # send every (state_name, state_value, context) update, then read every response
+        frames = b"".join(encode_frame({"op": "update", "state_name": state_name, "state_value": state_value,
+                                        "context": context})
+                          for state_name, state_value, context in updates)
+        with self._lock:
+            self._socket.sendall(frames)
+            responses = [self._read_response() for _ in range(len(updates))]
+        for response in responses:
+            _result(response)
+
+    def the_world_states(self):
+        return self._request({"op": "world_states"})
+
+    def ai_diary_since(self, cursor=-1, limit=100):
+        # the diary entries written after the given cursor, as a json lines string
+        return self._request({"op": "diary_since", "cursor": cursor, "limit": limit})
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
+
+    def _request(self, request):
+        with self._lock:
+            self._socket.sendall(encode_frame(request))
+            response = self._read_response()
+        return _result(response)
+
+    def _read_response(self):
+        length_prefix = self._reader.read(LENGTH_PREFIX_SIZE)
+        if len(length_prefix) < LENGTH_PREFIX_SIZE:
+            raise ConnectionError("the ai server closed the framed transport connection")
+        length = message_length(length_prefix)
+        body = self._reader.read(length)
+        if len(body) < length:
+            raise ConnectionError("the ai server closed the framed transport connection")
+        return decode_message(body)
+
+
+def _result(response):
+    if not response.get("ok"):
+        raise FramedTransportError(response.get("error"))
+    return response.get("result")
@@ -0,0 +1,35 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to spread out reconnection attempts from many clients
+import random
+
+
+class ReconnectPolicy:
+    """
+    Decides how long to wait between attempts to reconnect to the ai server, and when to give up.
+
+    Delays grow exponentially from the initial delay up to the maximum delay. Jitter randomly shortens each
+    delay by up to the given fraction so that clients that lost the server at the same moment do not all
+    come back at the same moment. If seconds_before_giving_up is None, reconnection is attempted forever.
+    """
+
+    def __init__(self, initial_delay=0.5, multiplier=2.0, max_delay=30.0, jitter=0.5, seconds_before_giving_up=None):
+        self.initial_delay = initial_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.seconds_before_giving_up = seconds_before_giving_up
+
+    def delay(self, attempt):
+        # returns the seconds to wait after the given failed attempt, counting attempts from zero
+        # the exponent is bounded so that long outages cannot overflow the calculation
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** min(attempt, 64))
+        return delay * (1 - random.uniform(0, self.jitter))
+
+    def gives_up(self, seconds_disconnected):
+        # returns true if there should be no further attempts after being disconnected for the given time
+        if self.seconds_before_giving_up is None:
+            return False
+        return seconds_disconnected >= self.seconds_before_giving_up
@@ -0,0 +1,163 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import threading
+import time
+import unittest
+
+# needed to run a stand-in ai server
+import rpyc
+from rpyc.utils.server import ThreadedServer
+
+# needed to test shared connections
+from ai_framework.ai_actions.ai_connection_pool import ai_connection, close_ai_connections, AIConnection
+from ai_framework.ai_actions.reconnect_policy import ReconnectPolicy
+
+
+class PoolTestNetwork:
+    def the_world_states(self):
+        return {}
+
+
+class PoolTestServer(rpyc.Service):
+    # a stand-in ai server that records its connections and the actions registered over each one
+    connections = []
+    registered_actions = {}
+    pool_test_network = PoolTestNetwork()
+
+    def on_connect(self, conn):
+        self.connections.append(conn)
+
+    def exposed_network(self):
+        return self.pool_test_network
+
+    def exposed_add_action(self, action):
+        self.registered_actions.setdefault(action.____conn__, []).append(action)
+
+    def exposed_remove_action(self, action):
+        self.registered_actions[action.____conn__].remove(action)
+
+
+class PoolTestAction:
+    def check_connection(self):
+        pass
+
+
+class TestAIConnectionPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._server = ThreadedServer(PoolTestServer(), hostname="127.0.0.1", port=0,
+                                     protocol_config={"allow_all_attrs": True})
+        cls._port = cls._server.port
+        server_thread = threading.Thread(target=cls._server.start)
+        server_thread.daemon = True
+        server_thread.start()
+
+        # wait for the server to start listening
+        while not cls._server.active:
+            time.sleep(0.01)
+
+    @classmethod
+    def tearDownClass(cls):
+        close_ai_connections()
+        cls._server.close()
+
+    def _wait_for(self, condition, seconds_to_wait=10):
+        start = time.monotonic()
+        while not condition() and time.monotonic() - start < seconds_to_wait:
+            time.sleep(0.05)
+        return condition()
+
+    def test_actions_share_a_connection_and_are_registered_again_after_reconnecting(self):
+        # the same server and port share one connection, whether the port is a string or a number
+        first_connection = ai_connection("127.0.0.1", self._port, ReconnectPolicy(initial_delay=0.01))
+        second_connection = ai_connection("127.0.0.1", str(self._port))
+        self.assertIs(first_connection, second_connection)
+        self.assertEqual(1, len(PoolTestServer.connections))
+
+        # every action registers over the one connection
+        actions = [PoolTestAction() for _ in range(3)]
+        for action in actions:
+            first_connection.register(action)
+        server_side_connection = PoolTestServer.connections[-1]
+        self.assertEqual(3, len(PoolTestServer.registered_actions[server_side_connection]))
+
+        # drop the connection from the server side. the pool reconnects once and registers every action again
+        server_side_connection.close()
+        self.assertTrue(self._wait_for(lambda: len(PoolTestServer.connections) == 2 and
+                                       len(PoolTestServer.registered_actions.get(PoolTestServer.connections[-1],
+                                                                                 [])) == 3))
+
+        self.assertTrue(self._wait_for(lambda: first_connection.statistics()["reconnects"] == 1))
+        self.assertTrue(first_connection.is_connected())
+
+        # unregistering removes the action from the new connection
+        first_connection.unregister(actions[0])
+        self.assertEqual(2, len(PoolTestServer.registered_actions[PoolTestServer.connections[-1]]))
+        self.assertEqual(2, len(first_connection.actions()))
+
+    def test_giving_up_on_an_unreachable_server(self):
+        # find a port with nothing listening on it
+        unused_server = ThreadedServer(PoolTestServer(), hostname="127.0.0.1", port=0)
+        unused_port = unused_server.port
+        unused_server.close()
+
+        reconnect_policy = ReconnectPolicy(initial_delay=0.01, max_delay=0.05, seconds_before_giving_up=0.3)
+        start = time.monotonic()
+        with self.assertRaises(ConnectionError):
+            AIConnection("127.0.0.1", unused_port, reconnect_policy)
+        self.assertLess(time.monotonic() - start, 5)
+
+
+    def test_an_unreachable_server_holds_up_only_its_own_callers(self):
+        # find a port with nothing listening on it
+        unused_server = ThreadedServer(PoolTestServer(), hostname="127.0.0.1", port=0)
+        unused_port = unused_server.port
+        unused_server.close()
+
+        # keep trying the unreachable server in the background
+        reconnect_policy = ReconnectPolicy(initial_delay=0.05, max_delay=0.05, seconds_before_giving_up=2)
+        errors = []
+
+        def connect_to_the_unreachable_server():
+            try:
+                ai_connection("127.0.0.1", unused_port, reconnect_policy)
+            except ConnectionError as error:
+                errors.append(error)
+
+        connecting_thread = threading.Thread(target=connect_to_the_unreachable_server)
+        connecting_thread.daemon = True
+        connecting_thread.start()
+        time.sleep(0.2)
+
+        # the live server is still reachable while the other server is being tried
+        start = time.monotonic()
+        self.assertTrue(ai_connection("127.0.0.1", self._port).is_connected())
+        self.assertLess(time.monotonic() - start, 1)
+
+        connecting_thread.join()
+        self.assertEqual(1, len(errors))
+
+
+class TestReconnectPolicy(unittest.TestCase):
+    def test_delays_back_off_exponentially_up_to_the_cap(self):
+        reconnect_policy = ReconnectPolicy(initial_delay=1, multiplier=2, max_delay=5, jitter=0)
+        self.assertEqual([1, 2, 4, 5, 5], [reconnect_policy.delay(attempt) for attempt in range(5)])
+
+        # very long outages stay at the cap
+        self.assertEqual(5, reconnect_policy.delay(10000))
+
+    def test_jitter_shortens_delays(self):
+        reconnect_policy = ReconnectPolicy(initial_delay=1, multiplier=2, max_delay=5, jitter=0.5)
+        for _ in range(100):
+            self.assertTrue(2 <= reconnect_policy.delay(2) <= 4)
+
+    def test_giving_up(self):
+        self.assertFalse(ReconnectPolicy().gives_up(10 ** 6))
+        self.assertFalse(ReconnectPolicy(seconds_before_giving_up=10).gives_up(9))
+        self.assertTrue(ReconnectPolicy(seconds_before_giving_up=10).gives_up(10))
+
+
+if __name__ == '__main__':
+    unittest.main()
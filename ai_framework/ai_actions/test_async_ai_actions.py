@@ -0,0 +1,111 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import asyncio
+import threading
+import time
+import unittest
+
+# needed to run a stand-in ai server
+import rpyc
+from rpyc.utils.server import ThreadedServer
+
+# needed to test asynchronous actions and monitors
+from ai_framework.ai_actions import AsyncAIaction, start_monitor, monitor_periodically
+from ai_framework.ai_actions.ai_connection_pool import close_ai_connections
+from ai_framework.ai_actions.ai_event_loop import ai_event_loop
+
+
+class AsyncTestNetwork:
+    def __init__(self):
+        self.world_updates = []
+
+    def update_the_world(self, state_name, state_value, context):
+        self.world_updates.append((state_name, state_value))
+
+    def update_the_world_many(self, effects, context):
+        self.world_updates.extend(tuple(effect) for effect in effects)
+
+
+class AsyncTestServer(rpyc.Service):
+    async_test_network = AsyncTestNetwork()
+    registered_actions = []
+
+    def exposed_network(self):
+        return self.async_test_network
+
+    def exposed_add_action(self, action):
+        self.registered_actions.append(action)
+
+
+class WaitingAction(AsyncAIaction):
+    async def behavior(self):
+        # wait without holding up the event loop, then report an effect on the way
+        await asyncio.sleep(0.05)
+        await self.update_the_world_async("waited", True, {})
+
+
+class TestAsyncAIaction(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._server = ThreadedServer(AsyncTestServer(), hostname="127.0.0.1", port=0,
+                                     protocol_config={"allow_all_attrs": True})
+        server_thread = threading.Thread(target=cls._server.start)
+        server_thread.daemon = True
+        server_thread.start()
+        while not cls._server.active:
+            time.sleep(0.01)
+
+    @classmethod
+    def tearDownClass(cls):
+        close_ai_connections()
+        cls._server.close()
+
+    def test_asynchronous_behavior(self):
+        action = WaitingAction(preconditions={}, initial_effects={"action_done": True}, server="127.0.0.1",
+                               port=self._server.port)
+
+        # the ai asks the action to act over its connection
+        AsyncTestServer.registered_actions[-1].act()
+        self.assertEqual([("waited", True), ("action_done", True)], AsyncTestServer.async_test_network.world_updates)
+        self.assertEqual({"action_done": True}, action.actual_effects)
+
+    def test_many_monitors_share_one_thread(self):
+        checks = []
+        threads_before = threading.active_count()
+        ai_event_loop()
+
+        async def check():
+            checks.append(threading.current_thread().name)
+
+        monitors = [start_monitor(monitor_periodically(check, 0.01)) for _ in range(1000)]
+        deadline = time.monotonic() + 5
+        while len(checks) < 3000 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for monitor in monitors:
+            monitor.cancel()
+
+        self.assertGreaterEqual(len(checks), 3000)
+        self.assertEqual({"ai_event_loop"}, set(checks))
+        self.assertLessEqual(threading.active_count(), threads_before + 1)
+
+    def test_a_failed_check_does_not_stop_the_monitor(self):
+        checks = []
+
+        async def check():
+            checks.append(time.monotonic())
+            if len(checks) == 1:
+                raise EOFError("the sensor went away")
+
+        with self.assertLogs('ai_framework.ai_actions.ai_event_loop', level='ERROR'):
+            monitor = start_monitor(monitor_periodically(check, 0.01))
+            deadline = time.monotonic() + 5
+            while len(checks) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        monitor.cancel()
+        self.assertGreaterEqual(len(checks), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,3 @@
 from ai_framework.ai_context.ai_context import is_validate_context
+from ai_framework.ai_context.schema_validators import SchemaValidator, schema_validator
 
@@ -0,0 +1,87 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# measures how many world event contexts and network messages can be validated per second, before and after
+# compiling and caching the json schemas.
+# run with: python -m ai_framework.ai_context.benchmark_schema_validators
+
+# needed to time validations
+import time
+
+# needed to reproduce the validation done before the schemas were cached
+from jsonschema import validate, ValidationError
+import json
+import pkgutil
+
+# needed to validate with the compiled and cached schemas
+from ai_framework.ai_context import is_validate_context, schema_validator
+
+# needed to measure world event creation, which validates the context of every event
+from ai_framework.ai_infrastructure.world_event import WorldEvent
+
+
+def _uncached_is_validate_context(context_json) -> bool:
+    # context validation as it was done before the schema was cached
+    context_schema_json_string = pkgutil.get_data('ai_framework.ai_context.ai_context',
+                                                  'context_schema.json').decode("utf-8")
+    context_schema_json = json.loads(context_schema_json_string)
+    try:
+        validate(context_json, context_schema_json)
+        return True
+    except ValidationError:
+        return False
+
+
+def _uncached_is_valid_message(json_message, json_schema) -> bool:
+    # message validation as it was done before the schema was compiled
+    try:
+        validate(json_message, json_schema)
+        return True
+    except ValidationError:
+        return False
+
+
+def _sample_message():
+    json_message_string = pkgutil.get_data('ai_framework.ai_infrastructure.network',
+                                           'sample_message.json').decode("utf-8")
+    return json.loads(json_message_string)
+
+
+def _per_second(function, argument, num_calls):
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        function(argument)
+    elapsed = time.perf_counter() - start
+    return num_calls / elapsed
+
+
+def _world_events_per_second(num_events):
+    start = time.perf_counter()
+    for n in range(num_events):
+        WorldEvent(f"state_{n}", True, {})
+    elapsed = time.perf_counter() - start
+    return num_events / elapsed
+
+
+def run_benchmark(num_calls=2000):
+    context = {"sdfObject": {"Sensor": {"sdfProperty": {}}}}
+    message = _sample_message()
+    message_validator = schema_validator('ai_framework.ai_infrastructure.network', 'schema.json')
+    message_json_schema = message_validator.schema()
+
+    uncached_contexts = _per_second(_uncached_is_validate_context, context, num_calls)
+    cached_contexts = _per_second(is_validate_context, context, num_calls)
+    uncached_messages = _per_second(lambda m: _uncached_is_valid_message(m, message_json_schema), message, num_calls)
+    cached_messages = _per_second(message_validator.is_valid, message, num_calls)
+
+    print(f"{'validation':>20} {'before (/s)':>14} {'after (/s)':>14} {'speedup':>8}")
+    print(f"{'context':>20} {uncached_contexts:>14.0f} {cached_contexts:>14.0f} "
+          f"{cached_contexts / uncached_contexts:>8.1f}")
+    print(f"{'message':>20} {uncached_messages:>14.0f} {cached_messages:>14.0f} "
+          f"{cached_messages / uncached_messages:>8.1f}")
+    print(f"{'world events':>20} {'':>14} {_world_events_per_second(num_calls):>14.0f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,56 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to compile json schemas into reusable validators
+from jsonschema.validators import validator_for
+import json
+
+# needed to reference the json schema file from within the host application
+import pkgutil
+
+
+class SchemaValidator:
+    # a json schema that has been loaded, checked and compiled once so that it can be reused for every validation
+
+    def __init__(self, json_schema):
+        self._json_schema = json_schema
+
+        # the empty schema (and the boolean schema true) accepts every document. skip validation entirely
+        self._accepts_everything = json_schema == {} or json_schema is True
+
+        self._validator = None
+        if not self._accepts_everything:
+            validator_class = validator_for(json_schema)
+            validator_class.check_schema(json_schema)
+            self._validator = validator_class(json_schema)
+
+    def schema(self):
+        return self._json_schema
+
+    def is_valid(self, json_document) -> bool:
+        # a fast boolean check that does not build validation errors
+        if self._accepts_everything:
+            return True
+        return self._validator.is_valid(json_document)
+
+    def validate(self, json_document):
+        # raises a ValidationError describing the first problem found in the document
+        if self._accepts_everything:
+            return
+        self._validator.validate(json_document)
+
+
+# compiled validators keyed by the package and path of their schema file
+_schema_validators = {}
+
+
+def schema_validator(package, json_schema_file_path) -> SchemaValidator:
+    # returns the compiled validator for the given schema file, loading and compiling the schema on first use
+    key = (package, json_schema_file_path)
+    validator = _schema_validators.get(key)
+    if validator is None:
+        json_schema_string = pkgutil.get_data(package, json_schema_file_path).decode("utf-8")
+        validator = SchemaValidator(json.loads(json_schema_string))
+        _schema_validators[key] = validator
+    return validator
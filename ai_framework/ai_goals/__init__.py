@@ -1 +1,3 @@
 from ai_framework.ai_goals.ai_goals import AIGoal
+from ai_framework.ai_goals.goal_scheduler import GoalScheduler
+from ai_framework.ai_goals.goal_priority_policy import GoalPriorityPolicy
@@ -0,0 +1,75 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# simulates an ai under sustained load from critical goals, such as temperature events, while occasional routine
+# goals, such as laundry maintenance, wait behind them. prints how long each kind of goal waits to be met, with and
+# without aging.
+# run with: python -m ai_framework.ai_goals.benchmark_goal_priority_policy
+
+# needed to generate goal arrivals
+import random
+
+# needed to build and schedule goals
+from ai_framework.ai_goals import AIGoal, GoalScheduler, GoalPriorityPolicy
+
+
+class _SimulatedClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def _simulate(priority_policy, clock, num_seconds, critical_goals_per_second, routine_goals_per_second, seed=1):
+    # every simulated second, new goals arrive and the ai meets the one goal the scheduler picks
+    randomness = random.Random(seed)
+    goal_scheduler = GoalScheduler(priority_policy=priority_policy)
+    arrivals = {}
+    latencies = {"critical": [], "routine": []}
+
+    for second in range(num_seconds):
+        clock.time = float(second)
+
+        if randomness.random() < critical_goals_per_second:
+            goal = AIGoal(f"temperature_event_{second}_handled", True, 0.9, 0.9)
+            arrivals[id(goal)] = ("critical", second)
+            goal_scheduler.add_goal(goal)
+        if randomness.random() < routine_goals_per_second:
+            goal = AIGoal(f"laundry_{second}_maintained", True, 0.2, 0.1)
+            arrivals[id(goal)] = ("routine", second)
+            goal_scheduler.add_goal(goal)
+
+        goal = goal_scheduler.next_goal()
+        if goal is not None:
+            goal_kind, arrival = arrivals.pop(id(goal))
+            latencies[goal_kind].append(second - arrival)
+            goal_scheduler.remove_goal(goal)
+
+    # goals still waiting at the end have waited at least until then
+    for goal_kind, arrival in arrivals.values():
+        latencies[goal_kind].append(num_seconds - arrival)
+    return latencies
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_benchmark(num_seconds=20000, critical_goals_per_second=0.9, routine_goals_per_second=0.08):
+    print(f"{'policy':>12} {'goals':>10} {'count':>6} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'max (s)':>8}")
+    for policy_name, aging_weight in (("no aging", 0.0), ("aging", 0.05)):
+        clock = _SimulatedClock()
+        priority_policy = GoalPriorityPolicy(aging_weight=aging_weight, clock=clock)
+        latencies = _simulate(priority_policy, clock, num_seconds, critical_goals_per_second,
+                              routine_goals_per_second)
+        for goal_kind, goal_latencies in latencies.items():
+            print(f"{policy_name:>12} {goal_kind:>10} {len(goal_latencies):>6} "
+                  f"{_percentile(goal_latencies, 0.5):>8} {_percentile(goal_latencies, 0.95):>8} "
+                  f"{_percentile(goal_latencies, 0.99):>8} {max(goal_latencies):>8}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
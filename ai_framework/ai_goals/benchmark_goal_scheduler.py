@@ -0,0 +1,58 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# compares finding the next goal by sorting and scanning every goal with finding it in the goal scheduler, as the
+# number of goals grows. every iteration meets the goal it finds, the way an ai works through a backlog of goals.
+# run with: python -m ai_framework.ai_goals.benchmark_goal_scheduler
+
+# needed to time goal selection
+import time
+
+# needed to build goals and schedule them
+from ai_framework.ai_goals import AIGoal, GoalScheduler
+
+
+def _goals(num_goals):
+    return [AIGoal(f"goal_{n}_achieved", True, (n * 7919 % 1000) / 1000, (n * 104729 % 1000) / 1000)
+            for n in range(num_goals)]
+
+
+def _microseconds_per_iteration_sorting(num_goals, num_iterations):
+    goals = _goals(num_goals)
+    world_states = {}
+
+    start = time.perf_counter()
+    for _ in range(num_iterations):
+        for goal in sorted(goals, reverse=True):
+            goal_is_met = world_states.get(goal.goal_state_name) == goal.goal_state_value
+            if not goal_is_met and not goal.deferred:
+                world_states[goal.goal_state_name] = goal.goal_state_value
+                break
+    elapsed = time.perf_counter() - start
+
+    return elapsed / num_iterations * 1e6
+
+
+def _microseconds_per_iteration_scheduling(num_goals, num_iterations):
+    goal_scheduler = GoalScheduler(_goals(num_goals))
+
+    start = time.perf_counter()
+    for _ in range(num_iterations):
+        goal = goal_scheduler.next_goal()
+        goal_scheduler.world_state_changed(goal.goal_state_name, goal.goal_state_value)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / num_iterations * 1e6
+
+
+def run_benchmark(goal_counts=(100, 1000, 10000), num_iterations=100):
+    print(f"{'goals':>8} {'sort and scan (us)':>20} {'scheduler (us)':>16}")
+    for num_goals in goal_counts:
+        sorting = _microseconds_per_iteration_sorting(num_goals, num_iterations)
+        scheduling = _microseconds_per_iteration_scheduling(num_goals, num_iterations)
+        print(f"{num_goals:>8} {sorting:>20.1f} {scheduling:>16.1f}")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,58 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to measure how long a goal has waited
+import time
+
+# needed to weigh criticality and time sensitivity
+from math import sqrt
+
+
+class GoalPriorityPolicy:
+    """
+    Works out the effective priority of a goal from its criticality, its time sensitivity and how long it has
+    waited since it was last pursued.
+
+    The effective priority is the weighted goal priority plus aging_weight for every second the goal has waited, so a
+    goal that waits long enough overtakes goals that keep arriving with a higher priority. With weights of one and no
+    aging, the effective priority is the goal's own sort index.
+
+    Every goal ages at the same rate, so the order of two waiting goals never changes as time passes. The scheduler
+    can rank goals by a key fixed when the goal starts waiting, without re-evaluating goals as time passes.
+
+    Deferred goals are pursued again once they have been deferred for max_seconds_deferred, if given.
+    """
+
+    def __init__(self, criticality_weight=1.0, time_sensitivity_weight=1.0, aging_weight=0.01,
+                 max_seconds_deferred=None, clock=time.monotonic):
+        self.criticality_weight = criticality_weight
+        self.time_sensitivity_weight = time_sensitivity_weight
+        self.aging_weight = aging_weight
+        self.max_seconds_deferred = max_seconds_deferred
+        self.clock = clock
+
+    def now(self):
+        return self.clock()
+
+    def base_priority(self, goal):
+        # the priority of the goal before aging
+        return sqrt((self.criticality_weight * goal.criticality) ** 2 +
+                    (self.time_sensitivity_weight * goal.time_sensitivity) ** 2)
+
+    def priority(self, goal, waiting_since, now=None):
+        # the effective priority of a goal that has been waiting since the given time
+        if now is None:
+            now = self.now()
+        return self.base_priority(goal) + self.aging_weight * (now - waiting_since)
+
+    def ranking_key(self, goal, waiting_since):
+        # a key that orders waiting goals the same way as their effective priorities, at any time. it is the effective
+        # priority less the aging every waiting goal has in common
+        return self.base_priority(goal) - self.aging_weight * waiting_since
+
+    def deferral_expires(self, deferred_at):
+        # when a goal deferred at the given time should be pursued again, or None if deferral is not capped
+        if self.max_seconds_deferred is None:
+            return None
+        return deferred_at + self.max_seconds_deferred
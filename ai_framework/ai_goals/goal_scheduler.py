@@ -0,0 +1,222 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to keep goals in priority order
+import heapq
+
+# needed to break ties between goals of equal priority in the order the goals were added
+import itertools
+
+
+class GoalScheduler:
+    """
+    Keeps the goals of the ai in priority order and finds the next goal to pursue without sorting.
+
+    Goals that can be pursued, meaning they are neither met in the world nor deferred, are kept in a heap ordered by
+    priority. Goals are indexed by world state name, so a change to a world state only re-evaluates the goals on that
+    world state. Deferring, pursuing and re-prioritizing a goal update the heap in place.
+
+    Goals of equal priority are pursued in the order in which they were added.
+
+    Without a priority policy, goals are ranked by their own sort index. With one, goals are ranked by their
+    effective priority, which grows the longer a goal waits, and deferred goals come back once their deferral
+    runs out.
+    """
+
+    def __init__(self, goals=(), priority_policy=None):
+        self._priority_policy = priority_policy
+
+        # heap entries are [negated priority, goal sequence, entry sequence, goal] lists. the entry sequence keeps a
+        # goal put back in the heap from being compared with its own cancelled entry. an entry is cancelled by
+        # setting its goal to None
+        self._heap = []
+        self._heap_entries = {}
+        self._cancelled_heap_entries = 0
+        self._sequence = itertools.count()
+        self._heap_entry_sequence = itertools.count()
+
+        # goals by id, the sequence each goal was added in, and the ids of the goals on each world state
+        self._goals = {}
+        self._goal_sequences = {}
+        self._goals_by_world_state = {}
+
+        # the world states the goals were last evaluated against, and the ids of the goals met in them
+        self._world_states = {}
+        self._met_goals = set()
+
+        # when each goal started waiting to be pursued, and a heap of (expiry, goal id, deferred at) deferrals
+        self._waiting_since = {}
+        self._deferred_at = {}
+        self._deferral_expiries = []
+
+        for goal in goals:
+            self.add_goal(goal)
+
+    def __len__(self):
+        return len(self._goals)
+
+    def __contains__(self, goal):
+        return id(goal) in self._goals
+
+    def add_goal(self, goal):
+        goal_id = id(goal)
+        if goal_id in self._goals:
+            return
+        self._goals[goal_id] = goal
+        self._goal_sequences[goal_id] = next(self._sequence)
+        self._waiting_since[goal_id] = self._now()
+        self._goals_by_world_state.setdefault(goal.goal_state_name, set()).add(goal_id)
+        self._evaluate(goal)
+
+    def remove_goal(self, goal):
+        goal_id = id(goal)
+        if goal_id not in self._goals:
+            return
+        self._cancel(goal_id)
+        del self._goals[goal_id]
+        del self._goal_sequences[goal_id]
+        del self._waiting_since[goal_id]
+        self._deferred_at.pop(goal_id, None)
+        self._met_goals.discard(goal_id)
+        goal_ids = self._goals_by_world_state[goal.goal_state_name]
+        goal_ids.discard(goal_id)
+        if not goal_ids:
+            del self._goals_by_world_state[goal.goal_state_name]
+
+    def set_goals(self, goals):
+        # replace every goal
+        for goal in list(self._goals.values()):
+            self.remove_goal(goal)
+        for goal in goals:
+            self.add_goal(goal)
+
+    def world_state_changed(self, world_state_name, world_state_value):
+        # re-evaluate only the goals on the changed world state
+        self._world_states[world_state_name] = world_state_value
+        for goal_id in self._goals_by_world_state.get(world_state_name, ()):
+            self._evaluate(self._goals[goal_id])
+
+    def update_world(self, world_states):
+        # re-evaluate the goals on every world state that is different from the last world states seen
+        for world_state_name, world_state_value in world_states.items():
+            if world_state_name not in self._world_states or \
+                    self._world_states[world_state_name] != world_state_value:
+                self.world_state_changed(world_state_name, world_state_value)
+
+    def next_goal(self):
+        # the highest priority goal that is neither met nor deferred, or None if there is no such goal
+        self._pursue_overdue_deferred_goals()
+        while self._heap and self._heap[0][-1] is None:
+            heapq.heappop(self._heap)
+            self._cancelled_heap_entries -= 1
+        if not self._heap:
+            return None
+        return self._heap[0][-1]
+
+    def defer(self, goal):
+        # defer the goal and take it out of the running until it is pursued again or its deferral runs out
+        goal.defer()
+        goal_id = id(goal)
+        if goal.deferred and goal_id in self._goals and goal_id not in self._deferred_at:
+            deferred_at = self._now()
+            self._deferred_at[goal_id] = deferred_at
+            if self._priority_policy is not None:
+                deferral_expires = self._priority_policy.deferral_expires(deferred_at)
+                if deferral_expires is not None:
+                    heapq.heappush(self._deferral_expiries, (deferral_expires, goal_id, deferred_at))
+        self._evaluate(goal)
+
+    def pursue(self, goal):
+        goal.pursue()
+        self._deferred_at.pop(id(goal), None)
+        self._evaluate(goal)
+
+    def goal_pursued(self, goal):
+        # the ai has pursued the goal. if the goal is still unmet, it starts waiting again from now
+        goal_id = id(goal)
+        if goal_id not in self._goals:
+            return
+        self._waiting_since[goal_id] = self._now()
+        self.reprioritize(goal)
+
+    def priority(self, goal):
+        # the effective priority of the goal
+        if self._priority_policy is None:
+            return goal.sort_index
+        return self._priority_policy.priority(goal, self._waiting_since[id(goal)])
+
+    def reprioritize(self, goal):
+        # put the goal back in priority order after its priority changed
+        self._cancel(id(goal))
+        self._evaluate(goal)
+
+    def is_met(self, goal):
+        return id(goal) in self._met_goals
+
+    def goals(self):
+        return list(self._goals.values())
+
+    def prioritized_goals(self):
+        # every goal, highest priority first. this sorts, so it is meant for reporting rather than scheduling
+        return sorted(self._goals.values(), key=lambda goal: (-self._ranking_key(id(goal)),
+                                                              self._goal_sequences[id(goal)]))
+
+    def _now(self):
+        if self._priority_policy is None:
+            return 0.0
+        return self._priority_policy.now()
+
+    def _ranking_key(self, goal_id):
+        goal = self._goals[goal_id]
+        if self._priority_policy is None:
+            return goal.sort_index
+        return self._priority_policy.ranking_key(goal, self._waiting_since[goal_id])
+
+    def _pursue_overdue_deferred_goals(self):
+        # pursue the goals whose deferral has run out. deferrals that were already ended are skipped
+        if not self._deferral_expiries:
+            return
+        now = self._now()
+        while self._deferral_expiries and self._deferral_expiries[0][0] <= now:
+            _, goal_id, deferred_at = heapq.heappop(self._deferral_expiries)
+            if self._deferred_at.get(goal_id) == deferred_at:
+                self.pursue(self._goals[goal_id])
+
+    def _evaluate(self, goal):
+        # put the goal in or take it out of the heap depending on whether it can be pursued
+        goal_id = id(goal)
+        if goal_id not in self._goals:
+            return
+
+        world_state_name = goal.goal_state_name
+        is_met = world_state_name in self._world_states and \
+            self._world_states[world_state_name] == goal.goal_state_value
+        if is_met:
+            self._met_goals.add(goal_id)
+        elif goal_id in self._met_goals:
+            # a goal that is no longer met starts waiting again
+            self._met_goals.discard(goal_id)
+            self._waiting_since[goal_id] = self._now()
+
+        if is_met or goal.deferred:
+            self._cancel(goal_id)
+        elif goal_id not in self._heap_entries:
+            heap_entry = [-self._ranking_key(goal_id), self._goal_sequences[goal_id], next(self._heap_entry_sequence),
+                          goal]
+            self._heap_entries[goal_id] = heap_entry
+            heapq.heappush(self._heap, heap_entry)
+
+    def _cancel(self, goal_id):
+        # leave the cancelled entry in the heap to be discarded when it reaches the top
+        heap_entry = self._heap_entries.pop(goal_id, None)
+        if heap_entry is None:
+            return
+        heap_entry[-1] = None
+        self._cancelled_heap_entries += 1
+
+        # rebuild the heap once it is mostly cancelled entries
+        if self._cancelled_heap_entries > len(self._heap_entries) + 64:
+            self._heap = list(self._heap_entries.values())
+            heapq.heapify(self._heap)
+            self._cancelled_heap_entries = 0
@@ -0,0 +1,145 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import unittest
+
+from ai_framework.ai_goals import AIGoal, GoalScheduler, GoalPriorityPolicy
+
+# needed to test the goal scheduler of the ai
+from ai_framework.ai.ai import AI
+from ai_framework.ai_infrastructure import LocalNetwork
+
+
+class TestGoalScheduler(unittest.TestCase):
+    def setUp(self):
+        self.third_goal = AIGoal("third_goal", True, 0.75, 0.0)
+        self.fourth_goal = AIGoal("fourth_goal", True, 0.5, 0.5)
+        self.first_goal = AIGoal("first_goal", True, 0.65, 0.8)
+        self.second_goal = AIGoal("second_goal", True, 1, 0)
+        self.goal_scheduler = GoalScheduler([self.third_goal, self.fourth_goal, self.first_goal, self.second_goal])
+
+    def test_goals_are_scheduled_in_priority_order(self):
+        self.assertIs(self.first_goal, self.goal_scheduler.next_goal())
+        self.assertEqual([self.first_goal, self.second_goal, self.third_goal, self.fourth_goal],
+                         self.goal_scheduler.prioritized_goals())
+
+    def test_met_goals_are_skipped_until_the_world_changes_again(self):
+        self.goal_scheduler.update_world({"first_goal": True, "second_goal": False})
+        self.assertTrue(self.goal_scheduler.is_met(self.first_goal))
+        self.assertIs(self.second_goal, self.goal_scheduler.next_goal())
+
+        self.goal_scheduler.world_state_changed("first_goal", False)
+        self.assertIs(self.first_goal, self.goal_scheduler.next_goal())
+
+    def test_deferring_and_pursuing(self):
+        # only deferrable goals can be deferred
+        self.goal_scheduler.defer(self.first_goal)
+        self.assertIs(self.first_goal, self.goal_scheduler.next_goal())
+
+        self.goal_scheduler.defer(self.second_goal)
+        self.goal_scheduler.world_state_changed("first_goal", True)
+        self.assertIs(self.third_goal, self.goal_scheduler.next_goal())
+
+        self.goal_scheduler.pursue(self.second_goal)
+        self.assertIs(self.second_goal, self.goal_scheduler.next_goal())
+
+    def test_reprioritizing_and_removing_goals(self):
+        self.fourth_goal.sort_index = 10
+        self.goal_scheduler.reprioritize(self.fourth_goal)
+        self.assertIs(self.fourth_goal, self.goal_scheduler.next_goal())
+
+        self.goal_scheduler.remove_goal(self.fourth_goal)
+        self.assertIs(self.first_goal, self.goal_scheduler.next_goal())
+        self.assertEqual(3, len(self.goal_scheduler))
+
+        # once every goal is met there is nothing left to pursue
+        self.goal_scheduler.update_world({"first_goal": True, "second_goal": True, "third_goal": True})
+        self.assertIsNone(self.goal_scheduler.next_goal())
+
+    def test_many_goals_on_one_world_state(self):
+        goals = [AIGoal(f"goal_{n}_achieved", True, 0.5, 0.5) for n in range(1000)]
+        goal_scheduler = GoalScheduler(goals)
+        for goal in goals:
+            goal_scheduler.reprioritize(goal)
+        for n in range(999):
+            goal_scheduler.world_state_changed(f"goal_{n}_achieved", True)
+        self.assertIs(goals[-1], goal_scheduler.next_goal())
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+class TestGoalPriorityPolicy(unittest.TestCase):
+    def setUp(self):
+        self.clock = SimulatedClock()
+        self.priority_policy = GoalPriorityPolicy(aging_weight=0.1, max_seconds_deferred=30, clock=self.clock)
+        self.goal_scheduler = GoalScheduler(priority_policy=self.priority_policy)
+
+    def test_without_aging_priority_is_the_sort_index(self):
+        goal = AIGoal("goal", True, 0.65, 0.8)
+        self.assertAlmostEqual(goal.sort_index, GoalPriorityPolicy(aging_weight=0).priority(goal, 0, now=100))
+
+    def test_waiting_goals_overtake_higher_priority_goals(self):
+        routine_goal = AIGoal("laundry_maintained", True, 0.2, 0.1)
+        self.goal_scheduler.add_goal(routine_goal)
+
+        # a stream of critical goals arrives. each one is handled as soon as it arrives until the routine goal
+        # has waited long enough to come first
+        for second in range(1, 100):
+            self.clock.time = second
+            critical_goal = AIGoal(f"temperature_event_{second}_handled", True, 0.9, 0.9)
+            self.goal_scheduler.add_goal(critical_goal)
+            next_goal = self.goal_scheduler.next_goal()
+            if next_goal is routine_goal:
+                break
+            self.goal_scheduler.remove_goal(next_goal)
+        self.assertIs(routine_goal, self.goal_scheduler.next_goal())
+        self.assertLess(self.clock.time, 20)
+        self.assertGreater(self.goal_scheduler.priority(routine_goal), self.goal_scheduler.priority(critical_goal))
+
+        # once pursued, the routine goal starts waiting again
+        self.goal_scheduler.goal_pursued(routine_goal)
+        self.assertIs(critical_goal, self.goal_scheduler.next_goal())
+
+    def test_deferral_is_capped(self):
+        deferrable_goal = AIGoal("deferrable_goal", True, 1, 0.5)
+        self.goal_scheduler.add_goal(deferrable_goal)
+        self.goal_scheduler.defer(deferrable_goal)
+        self.assertIsNone(self.goal_scheduler.next_goal())
+
+        self.clock.time = 29
+        self.assertIsNone(self.goal_scheduler.next_goal())
+        self.clock.time = 30
+        self.assertIs(deferrable_goal, self.goal_scheduler.next_goal())
+        self.assertFalse(deferrable_goal.deferred)
+
+
+class TestAIGoalScheduler(unittest.TestCase):
+    def setUp(self):
+        self.network = LocalNetwork.instance()
+        self.network.reset()
+        self.ai = AI()
+        self.goal = AIGoal("ai_goal_scheduler_goal", True, 1, 0)
+        self.ai.goal_scheduler().set_goals([self.goal])
+
+    def tearDown(self):
+        self.ai.goal_scheduler().set_goals([])
+        self.network.reset()
+
+    def test_world_changes_reach_the_goal_scheduler(self):
+        self.assertIs(self.goal, self.ai.goal_scheduler().next_goal())
+
+        # a change to the goal's world state meets the goal
+        self.network.update_the_world_many({"ai_goal_scheduler_goal": True}, {})
+        self.ai.world_changed(self.network.wait_for_world_change(0))
+        self.assertIsNone(self.ai.goal_scheduler().next_goal())
+
+
+if __name__ == '__main__':
+    unittest.main()
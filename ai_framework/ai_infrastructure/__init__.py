@@ -3,3 +3,4 @@ __copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
 __version__ = "0.0.1"
 
 from .network import LocalNetwork, AiMqttNetwork
+from .local_event_bus import LocalEventBus, BackpressurePolicy
@@ -0,0 +1,82 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# measures publish and delivery throughput on the local event bus, with and without a slow subscriber, against
+# calling every subscriber in the publisher's thread as the local network used to.
+# run with: python -m ai_framework.ai_infrastructure.benchmark_local_event_bus
+
+# needed to time publishing and delivery
+import time
+
+# needed to publish on the local event bus
+from ai_framework.ai_infrastructure.local_event_bus import LocalEventBus, TopicTrie
+
+
+def _fast_subscriber(topic, message):
+    pass
+
+
+def _slow_subscriber(topic, message):
+    time.sleep(0.001)
+
+
+def _publishes_per_second_in_the_publishers_thread(subscribers, num_messages):
+    # the way the local network published before: every subscriber of the exact topic, called in turn
+    message_queue = {"home/kitchen/temperature": list(subscribers)}
+    start = time.perf_counter()
+    for n in range(num_messages):
+        for callback in message_queue["home/kitchen/temperature"]:
+            callback("home/kitchen/temperature", n)
+    return num_messages / (time.perf_counter() - start)
+
+
+def _publishes_and_deliveries_per_second(subscribers, num_messages):
+    event_bus = LocalEventBus(max_queued_messages=num_messages)
+    topic_filters = ("home/kitchen/temperature", "home/+/temperature", "home/#", "#")
+    fast_subscriptions = []
+    for n, subscriber in enumerate(subscribers):
+        subscription = event_bus.subscribe(topic_filters[n % len(topic_filters)], subscriber)
+        if subscriber is _fast_subscriber:
+            fast_subscriptions.append(subscription)
+
+    start = time.perf_counter()
+    for n in range(num_messages):
+        event_bus.publish("home/kitchen/temperature", n)
+    publishing_seconds = time.perf_counter() - start
+
+    # deliveries to the fast subscribers only, so the slow subscriber does not set the pace
+    for subscription in fast_subscriptions:
+        subscription.flush()
+    delivered = sum(subscription.delivered for subscription in fast_subscriptions)
+    delivery_seconds = time.perf_counter() - start
+    event_bus.close()
+    return num_messages / publishing_seconds, delivered / delivery_seconds
+
+
+def _matches_per_second(num_filters, num_matches):
+    topic_trie = TopicTrie()
+    for n in range(num_filters):
+        topic_trie.add(f"home/room_{n}/+", n)
+    topic_trie.add("home/#", "everything")
+    start = time.perf_counter()
+    for n in range(num_matches):
+        topic_trie.match(f"home/room_{n % num_filters}/temperature")
+    return num_matches / (time.perf_counter() - start)
+
+
+def run_benchmark(num_messages=2000):
+    print(f"{'subscribers':>24} {'publishing':>12} {'publishes (/s)':>16} {'fast deliveries (/s)':>21}")
+    for name, subscribers in (("4 fast", [_fast_subscriber] * 4),
+                              ("4 fast and 1 slow", [_fast_subscriber] * 4 + [_slow_subscriber])):
+        num = num_messages if name == "4 fast" else num_messages // 10
+        in_thread = _publishes_per_second_in_the_publishers_thread(subscribers, num)
+        published, delivered = _publishes_and_deliveries_per_second(subscribers, num)
+        print(f"{name:>24} {'in thread':>12} {in_thread:>16.0f} {in_thread * 4:>21.0f}")
+        print(f"{name:>24} {'event bus':>12} {published:>16.0f} {delivered:>21.0f}")
+
+    print(f"topic trie matches against 1000 filters: {_matches_per_second(1000, num_messages * 10):.0f}/s")
+
+
+if __name__ == "__main__":
+    run_benchmark()
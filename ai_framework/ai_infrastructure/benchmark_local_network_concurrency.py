@@ -0,0 +1,121 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# stresses the local network with writer and reader threads at the same time, checks that no reader ever saw a
+# world state missing, duplicated or out of order, and reports the operations per second.
+# run with: python -m ai_framework.ai_infrastructure.benchmark_local_network_concurrency
+
+# needed to run writers and readers at the same time
+import threading
+
+# needed to time the stress run
+import time
+
+# needed to stress the shared local network
+from ai_framework.ai_infrastructure import LocalNetwork
+from ai_framework.singleton import Singleton
+
+
+def _check_singleton_creation(num_threads=32):
+    # many threads asking for a new singleton at once must all get the same, single instance
+    created = []
+
+    @Singleton
+    class SlowToCreate:
+        def __init__(self):
+            created.append(self)
+            time.sleep(0.01)
+
+    start_line = threading.Barrier(num_threads)
+    instances = []
+
+    def get_instance():
+        start_line.wait()
+        instances.append(SlowToCreate.instance())
+
+    threads = [threading.Thread(target=get_instance) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1, f"{len(created)} singleton instances were created"
+    assert all(instance is created[0] for instance in instances)
+
+
+def run_benchmark(num_writers=4, num_readers=4, world_states_per_writer=50, seconds_to_run=2.0):
+    _check_singleton_creation()
+
+    local_network = LocalNetwork.instance()
+    local_network.reset()
+
+    # every writer owns a set of world states and writes them with ever increasing values
+    for writer in range(num_writers):
+        local_network.update_the_world_many(tuple((f"writer_{writer}_state_{n}", 0)
+                                                  for n in range(world_states_per_writer)), {})
+    num_world_states = num_writers * world_states_per_writer
+
+    stop = threading.Event()
+    writes = [0] * num_writers
+    reads = [0] * num_readers
+    problems = []
+
+    def write(writer):
+        value = 0
+        while not stop.is_set():
+            value += 1
+            if value % 2:
+                for n in range(world_states_per_writer):
+                    local_network.update_the_world(f"writer_{writer}_state_{n}", value, {})
+            else:
+                local_network.update_the_world_many(tuple((f"writer_{writer}_state_{n}", value)
+                                                          for n in range(world_states_per_writer)), {})
+            writes[writer] += world_states_per_writer
+
+    def read(reader):
+        last_version = -1
+        last_values = {}
+        while not stop.is_set():
+            world_states = local_network.the_world_states()
+            if world_states.version < last_version:
+                problems.append(f"snapshot version went back from {last_version} to {world_states.version}")
+            last_version = world_states.version
+            if len(world_states) != num_world_states:
+                problems.append(f"a snapshot held {len(world_states)} of {num_world_states} world states")
+
+            # a world state's value never goes back in time
+            for world_state_name, world_state_value in world_states.items():
+                if world_state_value < last_values.get(world_state_name, 0):
+                    problems.append(f"{world_state_name} went back from {last_values[world_state_name]} to "
+                                    f"{world_state_value}")
+                last_values[world_state_name] = world_state_value
+
+            # every world state is always in the world exactly once, even while it is being replaced
+            world_events = local_network.the_world()
+            if len(world_events) != num_world_states or \
+                    len({world_event.world_state_name for world_event in world_events}) != num_world_states:
+                problems.append(f"the world held {len(world_events)} events for {num_world_states} world states")
+            reads[reader] += 1
+
+    threads = [threading.Thread(target=write, args=(writer,)) for writer in range(num_writers)] + \
+              [threading.Thread(target=read, args=(reader,)) for reader in range(num_readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds_to_run)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    assert not problems, f"{len(problems)} problems, the first: {problems[0]}"
+    assert len(local_network.the_world_states()) == num_world_states
+
+    print(f"{'writers':>8} {'readers':>8} {'updates (/s)':>14} {'world reads (/s)':>18}")
+    print(f"{num_writers:>8} {num_readers:>8} {sum(writes) / elapsed:>14.0f} {sum(reads) / elapsed:>18.0f}")
+    local_network.reset()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,107 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# measures reading the whole world and finding devices by location and by effect, against rebuilding the merged
+# summaries and scanning every device as the world did before it was indexed. also measures reads interleaved with
+# updates, against copying every summary on the first read after each update. the cost of an update followed by a
+# read should stay flat as the world grows.
+# run with: python -m ai_framework.ai_infrastructure.benchmark_world
+
+# needed to time reads and queries
+import time
+
+# needed to copy the summaries the way the world did before
+from types import MappingProxyType
+
+# needed to build the world
+from ai_framework.ai_infrastructure.message import Message
+from ai_framework.ai_infrastructure.world import World
+
+
+def _device_message(device):
+    return Message(
+        event_type="reading", event_tags={"location": f"room_{device % 100}"}, event_source=f"device_{device}",
+        timestamp=1650000000.0, device_info=None, application_info=None, user_info=None, environment=None,
+        context=None, effects={f"device_{device}_reading": device, f"{device % 10}_online": True}, data=None)
+
+
+def _populated_world(num_devices):
+    world = World()
+    for device in range(num_devices):
+        world.update(f"home/room_{device % 100}", _device_message(device))
+    return world
+
+
+def _rebuilt_info(world):
+    # get_all_info as it was before: every summary merged into a new dictionary
+    all_info = {}
+    for device in world.get_all_info():
+        all_info.update(world.info(device).get_summary())
+    return all_info
+
+
+def _scanned_devices_in_location(world, location):
+    return {device for device in world.get_all_info() if world.info(device).location == location}
+
+
+def _scanned_devices_with_effect(world, effect_name):
+    return {device for device in world.get_all_info() if effect_name in world.info(device).effects}
+
+
+def _microseconds_per_call(function, num_calls):
+    start = time.perf_counter()
+    for _ in range(num_calls):
+        function()
+    return (time.perf_counter() - start) / num_calls * 1e6
+
+
+def run_benchmark(world_sizes=(1000, 5000, 20000), num_calls=50):
+    print(f"{'devices':>8} {'read (us)':>22} {'by location (us)':>22} {'by effect (us)':>22}")
+    print(f"{'':>8} {'before':>10} {'after':>11} {'before':>10} {'after':>11} {'before':>10} {'after':>11}")
+    for num_devices in world_sizes:
+        world = _populated_world(num_devices)
+        assert _scanned_devices_in_location(world, "room_7") == world.devices_in_location("room_7")
+        assert _scanned_devices_with_effect(world, "3_online") == world.devices_with_effect("3_online")
+
+        costs = (_microseconds_per_call(lambda: _rebuilt_info(world), num_calls),
+                 _microseconds_per_call(world.get_all_info, num_calls),
+                 _microseconds_per_call(lambda: _scanned_devices_in_location(world, "room_7"), num_calls),
+                 _microseconds_per_call(lambda: world.devices_in_location("room_7"), num_calls),
+                 _microseconds_per_call(lambda: _scanned_devices_with_effect(world, "3_online"), num_calls),
+                 _microseconds_per_call(lambda: world.devices_with_effect("3_online"), num_calls))
+        print(f"{num_devices:>8} {costs[0]:>10.1f} {costs[1]:>11.1f} {costs[2]:>10.1f} {costs[3]:>11.1f} "
+              f"{costs[4]:>10.1f} {costs[5]:>11.1f}")
+
+
+def run_interleaved_benchmark(world_sizes=(1000, 10000, 100000), num_calls=200):
+    print(f"{'devices':>8} {'update and read (us)':>22}")
+    print(f"{'':>8} {'before':>10} {'after':>11}")
+    for num_devices in world_sizes:
+        world = _populated_world(num_devices)
+        all_info = dict(world.get_all_info().items())
+        messages = [_device_message(device) for device in range(num_calls)]
+
+        def update_and_copy():
+            # get_all_info as it was before: the summaries were kept in a dictionary, and the first read after an
+            # update copied every one of them
+            message = messages.pop()
+            world.update(f"home/{message.event_tags['location']}", message)
+            all_info[message.event_source] = world.info(message.event_source).get_summary()[message.event_source]
+            return MappingProxyType(dict(all_info))
+
+        def update_and_read():
+            message = messages.pop()
+            world.update(f"home/{message.event_tags['location']}", message)
+            return world.get_all_info()
+
+        before = _microseconds_per_call(update_and_copy, num_calls)
+        messages = [_device_message(device) for device in range(num_calls)]
+        after = _microseconds_per_call(update_and_read, num_calls)
+        print(f"{num_devices:>8} {before:>10.1f} {after:>11.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
+    print()
+    run_interleaved_benchmark()
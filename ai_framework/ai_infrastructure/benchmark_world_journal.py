@@ -0,0 +1,54 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# measures how long it takes to journal world updates and to rebuild the world from the journal on restart.
+# run with: python -m ai_framework.ai_infrastructure.benchmark_world_journal
+
+# needed to time the journal
+import time
+
+# needed to keep the journal out of the way
+import tempfile
+
+# needed to build and restore the world
+from ai_framework.ai_infrastructure.world_event import WorldEvent
+from ai_framework.ai_infrastructure.world_journal import WorldJournal
+from ai_framework.ai_infrastructure.world_store import WorldStore
+
+
+def run_benchmark(num_updates=1000000, num_world_states=10000, updates_per_batch=1000):
+    with tempfile.TemporaryDirectory() as journal_folder:
+        # never snapshot, so that the whole restore comes from replaying the journal
+        world_journal = WorldJournal(journal_folder, updates_between_snapshots=num_updates + 1)
+
+        world_events = [WorldEvent(f"state_{n}", n % 3 == 0, {}, context_is_validated=True)
+                        for n in range(num_world_states)]
+        start = time.perf_counter()
+        for batch in range(num_updates // updates_per_batch):
+            first_world_event = (batch * updates_per_batch) % num_world_states
+            world_journal.record(world_events[first_world_event:first_world_event + updates_per_batch])
+        seconds_to_record = time.perf_counter() - start
+        world_journal.close()
+
+        start = time.perf_counter()
+        world_store = WorldStore()
+        world_store.update_many(WorldJournal(journal_folder).replay())
+        seconds_to_replay = time.perf_counter() - start
+
+        print(f"journaled {num_updates} updates in {seconds_to_record:.2f} seconds "
+              f"({num_updates / seconds_to_record:.0f} updates per second)")
+        print(f"replayed {num_updates} updates into {len(world_store)} world states in {seconds_to_replay:.2f} seconds")
+
+        # a snapshot of the restored world makes the next restart replay only the world states
+        snapshot_journal = WorldJournal(journal_folder)
+        snapshot_journal.snapshot(world_store.world_events())
+        snapshot_journal.close()
+        start = time.perf_counter()
+        WorldJournal(journal_folder).replay()
+        print(f"replayed the snapshot of {len(world_store)} world states in "
+              f"{time.perf_counter() - start:.2f} seconds")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,90 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# measures the cost of updating and reading the world as the number of world states grows. updates copy only the
+# path to the updated world state in the snapshot trie, so their cost should stay flat from 1k to 400k world states.
+# run with: python -m ai_framework.ai_infrastructure.benchmark_world_store
+
+# needed to time updates and reads
+import time
+
+# needed to build the world
+from ai_framework.ai_infrastructure.world_event import WorldEvent
+from ai_framework.ai_infrastructure.world_store import WorldStore
+
+
+def _populated_world_store(num_world_states):
+    world_store = WorldStore()
+    for n in range(num_world_states):
+        world_store.update(WorldEvent(f"state_{n}", False, {}))
+    return world_store
+
+
+def _microseconds_per_update(world_store, num_world_states, num_updates):
+    # update existing states spread across the whole world, alternating values so every update is a change
+    world_events = [WorldEvent(f"state_{(n * 7919) % num_world_states}", n % 2 == 0, {})
+                    for n in range(num_updates)]
+
+    start = time.perf_counter()
+    for world_event in world_events:
+        world_store.update(world_event)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / num_updates * 1e6
+
+
+def _microseconds_per_read(world_store, num_reads):
+    # read the world states the way the ai server loop does, once per iteration with no writes between reads
+    start = time.perf_counter()
+    for _ in range(num_reads):
+        world_store.world_states()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / num_reads * 1e6
+
+
+def _microseconds_per_update_and_read(world_store, num_world_states, num_updates):
+    # a reader takes the world states after every update, the way the planner and diary do while devices write
+    world_events = [WorldEvent(f"state_{(n * 7919) % num_world_states}", n % 2 == 1, {})
+                    for n in range(num_updates)]
+
+    start = time.perf_counter()
+    for world_event in world_events:
+        world_store.update(world_event)
+        world_store.world_states()
+    elapsed = time.perf_counter() - start
+
+    return elapsed / num_updates * 1e6
+
+
+def _microseconds_per_lookup(world_store, num_world_states, num_lookups):
+    world_state_names = [f"state_{(n * 7919) % num_world_states}" for n in range(num_lookups)]
+
+    start = time.perf_counter()
+    for world_state_name in world_state_names:
+        world_store.world_event(world_state_name)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / num_lookups * 1e6
+
+
+def run_benchmark(world_sizes=(1000, 10000, 100000, 400000), num_operations=5000):
+    print(f"{'world states':>12} {'update (us)':>12} {'lookup (us)':>12} {'read (us)':>12} "
+          f"{'update+read (us)':>16}")
+    for num_world_states in world_sizes:
+        world_store = _populated_world_store(num_world_states)
+        update_cost = _microseconds_per_update(world_store, num_world_states, num_operations)
+        lookup_cost = _microseconds_per_lookup(world_store, num_world_states, num_operations)
+
+        # prime the snapshot once, the way the first read after a write would
+        world_store.world_states()
+        read_cost = _microseconds_per_read(world_store, num_operations)
+        update_and_read_cost = _microseconds_per_update_and_read(world_store, num_world_states, num_operations)
+
+        print(f"{num_world_states:>12} {update_cost:>12.3f} {lookup_cost:>12.3f} {read_cost:>12.3f} "
+              f"{update_and_read_cost:>16.3f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,118 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# replays recorded mqtt payloads into the world, the way AiMqttNetwork received them before and through the world
+# update ingest, and reports the messages ingested per second.
+# run with: python -m ai_framework.ai_infrastructure.benchmark_world_update_ingest [recording.jsonl]
+# a recording holds one {"topic": ..., "payload": ...} json document per line. without one, a sensor storm from
+# many devices is recorded and replayed
+
+# needed to read recordings and to decode payloads the way they were decoded before
+import json
+import sys
+
+# needed to time replays
+import time
+
+# needed to discard the prints made before
+import contextlib
+import io
+
+# needed to replay into the world
+from ai_framework.ai_infrastructure.message import Message
+from ai_framework.ai_infrastructure.world import World
+from ai_framework.ai_infrastructure import world_update_ingest
+from ai_framework.ai_infrastructure.world_update_ingest import WorldUpdateIngest
+
+
+def _recorded_sensor_storm(num_devices=50, updates_per_device=200):
+    # interleaved readings from many devices, each sending a burst of updates
+    recording = []
+    for n in range(updates_per_device):
+        for device in range(num_devices):
+            message = {"event_type": "reading", "event_tags": {"location": f"room_{device % 10}"},
+                       "event_source": f"sensor_{device}", "timestamp": 1650000000.0 + n, "device_info": {},
+                       "application_info": {}, "user_info": {}, "environment": "home", "context": {},
+                       "effects": {f"sensor_{device}_reading": n, f"sensor_{device}_online": True},
+                       "data": {"reading": n, "unit": "celsius"}}
+            recording.append((f"home/room_{device % 10}/sensor_{device}", json.dumps(message).encode("utf-8")))
+    return recording
+
+
+def _read_recording(file_name):
+    recording = []
+    with open(file_name) as recording_file:
+        for line in recording_file:
+            if line.strip():
+                recorded_message = json.loads(line)
+                recording.append((recorded_message["topic"], recorded_message["payload"].encode("utf-8")))
+    return recording
+
+
+def _previous_ingest(world, topic, payload):
+    # the way AiMqttNetwork.process_external_world_update handled a message before the ingest
+    decoded_payload = str(payload.decode("utf-8", "ignore"))
+    data = json.loads(decoded_payload)
+    print(f'Received from topic {topic} data: {data}')
+    try:
+        message = Message(**data)
+        world.update(topic, message)
+    except TypeError as err:
+        print(f'Error while processing message {data}: {err}')
+
+
+def _replay_before(recording):
+    world = World()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for topic, payload in recording:
+            _previous_ingest(world, topic, payload)
+    return len(recording) / (time.perf_counter() - start), world
+
+
+def _replay_through_the_ingest(recording, seconds_to_coalesce, use_orjson):
+    world = World()
+    applied = []
+
+    def apply_update(topic, message):
+        applied.append(1)
+        world.update(topic, message, message_is_checked=True)
+
+    orjson = world_update_ingest.orjson
+    if not use_orjson:
+        world_update_ingest.orjson = None
+    try:
+        ingest = WorldUpdateIngest(apply_update, seconds_to_coalesce)
+        start = time.perf_counter()
+        for topic, payload in recording:
+            ingest.submit(topic, payload)
+        ingest.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        world_update_ingest.orjson = orjson
+    return len(recording) / elapsed, sum(applied), world
+
+
+def run_benchmark(recording=None):
+    recording = recording or _recorded_sensor_storm()
+    before, world_before = _replay_before(recording)
+
+    print(f"{len(recording)} recorded messages")
+    print(f"{'ingest':>32} {'messages (/s)':>14} {'world updates':>14}")
+    print(f"{'before':>32} {before:>14.0f} {len(recording):>14}")
+    for name, seconds_to_coalesce, use_orjson in (("json, no coalescing", 0, False),
+                                                  ("orjson, no coalescing", 0, True),
+                                                  ("json, 50 ms coalescing", 0.05, False),
+                                                  ("orjson, 50 ms coalescing", 0.05, True)):
+        if use_orjson and world_update_ingest.orjson is None:
+            continue
+        per_second, world_updates, world = _replay_through_the_ingest(recording, seconds_to_coalesce, use_orjson)
+
+        # the world ends up the same, however the messages were coalesced
+        assert world.effects == world_before.effects
+        print(f"{name:>32} {per_second:>14.0f} {world_updates:>14}")
+
+
+if __name__ == "__main__":
+    run_benchmark(_read_recording(sys.argv[1]) if len(sys.argv) > 1 else None)
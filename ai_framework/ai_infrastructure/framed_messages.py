@@ -0,0 +1,51 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to encode messages
+import json
+
+# needed to encode the length of each message
+import struct
+
+
+# every message is a json document preceded by its length in bytes as a four byte, big endian, unsigned number
+_length_prefix = struct.Struct(">I")
+LENGTH_PREFIX_SIZE = _length_prefix.size
+
+# the largest message accepted, so that a corrupt length cannot exhaust memory
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+class InvalidFrame(Exception):
+    pass
+
+
+def _json_default(value):
+    # contexts may hold tuples, sets or proxies of dictionaries and lists
+    if hasattr(value, 'items'):
+        return dict(value.items())
+    if hasattr(value, '__iter__') and not isinstance(value, (str, bytes)):
+        return list(value)
+    return str(value)
+
+
+def encode_frame(message):
+    # the framed bytes of a message
+    body = json.dumps(message, default=_json_default, separators=(',', ':')).encode('utf-8')
+    return _length_prefix.pack(len(body)) + body
+
+
+def message_length(length_prefix):
+    # the length of the message that follows the given length prefix
+    length, = _length_prefix.unpack(length_prefix)
+    if length > MAX_MESSAGE_SIZE:
+        raise InvalidFrame(f"a message of {length} bytes is larger than the limit of {MAX_MESSAGE_SIZE}")
+    return length
+
+
+def decode_message(body):
+    try:
+        return json.loads(body)
+    except ValueError as error:
+        raise InvalidFrame(str(error))
@@ -2,11 +2,14 @@
 from .message import Message
 
 class Info():
-    def __init__(self, topic, message):
+    def __init__(self, topic, message, message_is_checked=False):
         if not isinstance(message, Message):
             raise TypeError('Expected object of type Message')
         self.topic = topic
-        self.check_message(message)
+
+        # messages checked as they arrived are not checked again
+        if not message_is_checked:
+            self.check_message(message)
         self.message = message
 
     def __str__(self):
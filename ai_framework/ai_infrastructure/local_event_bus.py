@@ -0,0 +1,329 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to deliver messages on threads of their own
+import threading
+
+# needed to queue messages for each subscriber and to keep the most recently published topics
+from collections import deque, OrderedDict
+
+# needed to name the backpressure policies
+from enum import Enum
+
+# needed to measure throughput
+import time
+
+# needed to log subscribers that fail
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressurePolicy(Enum):
+    # what to do with a message for a subscriber whose queue is full
+    BLOCK = 'block'
+    DROP_NEWEST = 'drop_newest'
+    DROP_OLDEST = 'drop_oldest'
+
+
+class InvalidTopicFilter(Exception):
+    pass
+
+
+class TopicTrie:
+    """
+    Finds the subscriptions whose topic filters match a topic, the way MQTT does.
+
+    Topics and topic filters are made of levels separated by '/'. In a filter, '+' matches exactly one level and
+    '#', which must be the last level, matches the parent level and any number of levels below it. Wildcards at the
+    first level do not match topics that start with '$'.
+    """
+
+    def __init__(self):
+        self._root = _TopicTrieNode()
+
+    def add(self, topic_filter, subscription):
+        node = self._root
+        for level in _topic_filter_levels(topic_filter):
+            node = node.children.setdefault(level, _TopicTrieNode())
+        node.subscriptions.append(subscription)
+
+    def remove(self, topic_filter, subscription):
+        # remove the subscription and any branches of the trie left empty
+        path = [self._root]
+        levels = _topic_filter_levels(topic_filter)
+        for level in levels:
+            node = path[-1].children.get(level)
+            if node is None:
+                return
+            path.append(node)
+        if subscription in path[-1].subscriptions:
+            path[-1].subscriptions.remove(subscription)
+        for level, node, parent in zip(reversed(levels), reversed(path[1:]), reversed(path[:-1])):
+            if node.subscriptions or node.children:
+                break
+            del parent.children[level]
+
+    def match(self, topic):
+        # the subscriptions whose filters match the topic, each once
+        levels = topic.split('/')
+        matches = []
+        self._match(self._root, levels, 0, not topic.startswith('$'), matches)
+
+        unique_matches = {}
+        for subscription in matches:
+            unique_matches.setdefault(id(subscription), subscription)
+        return list(unique_matches.values())
+
+    def _match(self, node, levels, depth, wildcards_allowed, matches):
+        if wildcards_allowed:
+            # '#' matches this level, the levels below it and, at any level but the first, the parent level
+            multi_level = node.children.get('#')
+            if multi_level is not None:
+                matches.extend(multi_level.subscriptions)
+
+        if depth == len(levels):
+            matches.extend(node.subscriptions)
+            return
+
+        exact = node.children.get(levels[depth])
+        if exact is not None:
+            self._match(exact, levels, depth + 1, True, matches)
+        if wildcards_allowed:
+            single_level = node.children.get('+')
+            if single_level is not None:
+                self._match(single_level, levels, depth + 1, True, matches)
+
+
+class _TopicTrieNode:
+    __slots__ = ('children', 'subscriptions')
+
+    def __init__(self):
+        self.children = {}
+        self.subscriptions = []
+
+
+def _topic_filter_levels(topic_filter):
+    levels = topic_filter.split('/')
+    for position, level in enumerate(levels):
+        if '#' in level and (level != '#' or position != len(levels) - 1):
+            raise InvalidTopicFilter(f"'#' must be the whole of the last level in {topic_filter}")
+        if '+' in level and level != '+':
+            raise InvalidTopicFilter(f"'+' must be a whole level in {topic_filter}")
+    return levels
+
+
+class Subscription:
+    """
+    A subscriber's callback together with its own bounded queue of messages and the thread that delivers them.
+
+    A subscriber that falls behind only fills its own queue. What happens when the queue is full is set by the
+    subscription's backpressure policy.
+    """
+
+    def __init__(self, topic_filter, callback, max_queued_messages, backpressure_policy):
+        self.topic_filter = topic_filter
+        self._callback = callback
+        self._max_queued_messages = max_queued_messages
+        self._backpressure_policy = backpressure_policy
+        self._messages = deque()
+        self._condition = threading.Condition()
+        self._delivering = False
+        self._delivery_waiting = False
+        self._closed = False
+
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._thread = threading.Thread(target=self._deliver, name=f"subscription {topic_filter}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def queue(self, topic, message):
+        # queue a message for delivery. returns false if the message was dropped
+        with self._condition:
+            if self._closed:
+                return False
+            if len(self._messages) >= self._max_queued_messages:
+                if self._backpressure_policy == BackpressurePolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self._backpressure_policy == BackpressurePolicy.DROP_OLDEST:
+                    self._messages.popleft()
+                    self.dropped += 1
+                    self._messages.append((topic, message))
+                    return True
+
+                # the publisher waits for the subscriber to catch up
+                self._condition.wait_for(lambda: len(self._messages) < self._max_queued_messages or self._closed)
+                if self._closed:
+                    return False
+            self._messages.append((topic, message))
+            if self._delivery_waiting:
+                self._condition.notify_all()
+            return True
+
+    def queued(self):
+        return len(self._messages)
+
+    def flush(self, timeout=None):
+        # wait until every queued message has been delivered. returns false if the timeout passed first
+        with self._condition:
+            return self._condition.wait_for(lambda: (not self._messages and not self._delivering) or self._closed,
+                                            timeout)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._messages.clear()
+            self._condition.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _deliver(self):
+        while True:
+            with self._condition:
+                # publishers only notify the condition while the delivery thread waits for messages
+                self._delivery_waiting = True
+                self._condition.wait_for(lambda: self._messages or self._closed)
+                self._delivery_waiting = False
+                if self._closed:
+                    return
+                topic, message = self._messages.popleft()
+                self._delivering = True
+
+                # a blocked publisher can go on
+                if self._backpressure_policy == BackpressurePolicy.BLOCK:
+                    self._condition.notify_all()
+
+            try:
+                self._callback(topic, message)
+                self.delivered += 1
+            except Exception:
+                logger.exception("a subscriber to %s failed to handle a message on topic %s", self.topic_filter, topic)
+                self.failed += 1
+
+            with self._condition:
+                self._delivering = False
+                if not self._messages:
+                    self._condition.notify_all()
+
+
+class LocalEventBus:
+    """
+    An in-process publish and subscribe bus.
+
+    Subscribers subscribe with MQTT-style topic filters. A published message is queued for every matching
+    subscription and the publisher goes on, while each subscription delivers its messages in order on a thread of
+    its own. By default a publisher waits for a subscriber whose queue is full, so no message is lost. Subscribers
+    that would rather lose messages than hold up publishers subscribe with a DROP_NEWEST or DROP_OLDEST policy.
+
+    Matches are cached by topic until the subscriptions change, so publishing to a known topic does not walk the
+    topic trie. Only the max_cached_topics most recently published topics are cached, so publishing to ever new
+    topics does not grow the cache without limit.
+    """
+
+    def __init__(self, max_queued_messages=1000, backpressure_policy=BackpressurePolicy.BLOCK, max_cached_topics=1000):
+        self._max_queued_messages = max_queued_messages
+        self._backpressure_policy = backpressure_policy
+        self._max_cached_topics = max_cached_topics
+        self._lock = threading.Lock()
+        self._topic_trie = TopicTrie()
+        self._subscriptions = []
+        self._matches_by_topic = OrderedDict()
+        self._started_at = time.monotonic()
+        self._published = 0
+        self._queued = 0
+
+    def subscribe(self, topic_filter, callback, max_queued_messages=None, backpressure_policy=None):
+        subscription = Subscription(topic_filter, callback,
+                                    max_queued_messages or self._max_queued_messages,
+                                    backpressure_policy or self._backpressure_policy)
+        with self._lock:
+            self._topic_trie.add(topic_filter, subscription)
+            self._subscriptions.append(subscription)
+            self._matches_by_topic = OrderedDict()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._topic_trie.remove(subscription.topic_filter, subscription)
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            self._matches_by_topic = OrderedDict()
+        subscription.close()
+
+    def subscriptions(self, topic):
+        # the subscriptions that match the given topic
+        with self._lock:
+            matches = self._matches_by_topic.get(topic)
+            if matches is not None:
+                self._matches_by_topic.move_to_end(topic)
+                return matches
+
+            matches = self._topic_trie.match(topic)
+            self._matches_by_topic[topic] = matches
+
+            # make room by forgetting the topic published to least recently
+            if len(self._matches_by_topic) > self._max_cached_topics:
+                self._matches_by_topic.popitem(last=False)
+            return matches
+
+    def publish(self, topic, message):
+        # queue the message for every matching subscription. returns the number of subscriptions it was queued for
+        if '+' in topic or '#' in topic:
+            raise InvalidTopicFilter(f"messages cannot be published to the topic filter {topic}")
+
+        subscriptions = self.subscriptions(topic)
+        queued = 0
+        for subscription in subscriptions:
+            if subscription.queue(topic, message):
+                queued += 1
+        with self._lock:
+            self._published += 1
+            self._queued += queued
+        return queued
+
+    def flush(self, timeout=None):
+        # wait until every subscription has delivered its queued messages. returns false if the timeout passed first
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not subscription.flush(remaining):
+                return False
+        return True
+
+    def close(self):
+        with self._lock:
+            subscriptions = self._subscriptions
+            self._subscriptions = []
+            self._topic_trie = TopicTrie()
+            self._matches_by_topic = OrderedDict()
+        for subscription in subscriptions:
+            subscription.close()
+
+    def metrics(self):
+        # message counts and rates since the bus was created, and the state of each subscription
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            published, queued = self._published, self._queued
+        seconds = max(time.monotonic() - self._started_at, 1e-9)
+        delivered = sum(subscription.delivered for subscription in subscriptions)
+        return {"published": published,
+                "queued": queued,
+                "delivered": delivered,
+                "dropped": sum(subscription.dropped for subscription in subscriptions),
+                "failed": sum(subscription.failed for subscription in subscriptions),
+                "published_per_second": published / seconds,
+                "delivered_per_second": delivered / seconds,
+                "subscriptions": [{"topic_filter": subscription.topic_filter,
+                                   "queued": subscription.queued(),
+                                   "delivered": subscription.delivered,
+                                   "dropped": subscription.dropped,
+                                   "failed": subscription.failed}
+                                  for subscription in subscriptions]}
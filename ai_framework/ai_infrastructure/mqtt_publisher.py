@@ -0,0 +1,184 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to publish on a thread of its own
+import threading
+
+# needed to queue outbound messages
+from collections import deque, namedtuple
+
+# needed to encode payloads
+import json
+
+# needed to log instead of printing
+import logging
+
+# needed to name what happens when the outbound queue is full
+from .local_event_bus import BackpressurePolicy
+
+
+logger = logging.getLogger(__name__)
+
+
+# effects waiting to be published as one message, and the function that makes the message from them
+_PendingEffects = namedtuple('_PendingEffects', 'effects create_message')
+
+
+class MqttPublisher:
+    """
+    Publishes messages to an MQTT connection from a bounded outbound queue.
+
+    Callers queue messages and go on. A publishing thread encodes each message and hands it to the connection,
+    keeping at most max_in_flight_messages published but not yet acknowledged by the broker. When the outbound queue
+    is full, the backpressure policy decides whether the caller waits or a message is dropped.
+
+    Effects queued with publish_effects are batched: while a topic's effects wait in the queue, later effects for
+    the same topic are merged into them, so that a burst of updates goes out as one message.
+
+    Messages made from merged effects exist only once they are about to be published, so the publisher checks them
+    with validate_message, if given, and counts and logs the ones that are invalid instead of publishing them.
+
+    The connection needs only a publish(topic, payload, qos) method that returns a future for the broker's
+    acknowledgement and the packet id, as awscrt connections do.
+    """
+
+    def __init__(self, connection, qos, max_queued_messages=10000, max_in_flight_messages=100,
+                 backpressure_policy=BackpressurePolicy.BLOCK, validate_message=None):
+        self._connection = connection
+        self._qos = qos
+        self._validate_message = validate_message
+        self._max_queued_messages = max_queued_messages
+        self._max_in_flight_messages = max_in_flight_messages
+        self._backpressure_policy = backpressure_policy
+
+        # queued messages are (topic, message) pairs. a message of None stands for the pending effects of the topic
+        self._outbound = deque()
+        self._pending_effects = {}
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._publishing = False
+        self._closed = False
+
+        self._counts = {"queued": 0, "published": 0, "acknowledged": 0, "failed": 0, "dropped": 0,
+                        "effects_merged": 0, "invalid": 0}
+
+        self._thread = threading.Thread(target=self._publish_queued_messages, name="mqtt_publisher")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def publish(self, topic, message):
+        # queue a message to be encoded as json and published. returns false if the message was dropped
+        with self._condition:
+            if not self._make_room():
+                return False
+            self._outbound.append((topic, message))
+            self._counts["queued"] += 1
+            self._condition.notify_all()
+            return True
+
+    def publish_effects(self, topic, effects, create_message):
+        # queue effects to be published as one message made by create_message(effects). effects queued for the same
+        # topic before that message is published are merged into it. returns false if the effects were dropped
+        with self._condition:
+            pending_effects = self._pending_effects.get(topic)
+            if pending_effects is not None:
+                pending_effects.effects.update(effects)
+                self._counts["effects_merged"] += 1
+                return True
+            if not self._make_room():
+                return False
+            self._pending_effects[topic] = _PendingEffects(dict(effects), create_message)
+            self._outbound.append((topic, None))
+            self._counts["queued"] += 1
+            self._condition.notify_all()
+            return True
+
+    def flush(self, timeout=None):
+        # wait until every queued message has been published and acknowledged. returns false if the timeout passed
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._outbound and not self._publishing and not self._in_flight, timeout)
+
+    def close(self, timeout=None):
+        # publish what is queued, then stop the publishing thread
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def metrics(self):
+        with self._condition:
+            return dict(self._counts, waiting=len(self._outbound), in_flight=self._in_flight)
+
+    def _make_room(self):
+        # called holding the condition. returns false if the new message should be dropped
+        if len(self._outbound) < self._max_queued_messages:
+            return True
+        if self._backpressure_policy == BackpressurePolicy.DROP_NEWEST:
+            self._counts["dropped"] += 1
+            return False
+        if self._backpressure_policy == BackpressurePolicy.DROP_OLDEST:
+            topic, message = self._outbound.popleft()
+            if message is None:
+                self._pending_effects.pop(topic, None)
+            self._counts["dropped"] += 1
+            return True
+        self._condition.wait_for(lambda: len(self._outbound) < self._max_queued_messages or self._closed)
+        return not self._closed
+
+    def _publish_queued_messages(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or
+                                         (self._outbound and self._in_flight < self._max_in_flight_messages))
+                if self._closed:
+                    return
+                topic, message = self._outbound.popleft()
+                if message is None:
+                    message = self._pending_effects.pop(topic)
+                self._in_flight += 1
+                self._publishing = True
+
+                # a blocked caller can queue again
+                self._condition.notify_all()
+
+            self._publish(topic, message)
+
+    def _publish(self, topic, message):
+        try:
+            if isinstance(message, _PendingEffects):
+                message = message.create_message(message.effects)
+                if self._validate_message is not None and not self._validate_message(message):
+                    logger.error("not publishing an invalid message to topic %s: %s", topic, message)
+                    self._message_done("invalid")
+                    return
+            payload = json.dumps(message)
+            logger.debug("publishing to topic %s: %s", topic, payload)
+            acknowledgement, _ = self._connection.publish(topic=topic, payload=payload, qos=self._qos)
+        except Exception:
+            logger.exception("unable to publish to topic %s", topic)
+            self._message_done("failed")
+            return
+        finally:
+            with self._condition:
+                self._publishing = False
+                self._condition.notify_all()
+
+        with self._condition:
+            self._counts["published"] += 1
+        acknowledgement.add_done_callback(self._acknowledged)
+
+    def _acknowledged(self, acknowledgement):
+        if acknowledgement.exception() is not None:
+            logger.warning("the broker did not acknowledge a message: %s", acknowledgement.exception())
+            self._message_done("failed")
+        else:
+            self._message_done("acknowledged")
+
+    def _message_done(self, outcome):
+        with self._condition:
+            self._in_flight -= 1
+            self._counts[outcome] += 1
+            self._condition.notify_all()
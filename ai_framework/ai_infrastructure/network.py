@@ -6,18 +6,27 @@ __version__ = "0.0.1"
 from ai_framework.singleton import Singleton
 
 # needed for message queuing and validation
-from jsonschema import validate, ValidationError
-import json
-
-# needed to reference the json schema file from within the host application
-import pkgutil
+from ai_framework.ai_context import schema_validator, is_validate_context
 
 # used to log system messages in the event of network connection failure
 import sys
+import logging
 
 # needed to create events when updating the world
 from .world_event import WorldEvent
 
+# needed to index the world by world state name
+from .world_store import WorldStore
+
+# needed to wake the ai when the world changes
+from .world_change_signal import WorldChangeSignal
+
+# needed to share the local network between the ai, the server threads and device threads
+import threading
+
+# needed to deliver local messages without holding up publishers
+from .local_event_bus import LocalEventBus
+
 # MQTT Networks
 from awscrt import io, mqtt
 from awsiot import mqtt_connection_builder
@@ -28,6 +37,15 @@ from .info import Info
 from .message import Message
 from .world import World
 
+# needed to publish mqtt messages without waiting on the broker
+from .mqtt_publisher import MqttPublisher
+
+# needed to decode and coalesce updates from devices before they reach the world
+from .world_update_ingest import WorldUpdateIngest
+
+
+logger = logging.getLogger(__name__)
+
 
 class InvalidMessageFormat(Exception):
     pass
@@ -55,6 +73,15 @@ class Network:
         # adds the given update to the persistent store of the world state
         raise NotImplementedError
 
+    def update_the_world_many(self, effects, context):
+        # adds all the given effects (world state names and values) to the persistent store of the world state
+        # in a single call, all under the same context
+        raise NotImplementedError
+
+    def wait_for_world_change(self, timeout, seconds_to_debounce=0.0):
+        # blocks until the world changes or the timeout passes and returns the names of the changed world states
+        raise NotImplementedError
+
     def create_topic(self, topic):
         # creates the given topic in the centralized message queue
         raise NotImplementedError
@@ -71,51 +98,91 @@ class Network:
 
 @Singleton
 class LocalNetwork(Network):
-    _the_world = []
-    __message_queue = {}
+    _the_world = WorldStore()
+    _world_change_signal = WorldChangeSignal()
+    _world_journal = None
+
+    # the topics messages can be published to, and the bus that delivers them to subscribers
+    _topics = {}
+    _event_bus = LocalEventBus()
 
-    # refer to the package schema file in the host
+    # updates are journaled and applied in the same order. topics are created and read under a lock of their own
+    _world_update_lock = threading.Lock()
+    _topics_lock = threading.Lock()
+
+    # refer to the package schema file in the host. the schema is loaded and compiled once
     __json_schema_file_path = 'schema.json'
-    __json_schema_string = pkgutil.get_data(__name__, __json_schema_file_path).decode("utf-8")
-    __json_schema = json.loads(__json_schema_string)
+    __message_validator = schema_validator(__name__, __json_schema_file_path)
 
     def the_world(self):
-        return self._the_world
+        return self._the_world.world_events()
 
     def the_world_states(self):
-        # create a dictionary entry for each existing world event
-        the_world_states = {}
-        for world_event in self._the_world:
-            the_world_states[world_event.world_state_name] = world_event.world_state_value
-        return the_world_states
+        # the world store publishes an immutable, versioned snapshot of the world states with every change.
+        # readers share the latest snapshot without copying it
+        return self._the_world.world_states()
 
     def _existing_world_event(self, world_state_name):
-        # search the world for the first event with the given world state name
-        existing_world_event = None
-        for world_event in self._the_world:
-            if world_event.world_state_name == world_state_name:
-                existing_world_event = world_event
-        return existing_world_event
+        # look up the event with the given world state name
+        return self._the_world.world_event(world_state_name)
 
     def update_the_world(self, state_name, state_value, context):
         # world events must be passed in as primitive data so that the world in-memory storage
         # will not contain pointers to data classes on external machines. external references will
         # cause timeouts, race conditions and action failures
 
-        # if there is an existing world event with the same world state name as the new world event,
-        # remove the existing world event
-        existing_world_event = self._existing_world_event(state_name)
-        if existing_world_event is not None:
-            self._the_world.remove(existing_world_event)
-
+        # the new world event replaces any existing world event with the same world state name
         new_world_event = WorldEvent(state_name, state_value, context)
-        self._the_world.append(new_world_event)
+        with self._world_update_lock:
+            self._record_in_journal([new_world_event])
+            changed_world_state_names = self._the_world.update(new_world_event)
+            self._snapshot_journal_if_due()
+        self._world_change_signal.notify(changed_world_state_names)
+
+    def update_the_world_many(self, effects, context):
+        # effects may be a dictionary or a sequence of (state name, state value) pairs. remote callers should
+        # pass a tuple of pairs so that the whole batch arrives by value in one round trip
+
+        # validate the shared context once, before any of the effects are applied
+        if not is_validate_context(context):
+            raise Exception("The context is not valid")
+
+        # build every event before touching the world so that the effects land together or not at all
+        new_world_events = [WorldEvent(state_name, state_value, context, context_is_validated=True)
+                            for state_name, state_value in dict(effects).items()]
+        with self._world_update_lock:
+            self._record_in_journal(new_world_events)
+            changed_world_state_names = self._the_world.update_many(new_world_events)
+            self._snapshot_journal_if_due()
+        self._world_change_signal.notify(changed_world_state_names)
+
+    def attach_journal(self, world_journal):
+        # rebuild the world from the given journal, then record every later update in it. the restored world
+        # states are signalled like any other change, so that the ai sees them
+        with self._world_update_lock:
+            changed_world_state_names = self._the_world.update_many(world_journal.replay())
+            self._world_journal = world_journal
+        self._world_change_signal.notify(changed_world_state_names)
+
+    def _record_in_journal(self, world_events):
+        # write ahead: updates are journaled before they are applied to the world
+        if self._world_journal is not None:
+            self._world_journal.record(world_events)
+
+    def _snapshot_journal_if_due(self):
+        if self._world_journal is not None and self._world_journal.snapshot_is_due():
+            self._world_journal.snapshot(self._the_world.world_events())
+
+    def wait_for_world_change(self, timeout, seconds_to_debounce=0.0):
+        return self._world_change_signal.wait(timeout, seconds_to_debounce)
 
     def create_topic(self, topic):
-        self.__message_queue[topic] = []
+        with self._topics_lock:
+            self._topics[topic] = True
 
     def topics(self):
-        return list(self.__message_queue.keys())
+        with self._topics_lock:
+            return list(self._topics)
 
     def publish(self, topic, message):
         # raise an error to the caller if the topic is invalid
@@ -128,45 +195,80 @@ class LocalNetwork(Network):
 
         # todo update the world with the effects of publishing this message
 
-        # call each callback function registered under the given topic
-        for callback in self.__message_queue[topic]:
-            callback(topic, message)
+        # queue the message for each subscriber whose topic filter matches the topic. subscribers are called on
+        # threads of their own
+        self._event_bus.publish(topic, message)
 
-    def subscribe(self, topic, callback_function):
-        # register the callback function under the given topic
-        self.__message_queue[topic].append(callback_function)
+    def subscribe(self, topic, callback_function, max_queued_messages=None, backpressure_policy=None):
+        # register the callback function under the given topic or mqtt-style topic filter, with '+' matching one
+        # topic level and '#' matching every level below. returns the subscription
+        return self._event_bus.subscribe(topic, callback_function, max_queued_messages, backpressure_policy)
+
+    def unsubscribe(self, subscription):
+        self._event_bus.unsubscribe(subscription)
+
+    def event_bus(self):
+        # the bus that delivers published messages, to wait for deliveries or read its metrics
+        return self._event_bus
 
     def reset(self):
-        # clears all state
-        self._the_world = []
-        self.__message_queue = {}
+        # clears all state, including any state kept in the journal. the world store is cleared rather than
+        # replaced so that world snapshot versions keep increasing
+        with self._world_update_lock:
+            self._the_world.clear()
+            if self._world_journal is not None:
+                self._world_journal.snapshot([])
+        with self._topics_lock:
+            self._topics = {}
+        self._event_bus.close()
+        self._event_bus = LocalEventBus()
 
     def __validate_topic(self, topic):
         # validate the the topic exists in the communication ai_infrastructure
-        if topic not in self.__message_queue.keys():
+        if topic not in self._topics:
             raise InvalidTopic
 
     def __validate_message(self, json_message):
         # validate the schema against the message and raise an error if invalid
-        try:
-            validate(json_message, self.__json_schema)
-        except ValidationError:
+        if not self.__message_validator.is_valid(json_message):
             raise InvalidMessageFormat
 
 
 class MqttNetwork(Network):
     """Define and Network class that can be used by devices
-    This class doesn't implement the world"""
+    This class doesn't implement the world
+
+    Messages are published from a bounded outbound queue with a cap on the QoS 1 messages awaiting acknowledgement.
+    Publishing and subscribing do not wait for the broker"""
+    __json_schema_file_path = 'schema.json'
+    __message_validator = schema_validator(__name__, __json_schema_file_path)
+
     def __init__(self):
         """Init the MQTT client"""
         self.__mqtt_client = None
+        self._publisher = None
+        self._max_queued_messages = 10000
+        self._max_in_flight_messages = 100
+        self._batch_world_effects = False
 
     def __del__(self):
         if self.__mqtt_client is not None:
-            print("Disconnecting...")
+            logger.info("Disconnecting...")
+            if self._publisher is not None:
+                self._publisher.close(timeout=5)
             disconnect_future = self.__mqtt_client.disconnect()
             disconnect_future.result()
-            print("Disconnected!")
+            logger.info("Disconnected!")
+
+    def configure_publishing(self, max_queued_messages=None, max_in_flight_messages=None, batch_world_effects=None):
+        """Set the outbound queue size, the cap on unacknowledged messages and whether world effects are batched.
+        Takes effect on the next connection"""
+        if max_queued_messages is not None:
+            self._max_queued_messages = max_queued_messages
+        if max_in_flight_messages is not None:
+            self._max_in_flight_messages = max_in_flight_messages
+        if batch_world_effects is not None:
+            self._batch_world_effects = batch_world_effects
 
     def connect(self, endpoint="a15645u9kev0b1-ats.iot.eu-west-2.amazonaws.com",
                 port=8883, cert="/home/ubuntu/certs/certificate.pem.crt",
@@ -179,7 +281,7 @@ class MqttNetwork(Network):
         host_resolver = io.DefaultHostResolver(event_loop_group)
         client_bootstrap = io.ClientBootstrap(event_loop_group, host_resolver)
 
-        self.__mqtt_client = mqtt_connection_builder.mtls_from_path(
+        mqtt_client = mqtt_connection_builder.mtls_from_path(
             endpoint=endpoint,
             port=port,
             cert_filepath=cert,
@@ -191,31 +293,55 @@ class MqttNetwork(Network):
             clean_session=True,
             keep_alive_secs=30
         )
-        connect_future = self.__mqtt_client.connect()
+        connect_future = mqtt_client.connect()
         connect_future.result()
+        self.use_connection(mqtt_client)
+
+    def use_connection(self, mqtt_client):
+        """Publish and subscribe through the given connected client, an awscrt connection or a stand-in for one"""
+        if self._publisher is not None:
+            self._publisher.close(timeout=5)
+        self.__mqtt_client = mqtt_client
+        self._publisher = MqttPublisher(mqtt_client, mqtt.QoS.AT_LEAST_ONCE,
+                                        max_queued_messages=self._max_queued_messages,
+                                        max_in_flight_messages=self._max_in_flight_messages,
+                                        validate_message=self.__message_validator.is_valid)
+
+    def publisher(self):
+        """The publisher, to wait for queued messages or read its metrics"""
+        return self._publisher
 
     def publish(self, topic, message):
         """Publish a message in a topic"""
         self.__validate_connection()
         self.__validate_message(message)
-        payload = json.dumps(message)
-        print(f'Publishing in topic {topic}: {payload}')
-        self.__mqtt_client.publish(
-            topic=topic,
-            payload=payload,
-            qos=mqtt.QoS.AT_LEAST_ONCE,
-        )
+        self._publisher.publish(topic, message)
+
+    def publish_effects(self, topic, effects, create_message):
+        """Publish effects in a topic, merged with any effects for the topic still waiting to be published. The
+        message made from these effects alone is checked here, and the publisher checks the merged message"""
+        self.__validate_connection()
+        self.__validate_message(create_message(effects))
+        self._publisher.publish_effects(topic, effects, create_message)
 
     def subscribe(self, topic, callback_function):
-        """Subcribe to a topic"""
+        """Subcribe to a topic. Returns a future that completes when the broker confirms the subscription"""
         self.__validate_connection()
         subscribe_future, _ = self.__mqtt_client.subscribe(
             topic=topic,
             qos=mqtt.QoS.AT_LEAST_ONCE,
             callback=callback_function,
         )
-        subscribe_result = subscribe_future.result()
-        print(f'Subscribed to {topic}')
+        subscribe_future.add_done_callback(lambda future: self.__on_subscribed(topic, future))
+        return subscribe_future
+
+    @staticmethod
+    def __on_subscribed(topic, subscribe_future):
+        """Log the outcome of a subscription"""
+        if subscribe_future.exception() is not None:
+            logger.error("Unable to subscribe to %s: %s", topic, subscribe_future.exception())
+        else:
+            logger.info("Subscribed to %s", topic)
 
     def create_topic(self, topic):
         """Doesn't need to create topics using
@@ -224,9 +350,7 @@ class MqttNetwork(Network):
 
     def __validate_message(self, json_message):
         """Validate a message format"""
-        try:
-            validate(json_message, self.__json_schema)
-        except ValidationError:
+        if not self.__message_validator.is_valid(json_message):
             raise InvalidMessageFormat
 
     def __validate_connection(self):
@@ -237,15 +361,15 @@ class MqttNetwork(Network):
     @classmethod
     def __on_connection_interrupted(cls, connection, error, **kwargs):
         """Execute on connection interrupted"""
-        print("Connection interrupted. error: {}".format(error))
+        logger.warning("Connection interrupted. error: %s", error)
 
     @classmethod
     def __on_connection_resumed(cls, connection, return_code, session_present, **kwargs):
         """Execute on connection resume to restore everything"""
-        print("Connection resumed. return_code: {} session_present: {}".format(return_code, session_present))
+        logger.info("Connection resumed. return_code: %s session_present: %s", return_code, session_present)
 
         if return_code == mqtt.ConnectReturnCode.ACCEPTED and not session_present:
-            print("Session did not persist. Resubscribing to existing topics...")
+            logger.info("Session did not persist. Resubscribing to existing topics...")
             resubscribe_future, _ = connection.resubscribe_existing_topics()
 
             # Cannot synchronously wait for resubscribe result because we're on the connection's event-loop thread,
@@ -256,7 +380,7 @@ class MqttNetwork(Network):
     def __on_resubscribe_complete(cls, resubscribe_future):
         """Check resuscribe is completed"""
         resubscribe_results = resubscribe_future.result()
-        print("Resubscribe results: {}".format(resubscribe_results))
+        logger.info("Resubscribe results: %s", resubscribe_results)
         for topic, qos in resubscribe_results['topics']:
             if qos is None:
                 sys.exit("Server rejected resubscribe to topic: {}".format(topic))
@@ -270,6 +394,20 @@ class AiMqttNetwork(MqttNetwork):
         self.__the_world = World()
         self.__world_topic = 'world'
 
+        # updates from devices and from the ai are applied to the world one at a time
+        self.__world_lock = threading.Lock()
+        self.__ingest = WorldUpdateIngest(self.__apply_external_world_update)
+
+    def configure_ingest(self, seconds_to_coalesce):
+        """Set how long updates from the same event source are merged before they are applied to the world.
+        Zero applies every update as it arrives"""
+        self.__ingest.close()
+        self.__ingest = WorldUpdateIngest(self.__apply_external_world_update, seconds_to_coalesce)
+
+    def ingest(self):
+        """The ingest that applies updates from devices, to wait for pending updates or read its metrics"""
+        return self.__ingest
+
     def connect(self, endpoint="a15645u9kev0b1-ats.iot.eu-west-2.amazonaws.com",
                 port=8883, cert="/home/ubuntu/certs/certificate.pem.crt",
                 key="/home/ubuntu/certs/private.pem.key", client_id=None):
@@ -282,37 +420,46 @@ class AiMqttNetwork(MqttNetwork):
         self.subscribe('#', self.process_external_world_update)
 
     def process_external_world_update(self, topic, payload, **kwargs):
-        """Update the world for every message received"""
-        decoded_payload = str(payload.decode("utf-8", "ignore"))
-        data = json.loads(decoded_payload)
-        print(f'Received from topic {topic} data: {data}')
-        try:
-            message = Message(**data)
-            self.__the_world.update(topic, message)
-        except TypeError as err:
-            print(f'Error while processing message {data}: {err}')
+        """Update the world for every message received. Messages are decoded and checked as they arrive and
+        applied in batches, with the updates from each event source in a batch merged into one"""
+        self.__ingest.submit(topic, payload)
+
+    def __apply_external_world_update(self, topic, message):
+        """Apply a checked message to the world"""
+        with self.__world_lock:
+            self.__the_world.update(topic, message, message_is_checked=True)
 
     def update_the_world(self, update):
-        """Update the world with given effects"""
+        """Update the world with given effects. When world effects are batched, effects not yet published are
+        merged into one world message"""
         message = self.__create_message(update)
-        self.publish(self.__world_topic, message._asdict())
-        self.__the_world.update(self.__world_topic, message)
+        if self._batch_world_effects:
+            self.publish_effects(self.__world_topic, update, lambda effects: self.__create_message(effects)._asdict())
+        else:
+            self.publish(self.__world_topic, message._asdict())
+        with self.__world_lock:
+            self.__the_world.update(self.__world_topic, message, message_is_checked=True)
+
+    def update_the_world_many(self, effects, context):
+        """Update the world with all given effects in a single world message"""
+        self.update_the_world(dict(effects))
 
     @classmethod
     def __create_message(cls, effects):
         """Create a formated message given only the effects"""
+        # the message is published, so every field is given a value that the message schema accepts
         message = Message(
             event_type='effects',
-            event_tags=None,
+            event_tags=[],
             event_source='highcliff_sdk',
             timestamp=time.time(),
-            device_info=None,
-            application_info=None,
-            user_info=None,
-            environment=None,
-            context=None,
+            device_info={},
+            application_info={},
+            user_info={},
+            environment='',
+            context={},
             effects=effects,
-            data=None,
+            data={},
         )
         Info.check_message(message)
         return message
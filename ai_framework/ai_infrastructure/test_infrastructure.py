@@ -3,6 +3,46 @@ import unittest
 # needed to test local ai_infrastructure
 from ai_framework.ai_infrastructure import LocalNetwork
 
+# needed to test the keyed world store
+from ai_framework.ai_infrastructure.world_event import WorldEvent
+from ai_framework.ai_infrastructure.world_store import WorldStore
+from ai_framework.ai_infrastructure.world_snapshot import WorldSnapshot
+
+# needed to test sharing the world between threads
+from ai_framework.ai_infrastructure.read_write_lock import ReadWriteLock
+from ai_framework.singleton import Singleton
+
+# needed to test local publish and subscribe
+from ai_framework.ai_infrastructure.local_event_bus import LocalEventBus, TopicTrie, BackpressurePolicy, \
+    InvalidTopicFilter
+
+# needed to test waking on world changes
+import threading
+import time
+from ai_framework.ai_infrastructure.world_change_signal import WorldChangeSignal
+
+# needed to publish a valid message
+import json
+import pkgutil
+
+# needed to test mqtt publishing against a stand-in for the broker
+from concurrent.futures import Future
+from ai_framework.ai_infrastructure import AiMqttNetwork
+from ai_framework.ai_infrastructure.network import MqttNetwork
+from ai_framework.ai_infrastructure.mqtt_publisher import MqttPublisher
+
+# needed to test ingesting world updates from devices
+from ai_framework.ai_infrastructure.world_update_ingest import WorldUpdateIngest
+
+# needed to test the indexed world
+from ai_framework.ai_infrastructure.world import World
+from ai_framework.ai_infrastructure.message import Message
+
+# needed to test the world journal
+import os
+import tempfile
+from ai_framework.ai_infrastructure.world_journal import WorldJournal
+
 
 class TestInfrastructure(unittest.TestCase):
     def test_local_infrastructure_reset(self):
@@ -64,6 +104,709 @@ class TestInfrastructure(unittest.TestCase):
         self.assertEqual(topic_list, first_local_network.topics())
         self.assertEqual(topic_list, second_local_network.topics())
 
+    def test_update_the_world_many(self):
+        local_network = LocalNetwork.instance()
+        local_network.reset()
+
+        # all effects of a batch land in the world under the same context
+        effects = (("first_effect", True), ("second_effect", False))
+        context = {"source": "test"}
+        local_network.update_the_world_many(effects, context)
+        self.assertEqual({"first_effect": True, "second_effect": False}, local_network.the_world_states())
+        for world_event in local_network.the_world():
+            self.assertEqual(context, world_event.context)
+
+        local_network.reset()
+
+
+class TestWorldStore(unittest.TestCase):
+    def test_update_replaces_and_reorders_world_events(self):
+        world_store = WorldStore()
+        world_store.update(WorldEvent("first_state", True, {}))
+        world_store.update(WorldEvent("second_state", True, {}))
+
+        # updating an existing state replaces its event and moves the state to the end of the world
+        world_store.update(WorldEvent("first_state", False, {}))
+        self.assertEqual(2, len(world_store))
+        self.assertEqual(["second_state", "first_state"],
+                         [world_event.world_state_name for world_event in world_store.world_events()])
+        self.assertEqual({"second_state": True, "first_state": False}, world_store.world_states())
+        self.assertFalse(world_store.world_event("first_state").world_state_value)
+        self.assertIsNone(world_store.world_event("unknown_state"))
+
+    def test_world_states_snapshot_is_refreshed_by_writes(self):
+        world_store = WorldStore()
+        world_store.update(WorldEvent("state", True, {}))
+
+        # reads without writes in between share the same snapshot
+        snapshot = world_store.world_states()
+        self.assertIs(snapshot, world_store.world_states())
+
+        # a write publishes a new snapshot and leaves the old one untouched
+        world_store.update(WorldEvent("state", False, {}))
+        self.assertEqual({"state": True}, snapshot)
+        self.assertEqual({"state": False}, world_store.world_states())
+
+
+    def test_snapshot_versions_change_only_with_the_world(self):
+        world_store = WorldStore()
+        world_store.update(WorldEvent("state", True, {}))
+        version = world_store.version()
+
+        # an update that leaves every value as it was does not publish a new snapshot
+        world_store.update(WorldEvent("state", True, {}))
+        self.assertEqual(version, world_store.version())
+
+        world_store.update_many([WorldEvent("state", False, {}), WorldEvent("other_state", True, {})])
+        self.assertEqual(version + 1, world_store.version())
+
+        # clearing the world publishes an empty snapshot with a later version
+        world_store.clear()
+        self.assertEqual({}, world_store.world_states())
+        self.assertEqual(version + 2, world_store.version())
+
+
+class TestWorldSnapshot(unittest.TestCase):
+    def test_updates_publish_new_snapshots(self):
+        snapshot = WorldSnapshot()
+        updated_snapshot = snapshot.updated([("first_state", True), ("second_state", False), ("first_state", False)])
+
+        self.assertEqual({}, snapshot)
+        self.assertEqual({"first_state": False, "second_state": False}, updated_snapshot)
+        self.assertEqual(snapshot.version + 1, updated_snapshot.version)
+        self.assertEqual(2, len(updated_snapshot))
+        self.assertIn("first_state", updated_snapshot)
+        self.assertIsNone(updated_snapshot.get("unknown_state"))
+        with self.assertRaises(KeyError):
+            updated_snapshot["unknown_state"]
+
+        # copies are mutable dictionaries
+        copy = updated_snapshot.copy()
+        copy["third_state"] = True
+        self.assertNotIn("third_state", updated_snapshot)
+
+    def test_large_snapshots_share_untouched_world_states(self):
+        snapshot = WorldSnapshot().updated((f"state_{n}", n) for n in range(10000))
+        self.assertEqual(10000, len(snapshot))
+        self.assertEqual(5000, snapshot["state_5000"])
+
+        updated_snapshot = snapshot.updated([("state_5000", -1)])
+        self.assertEqual(5000, snapshot["state_5000"])
+        self.assertEqual(-1, updated_snapshot["state_5000"])
+        self.assertEqual(sum(range(10000)) - 5001, sum(updated_snapshot.values()))
+
+        # only the nodes on the path to the updated world state are copied
+        shared_children = sum(old is new for old, new in zip(snapshot._root.children, updated_snapshot._root.children))
+        self.assertEqual(len(snapshot._root.children) - 1, shared_children)
+
+    def test_changes_since_an_earlier_snapshot(self):
+        earlier_snapshot = WorldSnapshot().updated((f"state_{n}", n) for n in range(5000))
+        snapshot = earlier_snapshot.updated([("state_10", -10), ("state_20", 20), ("new_state", True),
+                                             (SameHashName("first"), 1)])
+        self.assertEqual({"state_10": -10, "new_state": True, SameHashName("first"): 1},
+                         dict(snapshot.changes_since(earlier_snapshot)))
+        self.assertEqual([], snapshot.changes_since(snapshot))
+
+    def test_world_state_names_with_the_same_hash(self):
+        snapshot = WorldSnapshot().updated([(SameHashName("first"), 1), (SameHashName("second"), 2), ("third", 3)])
+        snapshot = snapshot.updated([(SameHashName("first"), -1)])
+        self.assertEqual(3, len(snapshot))
+        self.assertEqual(-1, snapshot[SameHashName("first")])
+        self.assertEqual(2, snapshot[SameHashName("second")])
+        self.assertNotIn(SameHashName("fourth"), snapshot)
+        self.assertEqual({SameHashName("first"): -1, SameHashName("second"): 2, "third": 3}, snapshot.copy())
+
+
+class SameHashName(str):
+    # a world state name whose hash is the same as every other such name
+    def __hash__(self):
+        return 42
+
+
+class TestConcurrency(unittest.TestCase):
+    def test_readers_share_the_lock_and_writers_hold_it_alone(self):
+        lock = ReadWriteLock()
+        events = []
+
+        def write():
+            with lock.writing():
+                events.append("write")
+
+        with lock.reading():
+            # a second reader does not wait for the first
+            with lock.reading():
+                events.append("read")
+
+            # a writer waits for the readers to finish
+            writer = threading.Thread(target=write)
+            writer.start()
+            writer.join(0.05)
+            self.assertTrue(writer.is_alive())
+            events.append("read done")
+        writer.join()
+        self.assertEqual(["read", "read done", "write"], events)
+
+    def test_world_states_are_never_missing_while_replaced(self):
+        world_store = WorldStore()
+        world_store.update_many([WorldEvent(f"state_{n}", 0, {}) for n in range(20)])
+        stop = threading.Event()
+
+        def write():
+            value = 0
+            while not stop.is_set():
+                value += 1
+                world_store.update(WorldEvent(f"state_{value % 20}", value, {}))
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(2000):
+                self.assertEqual(20, len(world_store.world_events()))
+                self.assertIsNotNone(world_store.world_event("state_0"))
+        finally:
+            stop.set()
+            writer.join()
+
+    def test_singletons_are_created_once(self):
+        created = []
+
+        @Singleton
+        class SlowToCreate:
+            def __init__(self):
+                created.append(self)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=SlowToCreate.instance) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(created))
+        self.assertIs(created[0], SlowToCreate.instance())
+
+
+class TestLocalEventBus(unittest.TestCase):
+    def test_topic_filters_match_like_mqtt(self):
+        topic_trie = TopicTrie()
+        for topic_filter in ("home/kitchen/temperature", "home/+/temperature", "home/#", "#", "+/kitchen/+"):
+            topic_trie.add(topic_filter, topic_filter)
+
+        self.assertEqual({"home/kitchen/temperature", "home/+/temperature", "home/#", "#", "+/kitchen/+"},
+                         set(topic_trie.match("home/kitchen/temperature")))
+        self.assertEqual({"home/+/temperature", "home/#", "#"}, set(topic_trie.match("home/hall/temperature")))
+        self.assertEqual({"home/#", "#"}, set(topic_trie.match("home")))
+        self.assertEqual({"#"}, set(topic_trie.match("garden")))
+        self.assertEqual([], topic_trie.match("$SYS/kitchen/load"))
+
+        topic_trie.remove("#", "#")
+        self.assertEqual([], topic_trie.match("garden"))
+
+        with self.assertRaises(InvalidTopicFilter):
+            topic_trie.add("home/#/temperature", "invalid")
+
+    def test_a_slow_subscriber_does_not_hold_up_publishers_or_other_subscribers(self):
+        event_bus = LocalEventBus()
+        release_slow_subscriber = threading.Event()
+        delivered = []
+        event_bus.subscribe("home/#", lambda topic, message: release_slow_subscriber.wait())
+        event_bus.subscribe("home/+/temperature", lambda topic, message: delivered.append(message))
+
+        start = time.monotonic()
+        for n in range(100):
+            event_bus.publish("home/kitchen/temperature", n)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+        release_slow_subscriber.set()
+        self.assertTrue(event_bus.flush(timeout=5))
+        self.assertEqual(list(range(100)), delivered)
+
+        metrics = event_bus.metrics()
+        self.assertEqual(100, metrics["published"])
+        self.assertEqual(200, metrics["delivered"])
+        event_bus.close()
+
+    def test_backpressure_policies(self):
+        event_bus = LocalEventBus()
+        release = threading.Event()
+        newest_kept, oldest_kept = [], []
+        blocked = event_bus.subscribe("first", lambda topic, message: release.wait())
+        event_bus.subscribe("second", lambda topic, message: newest_kept.append(message) or release.wait(),
+                            max_queued_messages=2, backpressure_policy=BackpressurePolicy.DROP_NEWEST)
+        event_bus.subscribe("second", lambda topic, message: oldest_kept.append(message) or release.wait(),
+                            max_queued_messages=2, backpressure_policy=BackpressurePolicy.DROP_OLDEST)
+
+        # wait for each subscriber to take its first message so that the rest queue behind it
+        for n in range(6):
+            event_bus.publish("second", n)
+            if n == 0:
+                while len(newest_kept) < 1 or len(oldest_kept) < 1:
+                    time.sleep(0.001)
+        release.set()
+        event_bus.flush(timeout=5)
+        self.assertEqual([0, 1, 2], newest_kept)
+        self.assertEqual([0, 4, 5], oldest_kept)
+        self.assertEqual(6, event_bus.metrics()["dropped"])
+
+        # a blocking subscription holds the publisher until it has room
+        release.clear()
+        event_bus.unsubscribe(blocked)
+        blocking_subscription = event_bus.subscribe("first", lambda topic, message: release.wait(),
+                                                    max_queued_messages=1,
+                                                    backpressure_policy=BackpressurePolicy.BLOCK)
+        event_bus.publish("first", 0)
+        event_bus.publish("first", 1)
+        publisher = threading.Thread(target=event_bus.publish, args=("first", 2))
+        publisher.start()
+        publisher.join(0.05)
+        self.assertTrue(publisher.is_alive())
+        release.set()
+        publisher.join()
+        event_bus.flush(timeout=5)
+        self.assertEqual(3, blocking_subscription.delivered)
+        event_bus.close()
+
+    def test_no_message_is_lost_by_default(self):
+        event_bus = LocalEventBus(max_queued_messages=1)
+        delivered = []
+        event_bus.subscribe("home/kitchen", lambda topic, message: time.sleep(0.001) or delivered.append(message))
+        for n in range(20):
+            event_bus.publish("home/kitchen", n)
+        self.assertTrue(event_bus.flush(timeout=5))
+        self.assertEqual(list(range(20)), delivered)
+        self.assertEqual(0, event_bus.metrics()["dropped"])
+        event_bus.close()
+
+    def test_failed_subscribers_are_logged(self):
+        event_bus = LocalEventBus()
+        event_bus.subscribe("home/kitchen", lambda topic, message: 1 / 0)
+        with self.assertLogs('ai_framework.ai_infrastructure.local_event_bus', level='ERROR'):
+            event_bus.publish("home/kitchen", {})
+            self.assertTrue(event_bus.flush(timeout=5))
+        self.assertEqual(1, event_bus.metrics()["failed"])
+        event_bus.close()
+
+    def test_only_recently_published_topics_are_cached(self):
+        event_bus = LocalEventBus(max_cached_topics=2)
+        kitchen = event_bus.subscribe("home/kitchen", lambda topic, message: None)
+        for room in ("kitchen", "bedroom", "kitchen", "garage"):
+            event_bus.publish(f"home/{room}", {})
+        self.assertEqual(["home/kitchen", "home/garage"], list(event_bus._matches_by_topic))
+
+        # publishing to ever new topics keeps the cache at its limit
+        for n in range(100):
+            event_bus.publish(f"home/room_{n}", {})
+        self.assertEqual(2, len(event_bus._matches_by_topic))
+
+        # forgotten topics are matched again
+        self.assertEqual([kitchen], event_bus.subscriptions("home/kitchen"))
+        event_bus.close()
+
+    def test_local_network_delivers_published_messages_to_wildcard_subscribers(self):
+        local_network = LocalNetwork.instance()
+        local_network.reset()
+        local_network.create_topic("home/kitchen")
+        received = []
+        local_network.subscribe("home/+", lambda topic, message: received.append(topic))
+
+        message = json.loads(pkgutil.get_data('ai_framework.ai_infrastructure.network',
+                                              'sample_message.json').decode("utf-8"))
+        local_network.publish("home/kitchen", message)
+        self.assertTrue(local_network.event_bus().flush(timeout=5))
+        self.assertEqual(["home/kitchen"], received)
+        local_network.reset()
+
+
+class StandInMqttConnection:
+    # stands in for a connection to an mqtt broker. publishes are acknowledged when the test says so
+    def __init__(self, acknowledge_at_once=False):
+        self.acknowledge_at_once = acknowledge_at_once
+        self.published = []
+        self.unacknowledged = []
+        self.lock = threading.Lock()
+
+    def publish(self, topic, payload, qos, retain=False):
+        acknowledgement = Future()
+        with self.lock:
+            self.published.append((topic, json.loads(payload)))
+            packet_id = len(self.published)
+            if not self.acknowledge_at_once:
+                self.unacknowledged.append(acknowledgement)
+        if self.acknowledge_at_once:
+            acknowledgement.set_result({"packet_id": packet_id})
+        return acknowledgement, packet_id
+
+    def acknowledge_all(self):
+        with self.lock:
+            unacknowledged, self.unacknowledged = self.unacknowledged, []
+        for acknowledgement in unacknowledged:
+            acknowledgement.set_result({})
+
+    def subscribe(self, topic, qos, callback=None):
+        subscribed = Future()
+        subscribed.set_result({"topic": topic, "qos": qos})
+        return subscribed, 1
+
+    def disconnect(self):
+        disconnected = Future()
+        disconnected.set_result({})
+        return disconnected
+
+
+class TestMqttPublishing(unittest.TestCase):
+    def test_in_flight_messages_are_capped(self):
+        connection = StandInMqttConnection()
+        publisher = MqttPublisher(connection, qos=1, max_in_flight_messages=3)
+        for n in range(10):
+            publisher.publish("devices", {"n": n})
+
+        time.sleep(0.05)
+        self.assertEqual(3, len(connection.published))
+        self.assertEqual(3, publisher.metrics()["in_flight"])
+
+        while len(connection.published) < 10:
+            connection.acknowledge_all()
+            time.sleep(0.01)
+        connection.acknowledge_all()
+        self.assertTrue(publisher.flush(timeout=5))
+        self.assertEqual([{"n": n} for n in range(10)], [message for _, message in connection.published])
+        self.assertEqual(10, publisher.metrics()["acknowledged"])
+        publisher.close()
+
+    def test_effects_waiting_to_be_published_are_merged(self):
+        connection = StandInMqttConnection()
+        publisher = MqttPublisher(connection, qos=1, max_in_flight_messages=1)
+
+        # the first message holds the only in-flight slot, so the effects after it wait and are merged
+        publisher.publish("world", {"effects": {"first": True}})
+        for n in range(5):
+            publisher.publish_effects("world", {f"state_{n}": n, "latest": n}, lambda effects: {"effects": effects})
+        while len(connection.published) < 2:
+            connection.acknowledge_all()
+            time.sleep(0.01)
+        connection.acknowledge_all()
+        self.assertTrue(publisher.flush(timeout=5))
+
+        self.assertEqual(2, len(connection.published))
+        self.assertEqual({"state_0": 0, "state_1": 1, "state_2": 2, "state_3": 3, "state_4": 4, "latest": 4},
+                         connection.published[1][1]["effects"])
+        self.assertEqual(4, publisher.metrics()["effects_merged"])
+        publisher.close()
+
+    def test_invalid_merged_messages_are_not_published(self):
+        connection = StandInMqttConnection(acknowledge_at_once=True)
+        publisher = MqttPublisher(connection, qos=1, validate_message=lambda message: "effects" in message)
+        publisher.publish_effects("world", {"light_on": True}, lambda effects: {"no_effects": effects})
+        publisher.publish_effects("devices", {"light_on": True}, lambda effects: {"effects": effects})
+        with self.assertLogs('ai_framework.ai_infrastructure.mqtt_publisher', level='ERROR'):
+            self.assertTrue(publisher.flush(timeout=5))
+        self.assertEqual([("devices", {"effects": {"light_on": True}})], connection.published)
+        self.assertEqual(1, publisher.metrics()["invalid"])
+        publisher.close()
+
+    def test_the_network_publishes_without_waiting_for_the_broker(self):
+        message = json.loads(pkgutil.get_data('ai_framework.ai_infrastructure.network',
+                                              'sample_message.json').decode("utf-8"))
+        mqtt_network = MqttNetwork()
+        connection = StandInMqttConnection()
+        mqtt_network.use_connection(connection)
+        self.assertTrue(mqtt_network.subscribe("devices/#", lambda topic, payload: None).done())
+        for _ in range(5):
+            mqtt_network.publish("devices", message)
+        self.assertEqual(5, mqtt_network.publisher().metrics()["queued"])
+
+        connection.acknowledge_at_once = True
+        while len(connection.published) < 5:
+            connection.acknowledge_all()
+            time.sleep(0.01)
+        connection.acknowledge_all()
+        self.assertTrue(mqtt_network.publisher().flush(timeout=5))
+
+    def test_world_effects_can_be_batched(self):
+        ai_mqtt_network = AiMqttNetwork.instance()
+        connection = StandInMqttConnection(acknowledge_at_once=True)
+        ai_mqtt_network.configure_publishing(batch_world_effects=True)
+        ai_mqtt_network.use_connection(connection)
+        try:
+            ai_mqtt_network.update_the_world({"light_on": True})
+            ai_mqtt_network.update_the_world({"door_open": False})
+            self.assertTrue(ai_mqtt_network.publisher().flush(timeout=5))
+
+            # the world sees every update at once, whether or not the updates were merged into one message
+            self.assertEqual({"light_on": True, "door_open": False}, ai_mqtt_network.the_world())
+            published_effects = {}
+            for topic, message in connection.published:
+                self.assertEqual("world", topic)
+                published_effects.update(message["effects"])
+            self.assertEqual({"light_on": True, "door_open": False}, published_effects)
+        finally:
+            ai_mqtt_network.configure_publishing(batch_world_effects=False)
+
+    def test_world_messages_match_the_message_schema(self):
+        ai_mqtt_network = AiMqttNetwork.instance()
+        connection = StandInMqttConnection(acknowledge_at_once=True)
+        ai_mqtt_network.use_connection(connection)
+        ai_mqtt_network.update_the_world({"window_open": True})
+        self.assertTrue(ai_mqtt_network.publisher().flush(timeout=5))
+        self.assertEqual({"window_open": True}, connection.published[-1][1]["effects"])
+        self.assertEqual(0, ai_mqtt_network.publisher().metrics()["invalid"])
+
+
+def device_payload(event_source, effects):
+    return json.dumps({"event_type": "reading", "event_tags": None, "event_source": event_source,
+                       "timestamp": 1650000000.0, "device_info": None, "application_info": None, "user_info": None,
+                       "environment": None, "context": None, "effects": effects, "data": None}).encode("utf-8")
+
+
+class TestWorldUpdateIngest(unittest.TestCase):
+    def test_updates_from_the_same_source_are_coalesced(self):
+        applied = []
+        ingest = WorldUpdateIngest(lambda topic, message: applied.append((topic, message)), seconds_to_coalesce=60)
+        for n in range(5):
+            ingest.submit("home/kitchen", device_payload("thermometer", {"temperature": n, f"reading_{n}": True}))
+        ingest.submit("home/hall", device_payload("door_sensor", {"door_open": True}))
+        self.assertEqual([], applied)
+
+        ingest.flush()
+        self.assertEqual(2, len(applied))
+        topic, message = applied[0]
+        self.assertEqual("home/kitchen", topic)
+        self.assertEqual({"temperature": 4, "reading_0": True, "reading_1": True, "reading_2": True,
+                          "reading_3": True, "reading_4": True}, message.effects)
+        self.assertEqual({"received": 6, "rejected": 0, "coalesced": 4, "applied": 2, "failed": 0, "pending": 0},
+                         ingest.metrics())
+        ingest.close()
+
+    def test_a_failed_update_does_not_hold_back_the_rest_of_the_batch(self):
+        world = World()
+        ingest = WorldUpdateIngest(lambda topic, message: world.update(topic, message, message_is_checked=True),
+                                   seconds_to_coalesce=60)
+        ingest.submit("home/kitchen", device_payload("thermometer", None))
+        ingest.submit("home/kitchen", device_payload("smoke_alarm", {"smoke": True}))
+        ingest.close()
+        self.assertTrue(world.effects["smoke"])
+        self.assertEqual(2, ingest.metrics()["applied"])
+
+        # an update that fails is logged and counted apart from the updates applied
+        ingest = WorldUpdateIngest(lambda topic, message: 1 / 0, seconds_to_coalesce=60)
+        ingest.submit("home/kitchen", device_payload("thermometer", {"temperature": 20}))
+        with self.assertLogs('ai_framework.ai_infrastructure.world_update_ingest', level='ERROR'):
+            ingest.close()
+        self.assertEqual(0, ingest.metrics()["applied"])
+        self.assertEqual(1, ingest.metrics()["failed"])
+
+    def test_closing_stops_the_applying_thread(self):
+        ingest = WorldUpdateIngest(lambda topic, message: None, seconds_to_coalesce=60)
+        ingest.close()
+        self.assertFalse(ingest._thread.is_alive())
+
+    def test_invalid_payloads_are_rejected(self):
+        applied = []
+        ingest = WorldUpdateIngest(lambda topic, message: applied.append((topic, message)), seconds_to_coalesce=0)
+        self.assertFalse(ingest.submit("home", b"not json"))
+        self.assertFalse(ingest.submit("home", b'{"event_type": "reading"}'))
+        self.assertFalse(ingest.submit("home", device_payload(None, {})))
+        self.assertTrue(ingest.submit("home", device_payload("thermometer", {"temperature": 20})))
+        self.assertEqual(1, len(applied))
+        self.assertEqual(3, ingest.metrics()["rejected"])
+
+    def test_the_network_applies_device_updates_to_the_world(self):
+        ai_mqtt_network = AiMqttNetwork.instance()
+        ai_mqtt_network.process_external_world_update("home/garden", device_payload("rain_sensor", {"raining": True}))
+        ai_mqtt_network.ingest().flush()
+        self.assertTrue(ai_mqtt_network.the_world()["raining"])
+
+        # configuring the ingest replaces it and stops the one it replaced
+        replaced_ingest = ai_mqtt_network.ingest()
+        ai_mqtt_network.configure_ingest(0.05)
+        self.assertFalse(replaced_ingest._thread.is_alive())
+
+
+def device_message(event_source, location, event_type, effects):
+    return Message(event_type=event_type, event_tags={"location": location}, event_source=event_source,
+                   timestamp=1650000000.0, device_info=None, application_info=None, user_info=None,
+                   environment=None, context=None, effects=effects, data=None)
+
+
+class TestWorld(unittest.TestCase):
+    def test_devices_are_indexed_by_their_latest_message(self):
+        world = World()
+        world.update("home/kitchen", device_message("thermometer", "kitchen", "reading", {"temperature": 20}))
+        world.update("home/kitchen", device_message("smoke_alarm", "kitchen", "alarm", {"smoke": False}))
+        world.update("home/hall", device_message("door_sensor", "hall", "reading", {"door_open": True}))
+
+        self.assertEqual({"thermometer", "smoke_alarm"}, world.devices_in_location("kitchen"))
+        self.assertEqual({"thermometer", "door_sensor"}, world.devices_with_event_type("reading"))
+        self.assertEqual({"door_sensor"}, world.devices_with_effect("door_open"))
+        self.assertEqual({"smoke_alarm", "thermometer"}, set(world.info_in_location("kitchen")))
+
+        # a device that moves leaves its old location and effects behind
+        world.update("home/hall", device_message("thermometer", "hall", "reading", {"hall_temperature": 18}))
+        self.assertEqual({"smoke_alarm"}, world.devices_in_location("kitchen"))
+        self.assertEqual({"thermometer", "door_sensor"}, world.devices_in_location("hall"))
+        self.assertEqual(frozenset(), world.devices_with_effect("temperature"))
+        self.assertEqual(frozenset(), world.devices_in_location("garden"))
+
+        # the world's effects still hold every effect ever reported
+        self.assertEqual({"temperature": 20, "smoke": False, "door_open": True, "hall_temperature": 18},
+                         world.effects)
+
+    def test_all_info_is_a_read_only_view_of_the_latest_world(self):
+        world = World()
+        world.update("home/kitchen", device_message("thermometer", "kitchen", "reading", {"temperature": 20}))
+        all_info = world.get_all_info()
+        self.assertEqual("home/kitchen", all_info["thermometer"]["topic"])
+        self.assertEqual("kitchen", all_info["thermometer"]["location"])
+        self.assertIs(all_info, world.get_all_info())
+        with self.assertRaises(TypeError):
+            all_info["thermometer"] = {}
+
+        # updates leave the view already handed out alone, and the next read sees them
+        world.update("home/hall", device_message("thermometer", "hall", "reading", {"temperature": 18}))
+        world.update("home/hall", device_message("door_sensor", "hall", "reading", {"door_open": True}))
+        self.assertEqual({"temperature": 20}, all_info["thermometer"]["effects"])
+        self.assertEqual(["thermometer"], list(all_info))
+        self.assertEqual({"temperature": 18}, world.get_all_info()["thermometer"]["effects"])
+        self.assertEqual(2, len(world.get_all_info()))
+
+    def test_a_failed_update_leaves_the_world_unchanged(self):
+        world = World()
+        world.update("home/kitchen", device_message("thermometer", "kitchen", "reading", {"temperature": 20}))
+        all_info = world.get_all_info()
+
+        # event tags can be a list, and the location of a message whose tags list 'location' cannot be read
+        message = device_message("thermometer", "hall", "alarm", {"smoke": True})._replace(event_tags=["location"])
+        with self.assertRaises(TypeError):
+            world.update("home/hall", message)
+
+        self.assertEqual({"thermometer"}, world.devices_in_location("kitchen"))
+        self.assertEqual({"thermometer"}, world.devices_with_event_type("reading"))
+        self.assertEqual(frozenset(), world.devices_with_event_type("alarm"))
+        self.assertEqual({"thermometer"}, world.devices_with_effect("temperature"))
+        self.assertEqual("home/kitchen", world.info("thermometer").topic)
+        self.assertIs(all_info, world.get_all_info())
+        self.assertEqual({"temperature": 20}, world.effects)
+
+    def test_all_info_can_be_read_while_devices_update_the_world(self):
+        world = World()
+        updating = True
+        errors = []
+
+        def update_the_world():
+            device = 0
+            while updating:
+                world.update("home/hall", device_message(f"device_{device}", "hall", "reading", {"online": True}))
+                device += 1
+
+        updating_thread = threading.Thread(target=update_the_world)
+        updating_thread.start()
+        try:
+            deadline = time.monotonic() + 0.5
+            while time.monotonic() < deadline:
+                try:
+                    for _ in world.get_all_info().items():
+                        pass
+                except RuntimeError as error:
+                    errors.append(error)
+        finally:
+            updating = False
+            updating_thread.join()
+        self.assertEqual([], errors)
+
+
+class TestWorldChangeSignal(unittest.TestCase):
+    def test_wait_times_out_without_changes(self):
+        world_change_signal = WorldChangeSignal()
+        self.assertEqual(set(), world_change_signal.wait(timeout=0.01))
+
+    def test_burst_of_changes_is_merged_into_one_wake_up(self):
+        world_change_signal = WorldChangeSignal()
+
+        def burst_of_updates():
+            for n in range(3):
+                world_change_signal.notify([f"state_{n}"])
+                time.sleep(0.01)
+
+        threading.Thread(target=burst_of_updates).start()
+
+        # the waiter wakes long before the heartbeat and sees the whole burst
+        start = time.monotonic()
+        changed_world_state_names = world_change_signal.wait(timeout=10, seconds_to_debounce=0.2)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual({"state_0", "state_1", "state_2"}, changed_world_state_names)
+
+    def test_only_changed_world_states_signal(self):
+        world_store = WorldStore()
+        self.assertEqual(["state"], world_store.update(WorldEvent("state", True, {})))
+        self.assertEqual([], world_store.update(WorldEvent("state", True, {})))
+        self.assertEqual(["state"], world_store.update(WorldEvent("state", False, {})))
+
+
+class TestWorldJournal(unittest.TestCase):
+    def test_replay_restores_the_latest_world(self):
+        with tempfile.TemporaryDirectory() as journal_folder:
+            world_journal = WorldJournal(journal_folder)
+            world_journal.record([WorldEvent("first_state", False, {}), WorldEvent("second_state", True, {})])
+            world_journal.record([WorldEvent("first_state", True, {"source": "sensor"})])
+            world_journal.close()
+
+            # a restarted journal replays to the latest value of every world state, in the order last updated
+            world_events = WorldJournal(journal_folder).replay()
+            self.assertEqual([("second_state", True, {}), ("first_state", True, {"source": "sensor"})],
+                             [(world_event.world_state_name, world_event.world_state_value, world_event.context)
+                              for world_event in world_events])
+
+    def test_snapshot_and_journal_tail(self):
+        with tempfile.TemporaryDirectory() as journal_folder:
+            world_journal = WorldJournal(journal_folder, updates_between_snapshots=2)
+            world_journal.record([WorldEvent("first_state", False, {}), WorldEvent("second_state", False, {})])
+            self.assertTrue(world_journal.snapshot_is_due())
+            world_journal.snapshot([WorldEvent("first_state", False, {}), WorldEvent("second_state", False, {})])
+            self.assertFalse(world_journal.snapshot_is_due())
+
+            # updates after the snapshot are replayed on top of it, and a partly written last line is skipped
+            world_journal.record([WorldEvent("second_state", True, {})])
+            world_journal.close()
+            with open(os.path.join(journal_folder, 'world_journal.jsonl'), 'a') as journal_file:
+                journal_file.write('["first_state",tr')
+
+            world_store = WorldStore()
+            world_store.update_many(WorldJournal(journal_folder).replay())
+            self.assertEqual({"first_state": False, "second_state": True}, world_store.world_states())
+
+    def test_local_network_journals_updates(self):
+        with tempfile.TemporaryDirectory() as journal_folder:
+            local_network = LocalNetwork.instance()
+            local_network.reset()
+            local_network.attach_journal(WorldJournal(journal_folder))
+            local_network.update_the_world("journaled_state", True, {})
+            local_network.update_the_world_many((("first_effect", True), ("second_effect", False)), {})
+
+            # a new journal over the same folder restores the world
+            world_store = WorldStore()
+            world_store.update_many(WorldJournal(journal_folder).replay())
+            self.assertEqual(local_network.the_world_states(), world_store.world_states())
+
+            local_network._world_journal.close()
+            local_network._world_journal = None
+            local_network.reset()
+
+    def test_restored_world_states_are_signalled(self):
+        with tempfile.TemporaryDirectory() as journal_folder:
+            world_journal = WorldJournal(journal_folder)
+            world_journal.record([WorldEvent("restored_state", True, {})])
+            world_journal.close()
+
+            local_network = LocalNetwork.instance()
+            local_network.reset()
+            local_network.wait_for_world_change(0)
+            local_network.attach_journal(WorldJournal(journal_folder))
+            try:
+                self.assertIn("restored_state", local_network.wait_for_world_change(0))
+            finally:
+                local_network._world_journal.close()
+                local_network._world_journal = None
+                local_network.reset()
+
 
 if __name__ == '__main__':
     unittest.main()
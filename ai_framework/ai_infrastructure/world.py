@@ -1,30 +1,119 @@
 '''Manage world status'''
 
+import logging
+import threading
+
 from .info import Info
+from .world_snapshot import WorldSnapshot
+
+logger = logging.getLogger(__name__)
+
 
 class World():
+    '''The latest information from every device, indexed by location, event type and effect name.
+
+    The indexes and the summary of each device are kept up to date on every update, so queries never scan the world
+    and reads never rebuild the summaries. Everything an update needs is worked out before the world is changed, so
+    an update either changes the world completely or not at all. Updates, queries and reads all take the same lock'''
     def __init__(self):
+        self.__lock = threading.Lock()
         self.__information = {}
         self.__effects = {}
 
+        # the summary of each device, kept in an immutable snapshot. an update replaces the snapshot with one that
+        # shares everything but the updated summary, so reads can hand it out without copying it
+        self.__all_info = WorldSnapshot()
+
+        # devices by location, by event type and by the names of the effects in their latest message, and the index
+        # keys of each device
+        self.__index_keys_by_device = {}
+        self.__devices_by_location = {}
+        self.__devices_by_event_type = {}
+        self.__devices_by_effect = {}
+
     def __str__(self):
-        return str(self.get_all_info())
+        return str(dict(self.get_all_info()))
 
-    def update(self, topic, message):
+    def update(self, topic, message, message_is_checked=False):
         try:
-            info = Info(topic, message)
-            self.__information[info.device] = info
-            self.__effects.update(info.effects)
+            info = Info(topic, message, message_is_checked)
+            device = info.device
+            effects = info.effects or {}
+            index_keys = self.__index_keys(info)
+            summary = info.get_summary()[device]
+            with self.__lock:
+                self.__effects.update(effects)
+                self.__unindex(device)
+                self.__information[device] = info
+                self.__index(device, index_keys)
+                self.__all_info = self.__all_info.updated([(device, summary)])
         except TypeError as err:
-            print(f'Unable to proccess message from topic {topic}: {message}')
+            logger.warning('Unable to proccess message from topic %s: %s', topic, message)
             raise
 
     def get_all_info(self):
-        world = {}
-        for _, info in self.__information.items():
-            world.update(info.get_summary())
-        return world
+        '''A read-only mapping of the summary of every device, by device, as of the latest update. Readers can
+        iterate over it while the world changes'''
+        with self.__lock:
+            return self.__all_info
+
+    def info(self, device):
+        '''The latest information from the given device, or None'''
+        return self.__information.get(device)
+
+    def devices_in_location(self, location):
+        '''The devices whose latest message came from the given location'''
+        return self.__devices(self.__devices_by_location, location)
+
+    def devices_with_event_type(self, event_type):
+        '''The devices whose latest message had the given event type'''
+        return self.__devices(self.__devices_by_event_type, event_type)
+
+    def devices_with_effect(self, effect_name):
+        '''The devices whose latest message had an effect with the given name'''
+        return self.__devices(self.__devices_by_effect, effect_name)
+
+    def info_in_location(self, location):
+        '''The summaries of the devices in the given location, by device'''
+        with self.__lock:
+            return {device: self.__all_info[device]
+                    for device in self.__devices_by_location.get(_index_key(location), ())}
 
     @property
     def effects(self):
         return self.__effects
+
+    def __devices(self, index, key):
+        with self.__lock:
+            return frozenset(index.get(_index_key(key), ()))
+
+    def __index(self, device, index_keys):
+        for index, key in index_keys:
+            index.setdefault(key, set()).add(device)
+        self.__index_keys_by_device[device] = index_keys
+
+    def __unindex(self, device):
+        for index, key in self.__index_keys_by_device.pop(device, ()):
+            devices = index.get(key)
+            if devices is not None:
+                devices.discard(device)
+                if not devices:
+                    del index[key]
+
+    def __index_keys(self, info):
+        index_keys = []
+        if info.location is not None:
+            index_keys.append((self.__devices_by_location, _index_key(info.location)))
+        index_keys.append((self.__devices_by_event_type, _index_key(info.message.event_type)))
+        for effect_name in info.effects or ():
+            index_keys.append((self.__devices_by_effect, effect_name))
+        return index_keys
+
+
+def _index_key(value):
+    '''Locations and event types that cannot be dictionary keys are indexed by their string form'''
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return str(value)
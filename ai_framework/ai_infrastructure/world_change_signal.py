@@ -0,0 +1,47 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to wake waiting threads when the world changes
+import threading
+
+# needed to wait out the debounce window
+import time
+
+
+class WorldChangeSignal:
+    """
+    Lets a thread sleep until the world changes.
+
+    Writers notify the signal with the names of the world states they changed. A waiter wakes on the first
+    change, then waits out a short debounce window so that a burst of updates is collected into one wake-up.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._changed_world_state_names = set()
+
+    def notify(self, world_state_names):
+        # record the changed world states and wake every waiter
+        if not world_state_names:
+            return
+        with self._condition:
+            self._changed_world_state_names.update(world_state_names)
+            self._condition.notify_all()
+
+    def wait(self, timeout, seconds_to_debounce=0.0):
+        # blocks until the world changes or the timeout passes. returns the names of the world states that changed
+        # since the last wait, or an empty set if the timeout passed without a change
+        with self._condition:
+            changed = self._condition.wait_for(lambda: self._changed_world_state_names, timeout)
+            if not changed:
+                return set()
+
+        # let the rest of a burst of updates arrive before waking the caller
+        if seconds_to_debounce > 0:
+            time.sleep(seconds_to_debounce)
+
+        with self._condition:
+            changed_world_state_names = self._changed_world_state_names
+            self._changed_world_state_names = set()
+        return changed_world_state_names
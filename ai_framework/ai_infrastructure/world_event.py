@@ -2,7 +2,7 @@ __author__ = "Jerry Overton"
 __copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
 __version__ = "0.0.1"
 
-from dataclasses import dataclass
+from dataclasses import dataclass, InitVar
 
 # needed to define a default timestamp value for world events
 import datetime
@@ -19,7 +19,10 @@ class WorldEvent:
     context: dict
     time_stamp: str = datetime.datetime.now()
 
-    def __post_init__(self):
+    # events created in bulk share a context that has already been validated once by the caller
+    context_is_validated: InitVar[bool] = False
+
+    def __post_init__(self, context_is_validated):
         # validate the context
-        if not is_validate_context(self.context):
+        if not context_is_validated and not is_validate_context(self.context):
             raise Exception("The context is not valid")
@@ -0,0 +1,167 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to write and read the journal
+import json
+from json.decoder import scanstring
+import os
+
+# needed to restore world event time stamps
+import datetime
+
+# needed to rebuild the world from the journal
+from .world_event import WorldEvent
+
+
+class WorldJournal:
+    """
+    An append-only journal of world updates with periodic snapshots, so that the world survives a restart.
+
+    Every world event is appended to the journal as one line of json. After a given number of updates, the whole
+    world is written to a snapshot and the journal starts over. On startup, the world is rebuilt by replaying the
+    snapshot followed by the journal.
+
+    Lines are [world_state_name, world_state_value, context, time_stamp] arrays. Replay reads each file in one
+    piece and fully parses only the newest line for each world state.
+    """
+
+    _journal_file_name = 'world_journal.jsonl'
+    _snapshot_file_name = 'world_snapshot.jsonl'
+
+    def __init__(self, journal_folder, updates_between_snapshots=100000):
+        self._journal_folder = journal_folder
+        self._updates_between_snapshots = updates_between_snapshots
+        self._updates_since_snapshot = 0
+
+        os.makedirs(journal_folder, exist_ok=True)
+        self._journal_file_path = os.path.join(journal_folder, self._journal_file_name)
+        self._snapshot_file_path = os.path.join(journal_folder, self._snapshot_file_name)
+        self._journal_file = None
+
+    def record(self, world_events):
+        # append the given world events to the journal
+        if self._journal_file is None:
+            self._journal_file = open(self._journal_file_path, 'a', encoding='utf-8')
+
+            # end any partly written line left by a crash so that it does not run into the next line
+            if not _ends_with_new_line(self._journal_file_path):
+                self._journal_file.write("\n")
+
+        self._journal_file.write("".join(_journal_line(world_event) for world_event in world_events))
+        self._journal_file.flush()
+        self._updates_since_snapshot += len(world_events)
+
+    def snapshot_is_due(self):
+        return self._updates_since_snapshot >= self._updates_between_snapshots
+
+    def snapshot(self, world_events):
+        # write the whole world to a new snapshot, then start the journal over.
+        # the snapshot replaces the old one in a single step, so a crash leaves either the old or the new snapshot.
+        # a crash before the journal starts over only means the journal is replayed on top of a newer snapshot,
+        # which gives the same world
+        temporary_snapshot_file_path = self._snapshot_file_path + '.tmp'
+        with open(temporary_snapshot_file_path, 'w', encoding='utf-8') as snapshot_file:
+            snapshot_file.write("".join(_journal_line(world_event) for world_event in world_events))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_snapshot_file_path, self._snapshot_file_path)
+
+        if self._journal_file is not None:
+            self._journal_file.close()
+        self._journal_file = open(self._journal_file_path, 'w', encoding='utf-8')
+        self._updates_since_snapshot = 0
+
+    def replay(self):
+        # returns the world events recorded in the snapshot and journal, one per world state, in the order in which
+        # each world state was last updated
+
+        # walk the journal and then the snapshot from newest to oldest line, keeping only the newest line for each
+        # world state. only the world state name is read from each line. the rest of a line is parsed only if it is
+        # the newest line for its world state
+        newest_journal_lines = {}
+        journal_lines = _read_lines(self._journal_file_path)
+        _keep_newest_lines(journal_lines, newest_journal_lines)
+        _keep_newest_lines(_read_lines(self._snapshot_file_path), newest_journal_lines)
+
+        # the journal replayed so far counts towards the next snapshot
+        self._updates_since_snapshot = len(journal_lines)
+
+        # these contexts were validated when they were first written
+        world_events = []
+        for journal_line in reversed(list(newest_journal_lines.values())):
+            try:
+                world_state_name, world_state_value, context, time_stamp = json.loads(journal_line)
+            except ValueError:
+                continue
+            world_events.append(WorldEvent(world_state_name, world_state_value, context, _time_stamp(time_stamp),
+                                           context_is_validated=True))
+        return world_events
+
+    def close(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+
+
+def _json_default(value):
+    # contexts arriving from remote actions may be proxies of dictionaries and lists rather than the real thing
+    if hasattr(value, 'items'):
+        return dict(value.items())
+    if hasattr(value, '__iter__') and not isinstance(value, (str, bytes)):
+        return list(value)
+    return str(value)
+
+
+def _journal_line(world_event):
+    time_stamp = world_event.time_stamp
+    if isinstance(time_stamp, datetime.datetime):
+        time_stamp = time_stamp.isoformat()
+    return json.dumps([world_event.world_state_name, world_event.world_state_value, world_event.context, time_stamp],
+                      default=_json_default, separators=(',', ':')) + "\n"
+
+
+def _ends_with_new_line(file_path):
+    # true for an empty file or a file whose last character is a new line
+    with open(file_path, 'rb') as journal_file:
+        journal_file.seek(0, os.SEEK_END)
+        if journal_file.tell() == 0:
+            return True
+        journal_file.seek(-1, os.SEEK_END)
+        return journal_file.read(1) == b"\n"
+
+
+def _read_lines(file_path):
+    # read the whole file at once
+    try:
+        with open(file_path, encoding='utf-8') as journal_file:
+            journal_text = journal_file.read()
+    except FileNotFoundError:
+        return []
+
+    # every complete line ends with a new line. a crash can leave a partly written last line, which is dropped
+    journal_lines = journal_text.splitlines()
+    if journal_lines and not journal_text.endswith("\n"):
+        journal_lines.pop()
+    return journal_lines
+
+
+def _keep_newest_lines(journal_lines, newest_journal_lines):
+    # add the newest line for each world state not already in newest_journal_lines, newest first.
+    # every line starts with '["' followed by the world state name, which can be read without parsing the line
+    for journal_line in reversed(journal_lines):
+        if not journal_line.startswith('["'):
+            continue
+        try:
+            world_state_name, _ = scanstring(journal_line, 2)
+        except ValueError:
+            continue
+        if world_state_name not in newest_journal_lines:
+            newest_journal_lines[world_state_name] = journal_line
+
+
+def _time_stamp(time_stamp):
+    try:
+        return datetime.datetime.fromisoformat(time_stamp)
+    except (TypeError, ValueError):
+        return time_stamp
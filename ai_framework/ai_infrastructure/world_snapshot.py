@@ -0,0 +1,248 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to make world snapshots read like dictionaries
+from collections.abc import Mapping
+
+
+# each level of the trie takes this many bits of a world state name's hash, and so has up to 32 children
+_BITS_PER_LEVEL = 5
+_LEVEL_MASK = (1 << _BITS_PER_LEVEL) - 1
+_HASH_MASK = (1 << 64) - 1
+
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+# int.bit_count is much faster where it is available
+_popcount = getattr(int, 'bit_count', _popcount)
+
+
+class _Node:
+    # a trie node. the bitmap has a bit set for each of the 32 positions at this level that is taken, and children
+    # holds what is at each taken position, in order: a leaf (world state name, world state value, hash), a node or
+    # a collision
+    __slots__ = ('bitmap', 'children')
+
+    def __init__(self, bitmap, children):
+        self.bitmap = bitmap
+        self.children = children
+
+
+class _Collision:
+    # the leaves of world state names whose hashes are the same in every bit
+    __slots__ = ('hash', 'leaves')
+
+    def __init__(self, hash_, leaves):
+        self.hash = hash_
+        self.leaves = leaves
+
+
+_EMPTY_NODE = _Node(0, ())
+
+
+class WorldSnapshot(Mapping):
+    """
+    An immutable, versioned view of the world state values.
+
+    A snapshot reads like a dictionary of world state values that never changes. Readers can hold on to a snapshot
+    for as long as they like without copying it and without seeing a half-written update.
+
+    Writers publish a new snapshot with updated(). World states are kept in a hash array mapped trie, so a new
+    snapshot copies only the nodes on the path to each updated world state, a handful of small tuples however large
+    the world grows, and shares every other node with the snapshot it came from. Every new snapshot gets the next
+    version number.
+
+    A snapshot iterates over its world states in trie order, so the order of iteration is not the order in which
+    the world states were updated.
+    """
+
+    __slots__ = ('_root', '_length', '_version')
+
+    def __init__(self, version=0, _root=_EMPTY_NODE, _length=0):
+        self._root = _root
+        self._length = _length
+        self._version = version
+
+    @property
+    def version(self):
+        return self._version
+
+    def __getitem__(self, world_state_name):
+        leaf = _find(self._root, 0, hash(world_state_name) & _HASH_MASK, world_state_name)
+        if leaf is None:
+            raise KeyError(world_state_name)
+        return leaf[1]
+
+    def __contains__(self, world_state_name):
+        return _find(self._root, 0, hash(world_state_name) & _HASH_MASK, world_state_name) is not None
+
+    def get(self, world_state_name, default=None):
+        leaf = _find(self._root, 0, hash(world_state_name) & _HASH_MASK, world_state_name)
+        return default if leaf is None else leaf[1]
+
+    def __iter__(self):
+        return (leaf[0] for leaf in _leaves(self._root))
+
+    def items(self):
+        return [(leaf[0], leaf[1]) for leaf in _leaves(self._root)]
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return f"WorldSnapshot(version={self._version}, {dict(self)})"
+
+    def copy(self):
+        # a mutable dictionary of the world state values, for readers that need to change their copy
+        return dict(self.items())
+
+    def updated(self, world_states, version=None):
+        # returns a new snapshot with the given (world state name, world state value) pairs applied, in order.
+        # the new snapshot gets the next version number unless a version is given
+        root = self._root
+        length = self._length
+        for world_state_name, world_state_value in world_states:
+            root, added = _assoc(root, 0, (world_state_name, world_state_value, hash(world_state_name) & _HASH_MASK))
+            length += added
+        return WorldSnapshot(self._version + 1 if version is None else version, root, length)
+
+    def unversioned(self):
+        # returns a snapshot of the same world states without a version, for views of the world that the world
+        # itself never published
+        return WorldSnapshot(None, self._root, self._length)
+
+    def cleared(self):
+        # returns a new, empty snapshot
+        return WorldSnapshot(self._version + 1)
+
+    def changes_since(self, earlier_snapshot):
+        # the (world state name, world state value) pairs in this snapshot that are new or different from the
+        # earlier snapshot. nodes the two snapshots share are skipped, so the cost follows the number of changes
+        # rather than the size of the world
+        return list(_changes(self._root, earlier_snapshot._root, 0))
+
+
+def _find(node, shift, hash_, world_state_name):
+    # the leaf of the world state with the given name and hash in the trie below the node, or None
+    while True:
+        bit = 1 << ((hash_ >> shift) & _LEVEL_MASK)
+        if not node.bitmap & bit:
+            return None
+        child = node.children[_popcount(node.bitmap & (bit - 1))]
+        child_type = type(child)
+        if child_type is _Node:
+            node = child
+            shift += _BITS_PER_LEVEL
+        elif child_type is _Collision:
+            for leaf in child.leaves:
+                if leaf[0] == world_state_name:
+                    return leaf
+            return None
+        elif child[0] is world_state_name or child[0] == world_state_name:
+            return child
+        else:
+            return None
+
+
+def _assoc(node, shift, leaf):
+    # returns a copy of the node with the leaf added or replacing the leaf of the same world state, sharing every
+    # untouched child, and whether the world state is new
+    hash_ = leaf[2]
+    bit = 1 << ((hash_ >> shift) & _LEVEL_MASK)
+    position = _popcount(node.bitmap & (bit - 1))
+    children = node.children
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, children[:position] + (leaf,) + children[position:]), True
+
+    child = children[position]
+    child_type = type(child)
+    if child_type is _Node:
+        new_child, added = _assoc(child, shift + _BITS_PER_LEVEL, leaf)
+    elif child_type is _Collision:
+        if child.hash == hash_:
+            other_leaves = tuple(other_leaf for other_leaf in child.leaves if other_leaf[0] != leaf[0])
+            new_child = _Collision(hash_, other_leaves + (leaf,))
+            added = len(other_leaves) == len(child.leaves)
+        else:
+            new_child, added = _split(shift + _BITS_PER_LEVEL, child, child.hash, leaf, hash_), True
+    elif child[0] is leaf[0] or child[0] == leaf[0]:
+        new_child, added = leaf, False
+    else:
+        new_child, added = _split(shift + _BITS_PER_LEVEL, child, child[2], leaf, hash_), True
+    return _Node(node.bitmap, children[:position] + (new_child,) + children[position + 1:]), added
+
+
+def _split(shift, entry, entry_hash, leaf, leaf_hash):
+    # a node holding an existing entry, a leaf or a collision, and a new leaf that landed in the same position
+    if entry_hash == leaf_hash:
+        return _Collision(leaf_hash, (entry, leaf))
+    entry_index = (entry_hash >> shift) & _LEVEL_MASK
+    leaf_index = (leaf_hash >> shift) & _LEVEL_MASK
+    if entry_index == leaf_index:
+        return _Node(1 << entry_index, (_split(shift + _BITS_PER_LEVEL, entry, entry_hash, leaf, leaf_hash),))
+    children = (entry, leaf) if entry_index < leaf_index else (leaf, entry)
+    return _Node((1 << entry_index) | (1 << leaf_index), children)
+
+
+def _changes(entry, earlier_entry, shift):
+    # the leaves below an entry of this snapshot that are new or different below the entry in the same position of
+    # an earlier snapshot
+    if entry is earlier_entry:
+        return
+    if type(entry) is _Node and type(earlier_entry) is _Node:
+        bitmap = entry.bitmap
+        position = 0
+        while bitmap:
+            bit = bitmap & -bitmap
+            bitmap ^= bit
+            child = entry.children[position]
+            position += 1
+            if earlier_entry.bitmap & bit:
+                earlier_child = earlier_entry.children[_popcount(earlier_entry.bitmap & (bit - 1))]
+                yield from _changes(child, earlier_child, shift + _BITS_PER_LEVEL)
+            else:
+                for leaf in _entry_leaves(child):
+                    yield leaf[0], leaf[1]
+        return
+
+    for leaf in _entry_leaves(entry):
+        earlier_leaf = _find_in_entry(earlier_entry, shift, leaf[2], leaf[0])
+        if earlier_leaf is None or (earlier_leaf[1] is not leaf[1] and earlier_leaf[1] != leaf[1]):
+            yield leaf[0], leaf[1]
+
+
+def _entry_leaves(entry):
+    entry_type = type(entry)
+    if entry_type is _Node:
+        return _leaves(entry)
+    if entry_type is _Collision:
+        return entry.leaves
+    return (entry,)
+
+
+def _find_in_entry(entry, shift, hash_, world_state_name):
+    # the leaf of the world state in a node, a collision or a leaf at the given level, or None
+    entry_type = type(entry)
+    if entry_type is _Node:
+        return _find(entry, shift, hash_, world_state_name)
+    for leaf in _entry_leaves(entry):
+        if leaf[0] == world_state_name:
+            return leaf
+    return None
+
+
+def _leaves(node):
+    # every leaf in the trie below the node
+    stack = [node]
+    while stack:
+        for child in stack.pop().children:
+            child_type = type(child)
+            if child_type is _Node:
+                stack.append(child)
+            elif child_type is _Collision:
+                yield from child.leaves
+            else:
+                yield child
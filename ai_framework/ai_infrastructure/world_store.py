@@ -0,0 +1,98 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to share the world state values with readers without copying them
+from .world_snapshot import WorldSnapshot
+
+# needed to let many threads read the world while one updates it
+from .read_write_lock import ReadWriteLock
+
+# marks a world state that was not in the world before an update
+_NO_VALUE = object()
+
+
+class WorldStore:
+    """
+    A keyed store of world events.
+
+    World events are indexed by world state name so that finding, replacing and reading a world state
+    does not require a scan of the whole world. The world events keep insertion order, and an updated world
+    state moves to the end of the order, just as it did when the world was kept as a list.
+
+    The world state values are published as immutable, versioned snapshots. Every write that changes a world
+    state value publishes a new snapshot, and readers get the latest snapshot without copying it. Snapshots are
+    spread over hash buckets, so unlike the world events, they iterate over the world states in no particular
+    order. Readers that need the order of the updates use world_events().
+
+    The store can be shared between threads. Snapshot reads take no lock. Reads of world events share a read lock,
+    so they run alongside each other and never see a world state part way through being replaced.
+    """
+
+    def __init__(self):
+        self._lock = ReadWriteLock()
+
+        # world events keyed by world state name
+        self._world_events = {}
+
+        # the snapshot handed out to readers
+        self._world_states_snapshot = WorldSnapshot()
+
+    def __len__(self):
+        return len(self._world_states_snapshot)
+
+    def __iter__(self):
+        return iter(self.world_events())
+
+    def __contains__(self, world_state_name):
+        with self._lock.reading():
+            return world_state_name in self._world_events
+
+    def update(self, world_event):
+        # replace any existing event for the same world state and move the state to the end of the order.
+        # returns the names of the world states whose values changed
+        return self.update_many((world_event,))
+
+    def update_many(self, world_events):
+        # apply a batch of world events in order. each event replaces any existing event for the same world
+        # state and moves the state to the end of the order. returns the names of the world states that are new
+        # or whose values changed
+        with self._lock.writing():
+            changed_world_states = []
+            for world_event in world_events:
+                world_state_name = world_event.world_state_name
+                previous_world_event = self._world_events.pop(world_state_name, None)
+                self._world_events[world_state_name] = world_event
+                previous_world_state_value = _NO_VALUE if previous_world_event is None \
+                    else previous_world_event.world_state_value
+                if previous_world_state_value != world_event.world_state_value:
+                    changed_world_states.append((world_state_name, world_event.world_state_value))
+
+            # publish the changes to readers in one new snapshot
+            if changed_world_states:
+                self._world_states_snapshot = self._world_states_snapshot.updated(changed_world_states)
+
+        return [world_state_name for world_state_name, _ in changed_world_states]
+
+    def world_event(self, world_state_name):
+        # returns the event for the given world state name or None if the state is not in the world
+        with self._lock.reading():
+            return self._world_events.get(world_state_name)
+
+    def world_events(self):
+        # returns a list of world events in insertion order
+        with self._lock.reading():
+            return list(self._world_events.values())
+
+    def world_states(self):
+        # returns the latest snapshot of the world state values. the snapshot does not keep the order of the updates
+        return self._world_states_snapshot
+
+    def version(self):
+        # the version of the latest snapshot
+        return self._world_states_snapshot.version
+
+    def clear(self):
+        with self._lock.writing():
+            self._world_events.clear()
+            self._world_states_snapshot = self._world_states_snapshot.cleared()
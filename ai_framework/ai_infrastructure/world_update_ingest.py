@@ -0,0 +1,156 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to decode payloads. orjson is used when it is installed because it decodes several times faster
+import json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# needed to apply coalesced updates on a thread of their own
+import threading
+import time
+
+# needed to log rejected messages instead of printing them
+import logging
+
+# needed to check messages once, as they arrive
+from .message import Message
+from .info import Info
+
+
+logger = logging.getLogger(__name__)
+
+
+def decode_payload(payload):
+    # the json document in an mqtt payload, given as bytes or a string
+    if orjson is not None:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            # fall through for payloads that are not valid utf-8, which are decoded ignoring the invalid bytes
+            pass
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode("utf-8", "ignore")
+    return json.loads(payload)
+
+
+class WorldUpdateIngest:
+    """
+    Turns mqtt payloads into world updates.
+
+    Each payload is decoded and checked once, as it arrives. Messages from the same event source that arrive within
+    seconds_to_coalesce of each other are merged into one: the latest message wins, carrying the effects of every
+    message it replaced. Each merged message is handed to apply_update(topic, message) from a thread of the ingest's
+    own. An update that fails is logged and counted, and the rest of the batch is still applied. With no coalescing
+    window, each message is applied as it arrives.
+    """
+
+    def __init__(self, apply_update, seconds_to_coalesce=0.05):
+        self._apply_update = apply_update
+        self._seconds_to_coalesce = seconds_to_coalesce
+        self._condition = threading.Condition()
+        self._pending_updates = {}
+        self._applying = False
+        self._waiting_for_updates = False
+        self._closed = False
+        self._counts = {"received": 0, "rejected": 0, "coalesced": 0, "applied": 0, "failed": 0}
+        self._thread = None
+        if seconds_to_coalesce > 0:
+            self._thread = threading.Thread(target=self._apply_coalesced_updates, name="world_update_ingest")
+            self._thread.daemon = True
+            self._thread.start()
+
+    def submit(self, topic, payload):
+        # decode and check a payload and queue it to update the world. returns false if the payload was rejected
+        try:
+            message = Message(**decode_payload(payload))
+            Info.check_message(message)
+        except (ValueError, TypeError) as error:
+            with self._condition:
+                self._counts["received"] += 1
+                self._counts["rejected"] += 1
+            logger.warning("rejected a message from topic %s: %s", topic, error)
+            return False
+
+        with self._condition:
+            self._counts["received"] += 1
+            pending_update = self._pending_updates.pop(message.event_source, None)
+            if pending_update is not None:
+                message = _merged(pending_update[1], message)
+                self._counts["coalesced"] += 1
+            self._pending_updates[message.event_source] = (topic, message)
+
+            # the applying thread only needs waking for the first update of a burst
+            if self._waiting_for_updates:
+                self._condition.notify_all()
+
+        # without an applying thread, or once the ingest is closed, updates are applied as they arrive
+        if self._thread is None or self._closed:
+            self._apply_pending_updates()
+        return True
+
+    def flush(self):
+        # apply every pending update now
+        self._apply_pending_updates()
+
+    def close(self):
+        # apply every pending update, then stop the applying thread
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._apply_pending_updates()
+
+    def metrics(self):
+        with self._condition:
+            return dict(self._counts, pending=len(self._pending_updates))
+
+    def _apply_coalesced_updates(self):
+        while True:
+            with self._condition:
+                self._waiting_for_updates = True
+                self._condition.wait_for(lambda: self._pending_updates or self._closed)
+                self._waiting_for_updates = False
+                if self._closed:
+                    return
+
+            # let the rest of a burst arrive, then apply the latest update from each event source
+            time.sleep(self._seconds_to_coalesce)
+            self._apply_pending_updates()
+
+    def _apply_pending_updates(self):
+        # updates are applied by one thread at a time, in the order they were taken
+        with self._condition:
+            self._condition.wait_for(lambda: not self._applying)
+            updates = list(self._pending_updates.values())
+            if not updates:
+                return
+            self._pending_updates = {}
+            self._applying = True
+
+        applied = 0
+        for topic, message in updates:
+            try:
+                self._apply_update(topic, message)
+                applied += 1
+            except Exception:
+                logger.exception("unable to apply the world update from %s on topic %s", message.event_source, topic)
+
+        with self._condition:
+            self._applying = False
+            self._counts["applied"] += applied
+            self._counts["failed"] += len(updates) - applied
+            self._condition.notify_all()
+
+
+def _merged(earlier_message, later_message):
+    # the later message, carrying the effects of both messages
+    if not earlier_message.effects:
+        return later_message
+    effects = dict(earlier_message.effects)
+    effects.update(later_message.effects or {})
+    return later_message._replace(effects=effects)
@@ -0,0 +1,57 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to register actions from many connections at once
+import threading
+
+
+class ActionRegistry:
+    """
+    Keeps track of the remote actions registered with the ai server, grouped by the connection they arrived on.
+
+    Holding a reference to an action keeps its netref valid for as long as its connection is open. When a
+    connection closes, every action registered over it can be removed in one step.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+        # actions keyed by connection, then by identity. netrefs are compared by identity because comparing them
+        # by value would be a round trip to the remote action
+        self._actions_by_connection = {}
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(actions) for actions in self._actions_by_connection.values())
+
+    def register(self, connection, action):
+        with self._lock:
+            self._actions_by_connection.setdefault(connection, {})[id(action)] = action
+
+    def unregister(self, connection, action):
+        # returns true if the action was registered
+        with self._lock:
+            actions = self._actions_by_connection.get(connection, {})
+            removed_action = actions.pop(id(action), None)
+            if not actions:
+                self._actions_by_connection.pop(connection, None)
+        return removed_action is not None
+
+    def unregister_connection(self, connection):
+        # removes and returns every action registered over the given connection
+        with self._lock:
+            actions = self._actions_by_connection.pop(connection, {})
+        return list(actions.values())
+
+    def actions(self, connection=None):
+        # returns the actions registered over the given connection, or every registered action
+        with self._lock:
+            if connection is not None:
+                return list(self._actions_by_connection.get(connection, {}).values())
+            return [action for actions in self._actions_by_connection.values() for action in actions.values()]
+
+
+def connection_of(action):
+    # returns the rpyc connection that a remote action arrived on, or None for a local action
+    return getattr(action, "____conn__", None)
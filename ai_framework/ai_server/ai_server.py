@@ -12,9 +12,9 @@ from ai_framework.ai import AI
 import rpyc
 
 # needed to start the server in its own thread
-from rpyc.utils.server import ThreadedServer
+from rpyc.utils.server import ThreadedServer, ThreadPoolServer
 
-# needed to keep the registered action thread alive
+# needed to pause between ai runs
 import time
 
 # needed to run the ai as a remote server in its own thread
@@ -24,11 +24,26 @@ import threading
 import json
 
 # needed to demo the ai server functionality
-from ai_framework.ai_visualization import AIDemo
+from ai_framework.ai_visualization import AIDemo, AIDemoSink
 
 # needed to read server configuration from the config file
 from configparser import ConfigParser
 
+# needed to keep registered actions alive for as long as their connections are open
+from .action_registry import ActionRegistry, connection_of
+
+# needed to bound the ai diary and serve it to clients in batches
+from ai_framework.ai.ai_diary import AIDiary, serialize_diary_records
+
+# needed to read each diary entry once for every consumer
+from ai_framework.ai.structured_diary_entry import structured_diary_entry
+
+# needed to restore the world learned before a restart
+from ai_framework.ai_infrastructure.world_journal import WorldJournal
+
+# needed to serve world updates and reads without rpyc
+from .framed_transport_server import FramedTransportServer
+
 # needed to populate the initial world state
 
 # the global server configuration file
@@ -42,6 +57,8 @@ ai = AI()
 
 class AIServer(rpyc.Service):
     _server_started = False
+    _ai_demo_sink = None
+    _action_registry = ActionRegistry()
 
     def _init_server(self):
         # connect to the ai
@@ -50,8 +67,28 @@ class AIServer(rpyc.Service):
 
         global config
         self._seconds_to_sleep_between_ai_runs = float(config['server_execution']['seconds_to_sleep_between_ai_runs'])
+
+        # in event driven mode the ai runs as soon as the world changes and the sleep interval becomes a heartbeat
+        self._ai_scheduling_mode = config['server_execution'].get('ai_scheduling_mode', 'interval')
+        self._seconds_to_debounce_world_changes = \
+            float(config['server_execution'].get('seconds_to_debounce_world_changes', '0'))
         self._node_retirement_age_in_seconds = int(config["demo"]["seconds_to_wait_before_no_longer_displaying_a_node"])
 
+        # limit the number of actions the ai takes at the same time and how long the ai waits for each one.
+        # the connection of a remote action that times out is quarantined
+        if self._ai.action_executor() is not None:
+            max_concurrent_actions = config['server_execution'].get('max_concurrent_actions', '4')
+            seconds_before_timing_out = config['server_execution'].get('seconds_before_an_action_times_out', '0')
+            self._ai.action_executor().configure(max_concurrent_actions=int(max_concurrent_actions),
+                                                 seconds_before_timing_out=float(seconds_before_timing_out),
+                                                 on_action_timeout=self._quarantine_connection)
+
+        # bound the ai diary
+        if config.has_section('diary') and isinstance(self._ai.diary(), AIDiary):
+            self._ai.diary().configure(max_entries_in_memory=int(config['diary']['max_entries_in_memory']),
+                                       spill_folder=config['diary'].get('spill_folder', ''),
+                                       entries_per_segment=int(config['diary']['entries_per_segment']))
+
         # create initial parameters for demo visualization
         demo_markdown_file_folder = config['demo']['demo_markdown_file_folder']
         demo_mode = config['demo']['demo_mode'] == "True"
@@ -67,6 +104,22 @@ class AIServer(rpyc.Service):
         # demo the ai goals
         self._ai_demo.demo_goals(file_formatted_ai_goal_list)
 
+        # write the rest of the demo in the background so that a slow demo folder cannot hold up the ai
+        if demo_mode:
+            self._ai_demo_sink = AIDemoSink(self._ai_demo,
+                                            max_queued_entries=int(config['demo'].get('max_queued_diary_entries',
+                                                                                      '100')),
+                                            max_entries_per_batch=int(config['demo'].get('max_diary_entries_per_batch',
+                                                                                         '20')))
+
+        # restore the world from the journal, if one is configured
+        journal_folder = ''
+        if config.has_section('world_journal'):
+            journal_folder = config['world_journal'].get('journal_folder', '')
+        if journal_folder:
+            updates_between_snapshots = int(config['world_journal']['updates_between_snapshots'])
+            self._ai.network().attach_journal(WorldJournal(journal_folder, updates_between_snapshots))
+
         # set the initial state of the world if directed to do so by the configuration file
         set_initial_world_state = config['server_execution']['set_initial_world_state']
         if set_initial_world_state:
@@ -76,8 +129,13 @@ class AIServer(rpyc.Service):
                 initial_world_state = json.load(json_file)
                 world_state_names = initial_world_state.keys()
 
-                # update the world based on each of the world states from the world state file
+                # update the world based on each of the world states from the world state file.
+                # states restored from the journal are more recent than the initial state and are kept
+                known_world_states = self._ai.network().the_world_states()
                 for world_state_name in world_state_names:
+                    if world_state_name in known_world_states:
+                        continue
+
                     # create an event from the world state file
                     world_state_value = initial_world_state[world_state_name]
                     no_context = {}
@@ -97,31 +155,60 @@ class AIServer(rpyc.Service):
         while True:
             self._ai.run_iteration()
 
-            # run the demo by visualizing the last entry from the ai diary
-            last_diary_entry = -1
-            diary_entry = self._ai.diary()[last_diary_entry]
-            self._ai_demo.demo_diary_entry(diary_entry)
-            self._ai_demo.update_demo_goals(diary_entry)
-
-            # tell the visualization when to no longer visualize a node
+            # run the demo by visualizing the last entry from the ai diary. the demo is written in the background,
+            # where it also tells the visualization when to no longer visualize a node
             # todo remove the node retirement age from the server config settings
-            self._ai_demo.retire_nodes(self._ai.network().the_world_states())
+            if self._ai_demo_sink is not None:
+                self._ai_demo_sink.submit(self._last_structured_diary_entry(), self._ai.network().the_world_states())
 
             # wait before the next ai run
+            self._wait_for_next_ai_run()
+
+    def _last_structured_diary_entry(self):
+        # the ai diary keeps its entries in structured form. other diaries have the last entry structured here
+        if isinstance(self._ai.diary(), AIDiary):
+            return self._ai.diary().latest_record().structured_entry
+        last_diary_entry = -1
+        return structured_diary_entry(self._ai.diary()[last_diary_entry])
+
+    def _wait_for_next_ai_run(self):
+        if self._ai_scheduling_mode == 'event_driven':
+            # wake on the next change to the world, merging a burst of changes into one run.
+            # if the world stays quiet, run anyway once the sleep interval has passed
+            changed_world_state_names = self._ai.network().wait_for_world_change(
+                self._seconds_to_sleep_between_ai_runs, self._seconds_to_debounce_world_changes)
+        else:
             time.sleep(self._seconds_to_sleep_between_ai_runs)
+            changed_world_state_names = self._ai.network().wait_for_world_change(0)
+
+        # the goal scheduler re-evaluates only the goals on the world states that changed since the last run
+        self._ai.world_changed(changed_world_state_names)
+
+    def _quarantine_connection(self, action):
+        # an action that timed out may never answer again. stop using every action on its connection and close the
+        # connection. the client reconnects and registers its actions again on a fresh connection
+        connection = connection_of(action)
+        if connection is None:
+            return
+        for quarantined_action in self._action_registry.unregister_connection(connection):
+            self._ai.remove_capability(quarantined_action)
+        try:
+            connection.close()
+        except Exception:
+            pass
 
     def on_disconnect(self, conn):
-        pass
+        # the actions registered over a closed connection can no longer be reached. remove them from the ai
+        for action in self._action_registry.unregister_connection(conn):
+            self._ai.remove_capability(action)
 
     def exposed_add_action(self, action):
+        # the registry holds the reference to the action, which keeps the action valid until its connection closes
+        self._action_registry.register(connection_of(action), action)
         self._ai.add_capability(action)
 
-        # this server runs each request as a separate thread.
-        # the thread must be kept alive to keep the reference to the action valid.
-        while True:
-            time.sleep(5)
-
     def exposed_remove_action(self, action):
+        self._action_registry.unregister(connection_of(action), action)
         self._ai.remove_capability(action)
 
     def exposed_reset(self):
@@ -133,9 +220,25 @@ class AIServer(rpyc.Service):
         return self._ai.network()
 
     def exposed_ai_diary(self):
-        # return the contents of the ai diary
+        # return the contents of the ai diary. clients that want the diary in serialized batches use
+        # ai_diary_since and ai_diary_query
         return self._ai.diary()
 
+    def exposed_action_metrics(self):
+        # return the action counts and latency percentiles, by action name
+        if self._ai.action_executor() is None:
+            return {}
+        return self._ai.action_executor().metrics().summary()
+
+    def exposed_ai_diary_since(self, cursor=-1, limit=100):
+        # return, as one json lines string, the diary entries written after the given cursor.
+        # each line carries the entry's cursor, so the last line tells the client where to continue from
+        return serialize_diary_records(self._ai.diary().since(cursor, limit))
+
+    def exposed_ai_diary_query(self, goal=None, action=None, status=None, start_time=None, end_time=None, limit=100):
+        # return, as one json lines string, the diary entries that match every given filter
+        return serialize_diary_records(self._ai.diary().query(goal, action, status, start_time, end_time, limit))
+
 
 def start_ai_server(ai_instance=AI(), ai_server_config_file="ai_server_config.ini"):
     # set the ai instance
@@ -154,17 +257,34 @@ def start_ai_server(ai_instance=AI(), ai_server_config_file="ai_server_config.in
     import_custom_exceptions = config['server_protocol']['import_custom_exceptions'] == "True"
     allow_pickle = config['server_protocol']['allow_pickle'] == "True"
 
-    # start the server
-    thread = ThreadedServer(AIServer(),
-                            port=os.environ['ai_server_port'],
-                            protocol_config={"allow_all_attrs": allow_all_attrs,
-                                             "allow_public_attrs": allow_public_attrs,
-                                             "allow_setattr": allow_setattr,
-                                             "instantiate_custom_exceptions": instantiate_custom_exceptions,
-                                             "import_custom_exceptions": import_custom_exceptions,
-                                             "allow_pickle": allow_pickle
-                                             }
-                            )
+    protocol_config = {"allow_all_attrs": allow_all_attrs,
+                       "allow_public_attrs": allow_public_attrs,
+                       "allow_setattr": allow_setattr,
+                       "instantiate_custom_exceptions": instantiate_custom_exceptions,
+                       "import_custom_exceptions": import_custom_exceptions,
+                       "allow_pickle": allow_pickle
+                       }
+
+    # serve the hot world and diary operations as framed messages alongside rpyc, if a port is given
+    framed_transport_port = config['framed_transport'].get('port', '') if config.has_section('framed_transport') else ''
+    if framed_transport_port not in ('', '0'):
+        FramedTransportServer(ai.network(), ai.diary(),
+                              host=config['framed_transport'].get('host', '0.0.0.0'),
+                              port=int(framed_transport_port)).start()
+
+    # start the server. the threaded transport serves each connection on a thread of its own. the thread pool
+    # transport polls every connection and serves requests on a fixed number of threads, for servers with many
+    # connected actions
+    server_transport = config['server_protocol'].get('server_transport', 'threaded')
+    if server_transport == 'thread_pool':
+        thread = ThreadPoolServer(AIServer(),
+                                  port=os.environ['ai_server_port'],
+                                  protocol_config=protocol_config,
+                                  nbThreads=int(config['server_protocol'].get('server_threads', '20')))
+    else:
+        thread = ThreadedServer(AIServer(),
+                                port=os.environ['ai_server_port'],
+                                protocol_config=protocol_config)
     thread.start()
 
 
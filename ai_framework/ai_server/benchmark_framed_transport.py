@@ -0,0 +1,85 @@
+# measures how many world updates per second reach the ai's world over rpyc and over the framed transport, one update
+# per request, in batches and pipelined.
+# run with: python -m ai_framework.ai_server.benchmark_framed_transport
+
+# needed to time updates
+import time
+
+# needed to serve the world over rpyc
+import rpyc
+from rpyc.utils.server import ThreadedServer
+import threading
+
+# needed to serve the world over the framed transport
+from ai_framework.ai_infrastructure import LocalNetwork
+from ai_framework.ai.ai_diary import AIDiary
+from ai_framework.ai_server.framed_transport_server import FramedTransportServer
+from ai_framework.ai_actions.framed_transport_client import FramedTransportClient
+
+
+class _NetworkService(rpyc.Service):
+    def exposed_network(self):
+        return LocalNetwork.instance()
+
+
+def _per_second(update, num_updates):
+    LocalNetwork.instance().reset()
+    start = time.perf_counter()
+    update(num_updates)
+    elapsed = time.perf_counter() - start
+    return num_updates / elapsed
+
+
+def _sample_context(n):
+    return {"sdfObject": {"Sensor": {"sdfProperty": {"reading": n}}}}
+
+
+def run_benchmark(num_updates=5000, batch_size=100):
+    rpyc_server = ThreadedServer(_NetworkService(), port=0, protocol_config={"allow_all_attrs": True})
+    threading.Thread(target=rpyc_server.start, daemon=True).start()
+    while not rpyc_server.active:
+        time.sleep(0.01)
+    rpyc_connection = rpyc.connect("127.0.0.1", rpyc_server.port)
+    rpyc_network = rpyc_connection.root.network()
+
+    framed_server = FramedTransportServer(LocalNetwork.instance(), AIDiary()).start()
+    framed_client = FramedTransportClient("127.0.0.1", framed_server.port())
+
+    def rpyc_updates(n):
+        for i in range(n):
+            rpyc_network.update_the_world(f"state_{i % 100}", i, _sample_context(i))
+
+    def rpyc_batches(n):
+        for start in range(0, n, batch_size):
+            rpyc_network.update_the_world_many(tuple((f"state_{i % 100}", i) for i in range(start, start + batch_size)),
+                                               _sample_context(start))
+
+    def framed_updates(n):
+        for i in range(n):
+            framed_client.update_the_world(f"state_{i % 100}", i, _sample_context(i))
+
+    def framed_batches(n):
+        for start in range(0, n, batch_size):
+            framed_client.update_the_world_many({f"state_{i % 100}": i for i in range(start, start + batch_size)},
+                                                _sample_context(start))
+
+    def framed_pipelined(n):
+        for start in range(0, n, batch_size):
+            framed_client.update_the_world_pipelined([(f"state_{i % 100}", i, _sample_context(i))
+                                                      for i in range(start, start + batch_size)])
+
+    print(f"{'transport':>20} {'updates (/s)':>14}")
+    print(f"{'rpyc':>20} {_per_second(rpyc_updates, num_updates):>14.0f}")
+    print(f"{'rpyc batched':>20} {_per_second(rpyc_batches, num_updates):>14.0f}")
+    print(f"{'framed':>20} {_per_second(framed_updates, num_updates):>14.0f}")
+    print(f"{'framed batched':>20} {_per_second(framed_batches, num_updates):>14.0f}")
+    print(f"{'framed pipelined':>20} {_per_second(framed_pipelined, num_updates):>14.0f}")
+
+    framed_client.close()
+    framed_server.close()
+    rpyc_connection.close()
+    rpyc_server.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,147 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to serve many clients from one thread
+import asyncio
+
+# needed to run the transport alongside the rpyc server
+import threading
+
+# needed to carry out operations without holding up the event loop
+from concurrent.futures import ThreadPoolExecutor
+
+# needed to frame messages
+from ai_framework.ai_infrastructure.framed_messages import encode_frame, decode_message, message_length, \
+    LENGTH_PREFIX_SIZE, InvalidFrame
+
+# needed to serve the diary in the same form as the rpyc server does
+from ai_framework.ai.ai_diary import AIDiary, serialize_diary_records
+
+
+class FramedTransportServer:
+    """
+    Serves the hot operations on the ai's world and diary as length-prefixed json messages over tcp.
+
+    This is a lighter alternative to rpyc for clients that only update and read the world: messages travel by value,
+    so there are no proxies and no round trips for attribute access. It runs on its own thread next to the rpyc
+    server and serves every client from a single event loop. Operations, which can wait on the world update lock
+    and the world journal, are carried out on a small pool of worker threads, so a slow write holds up only the
+    client that asked for it.
+
+    Requests are {"op": ..., ...} messages. Every request gets one response, {"ok": true, "result": ...} or
+    {"ok": false, "error": ...}, in the order the requests were sent. The operations are:
+        update: state_name, state_value, context
+        update_many: effects as [[state_name, state_value], ...], context
+        world_states
+        diary_since: cursor, limit
+    """
+
+    def __init__(self, network, diary=None, host="127.0.0.1", port=0, max_worker_threads=4):
+        self._network = network
+        self._diary = diary
+        self._host = host
+        self._port = port
+        self._max_worker_threads = max_worker_threads
+        self._workers = None
+        self._event_loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._client_tasks = {}
+        self._operations = {"update": self._update,
+                            "update_many": self._update_many,
+                            "world_states": self._world_states,
+                            "diary_since": self._diary_since}
+
+    def start(self):
+        # start serving on a thread of its own and return once the server is listening
+        self._thread = threading.Thread(target=self._serve, name="framed_transport_server")
+        self._thread.daemon = True
+        self._thread.start()
+        self._started.wait()
+        if self._server is None:
+            raise OSError(f"unable to serve the framed transport on {self._host}:{self._port}")
+        return self
+
+    def port(self):
+        # the port the server listens on, which is chosen by the system if the server was given port 0
+        return self._server.sockets[0].getsockname()[1]
+
+    def close(self):
+        if self._server is not None:
+            asyncio.run_coroutine_threadsafe(self._shut_down(), self._event_loop)
+            self._thread.join()
+
+    async def _shut_down(self):
+        # stop accepting clients, end the connections of the clients already served and stop the event loop
+        self._server.close()
+        client_tasks = dict(self._client_tasks)
+        for writer in client_tasks.values():
+            writer.close()
+        await asyncio.gather(*client_tasks, return_exceptions=True)
+        self._event_loop.stop()
+
+    def _serve(self):
+        self._event_loop = asyncio.new_event_loop()
+        self._workers = ThreadPoolExecutor(max_workers=self._max_worker_threads,
+                                           thread_name_prefix="framed_transport_worker")
+        try:
+            self._server = self._event_loop.run_until_complete(
+                asyncio.start_server(self._serve_client, self._host, self._port))
+        except OSError:
+            self._event_loop.close()
+            self._workers.shutdown()
+            self._started.set()
+            return
+        self._started.set()
+        self._event_loop.run_forever()
+        self._event_loop.close()
+        self._workers.shutdown()
+
+    async def _serve_client(self, reader, writer):
+        self._client_tasks[asyncio.current_task()] = writer
+        try:
+            while True:
+                length_prefix = await reader.readexactly(LENGTH_PREFIX_SIZE)
+                request = decode_message(await reader.readexactly(message_length(length_prefix)))
+
+                # each client's requests are carried out one at a time, so responses keep the order of the requests
+                writer.write(await self._event_loop.run_in_executor(self._workers, self._framed_response, request))
+
+                # only wait for the client to catch up if it stopped reading
+                if writer.transport.get_write_buffer_size() > 1024 * 1024:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, InvalidFrame):
+            pass
+        finally:
+            self._client_tasks.pop(asyncio.current_task(), None)
+            writer.close()
+
+    def _framed_response(self, request):
+        return encode_frame(self._respond(request))
+
+    def _respond(self, request):
+        try:
+            operation = self._operations[request["op"]]
+        except (KeyError, TypeError):
+            return {"ok": False, "error": f"unknown operation in {request}"}
+
+        try:
+            return {"ok": True, "result": operation(request)}
+        except Exception as error:
+            return {"ok": False, "error": f"{type(error).__name__}: {error}"}
+
+    def _update(self, request):
+        self._network.update_the_world(request["state_name"], request["state_value"], request.get("context", {}))
+
+    def _update_many(self, request):
+        self._network.update_the_world_many(request["effects"], request.get("context", {}))
+
+    def _world_states(self, request):
+        return self._network.the_world_states()
+
+    def _diary_since(self, request):
+        if not isinstance(self._diary, AIDiary):
+            return ""
+        return serialize_diary_records(self._diary.since(request.get("cursor", -1), request.get("limit", 100)))
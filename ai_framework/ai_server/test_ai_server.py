@@ -0,0 +1,97 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import threading
+import time
+import unittest
+
+# needed to run the ai server over a real connection
+import rpyc
+from rpyc.utils.server import ThreadedServer
+
+# needed to test action registration
+from ai_framework.ai_server.ai_server import AIServer
+from ai_framework.ai_server.action_registry import ActionRegistry
+
+
+class RecordingAI:
+    # stands in for the ai and records the capabilities it is given
+    def __init__(self):
+        self.capabilities = {}
+
+    def add_capability(self, action):
+        self.capabilities[id(action)] = action
+
+    def remove_capability(self, action):
+        self.capabilities.pop(id(action))
+
+
+class RegistrationTestServer(AIServer):
+    # an ai server that registers actions without starting the ai loop
+    _action_registry = ActionRegistry()
+    _recording_ai = RecordingAI()
+
+    def on_connect(self, conn):
+        self._ai = self._recording_ai
+
+
+class RegistrationTestAction:
+    def check_connection(self):
+        pass
+
+
+class TestAIServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._server = ThreadedServer(RegistrationTestServer(), hostname="127.0.0.1", port=0,
+                                     protocol_config={"allow_all_attrs": True, "allow_pickle": True})
+        cls._port = cls._server.port
+        server_thread = threading.Thread(target=cls._server.start)
+        server_thread.daemon = True
+        server_thread.start()
+
+        # wait for the server to start listening
+        while not cls._server.active:
+            time.sleep(0.01)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._server.close()
+
+    def test_registering_many_actions(self):
+        # load test: registering thousands of actions returns right away and does not park a thread per action
+        num_actions = 5000
+        threads_before_registration = threading.active_count()
+
+        connection = rpyc.connect("127.0.0.1", self._port, config={"allow_all_attrs": True})
+        actions = [RegistrationTestAction() for _ in range(num_actions)]
+
+        start = time.perf_counter()
+        for action in actions:
+            connection.root.add_action(action)
+        seconds_to_register = time.perf_counter() - start
+
+        # registering is a quick call per action, not a blocking call that holds a thread
+        self.assertLess(seconds_to_register, 30)
+
+        self.assertEqual(num_actions, len(RegistrationTestServer._action_registry))
+        self.assertEqual(num_actions, len(RegistrationTestServer._recording_ai.capabilities))
+        self.assertLess(threading.active_count() - threads_before_registration, 10)
+
+        # removing an action unregisters it
+        connection.root.remove_action(actions[0])
+        self.assertEqual(num_actions - 1, len(RegistrationTestServer._action_registry))
+
+        # closing the connection removes every action registered over it
+        connection.close()
+        seconds_waited = 0
+        while len(RegistrationTestServer._action_registry) > 0 and seconds_waited < 10:
+            time.sleep(0.1)
+            seconds_waited += 0.1
+        self.assertEqual(0, len(RegistrationTestServer._action_registry))
+        self.assertEqual(0, len(RegistrationTestServer._recording_ai.capabilities))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import socket
+import threading
+import time
+import unittest
+
+# needed to test the framed transport against a real world and diary
+from ai_framework.ai_infrastructure import LocalNetwork
+from ai_framework.ai.ai_diary import AIDiary
+from ai_framework.ai_server.framed_transport_server import FramedTransportServer
+from ai_framework.ai_actions.framed_transport_client import FramedTransportClient, FramedTransportError
+from ai_framework.ai_infrastructure.framed_messages import encode_frame
+
+
+class TestFramedTransport(unittest.TestCase):
+    def setUp(self):
+        self.network = LocalNetwork.instance()
+        self.network.reset()
+        self.diary = AIDiary()
+        self.server = FramedTransportServer(self.network, self.diary).start()
+        self.client = FramedTransportClient("127.0.0.1", self.server.port())
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_update_and_read_the_world(self):
+        self.client.update_the_world("door_open", True, {})
+        self.client.update_the_world_many({"light_on": True, "temperature": 20}, {})
+        self.assertEqual({"door_open": True, "light_on": True, "temperature": 20}, self.client.the_world_states())
+        self.assertEqual(self.network.the_world_states(), self.client.the_world_states())
+
+    def test_pipelined_updates(self):
+        self.client.update_the_world_pipelined([(f"state_{n}", n, {}) for n in range(100)])
+        world_states = self.client.the_world_states()
+        self.assertEqual(100, len(world_states))
+        self.assertEqual(99, world_states["state_99"])
+
+    def test_diary_since(self):
+        self.diary.append({"my_goal": {"light_on": True}, "action_taken": "TurnOnTheLight"})
+        diary_lines = self.client.ai_diary_since(-1, 10).splitlines()
+        self.assertEqual(1, len(diary_lines))
+        self.assertIn("TurnOnTheLight", diary_lines[0])
+
+    def test_errors_are_returned_to_the_client(self):
+        with self.assertRaises(FramedTransportError):
+            self.client._request({"op": "no_such_operation"})
+
+        # the connection is still usable after an error
+        self.client.update_the_world("door_open", False, {})
+        self.assertEqual({"door_open": False}, self.client.the_world_states())
+
+    def test_oversized_frames_close_the_connection(self):
+        connection = socket.create_connection(("127.0.0.1", self.server.port()))
+        connection.sendall(b"\xff\xff\xff\xff")
+        self.assertEqual(b"", connection.recv(1))
+        connection.close()
+
+        # other clients are not affected
+        self.client.update_the_world("door_open", True, {})
+        self.assertEqual({"door_open": True}, self.client.the_world_states())
+
+    def test_frames_are_length_prefixed(self):
+        frame = encode_frame({"op": "world_states"})
+        self.assertEqual(len(frame) - 4, int.from_bytes(frame[:4], "big"))
+
+
+class SlowWritingTestNetwork:
+    # a network whose updates wait until they are let through, like a world journal stuck on a slow disk
+    def __init__(self):
+        self.let_updates_through = threading.Event()
+
+    def update_the_world(self, state_name, state_value, context):
+        self.let_updates_through.wait(5)
+
+    def the_world_states(self):
+        return {"door_open": True}
+
+
+class TestFramedTransportWithASlowWorld(unittest.TestCase):
+    def test_a_slow_update_holds_up_only_its_own_client(self):
+        network = SlowWritingTestNetwork()
+        server = FramedTransportServer(network).start()
+        writing_client = FramedTransportClient("127.0.0.1", server.port())
+        reading_client = FramedTransportClient("127.0.0.1", server.port())
+        writing_thread = threading.Thread(target=writing_client.update_the_world, args=("door_open", True, {}))
+        writing_thread.start()
+        try:
+            start = time.monotonic()
+            self.assertEqual({"door_open": True}, reading_client.the_world_states())
+            self.assertLess(time.monotonic() - start, 1)
+        finally:
+            network.let_updates_through.set()
+            writing_thread.join()
+            writing_client.close()
+            reading_client.close()
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1 +1,2 @@
 from ai_framework.ai_visualization.ai_demo import AIDemo
+from ai_framework.ai_visualization.ai_demo_sink import AIDemoSink
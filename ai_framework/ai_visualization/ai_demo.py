@@ -15,6 +15,9 @@ import glob
 # needed to tag the entry with an action status
 from ai_framework.ai_actions import ActionStatus
 
+# needed to read diary entries
+from ai_framework.ai.structured_diary_entry import structured_diary_entry
+
 # needed to determine the age of a file on different platforms
 import platform
 
@@ -24,6 +27,18 @@ import json
 # needed to enumerate display file types
 from enum import Enum
 
+# needed to index the demo files
+from collections import namedtuple
+
+# needed to collect a batch of updates to the goals file
+import io
+
+# needed to recognize files that would be rewritten with the same content
+import hashlib
+
+# needed to find what changed between two snapshots of the world without visiting the whole world
+from ai_framework.ai_infrastructure.world_snapshot import WorldSnapshot
+
 
 # define the possible hash tags
 DemoTags = {
@@ -48,7 +63,12 @@ class DisplayFileTypes(Enum):
     FAILED_AI_ACTION = 4
     GOAL_STATE = 5
     INVALID_WORLD_STATE = 6
-    UNKNOWN = 7
+    WORLD_STATE = 8
+
+
+# a demo file written by the demo, as it is kept in the demo file index.
+# preconditions, postconditions and net effects are lists of world states formatted as "world_state_name-value"
+DemoFile = namedtuple('DemoFile', 'file_name display_type preconditions postconditions net_effects')
 
 
 class AIDemo:
@@ -58,6 +78,34 @@ class AIDemo:
         self._file_formatted_goal_list = []
         self._blocked_node_removed_already = True
         self._idle_node_removed_already = True
+        self._reset_demo_file_index()
+
+        # world state files waiting to be written at the end of a batch of diary entries, or None outside a batch
+        self._pending_world_state_files = None
+
+        # the number of world state file writes skipped because the file already had the same content
+        self._writes_saved = 0
+
+    def _reset_demo_file_index(self):
+        # an in-memory index of the files written by the demo, so that retiring nodes never has to read the folder
+        self._demo_files = {}
+
+        # world state files by world state, and general action files by each of their net effects
+        self._world_state_files = {}
+        self._action_files_by_net_effect = {}
+
+        # blocked and idle action files, in the order they were written, so that thinning them out never walks the
+        # whole index
+        self._blocked_and_idle_files = {}
+
+        # files to evaluate on the next retirement, whatever the world does in the meantime
+        self._new_demo_files = []
+
+        # the world states seen by the last retirement
+        self._retired_world_states = {}
+
+        # a hash of the content of each world state file written, so that unchanged files are not written again
+        self._world_state_file_hashes = {}
 
     def reset_demo(self):
         if self._demo_mode:
@@ -68,6 +116,7 @@ class AIDemo:
                     os.remove(f)
                 except:
                     pass
+            self._reset_demo_file_index()
 
             # create demo visualization for the idle state
             idle_state_name = "IDLE"
@@ -84,14 +133,31 @@ class AIDemo:
     def _create_world_state_file(self, clean_state_name, tag):
         # create a markdown file from the given state name
 
+        # within a batch, write each world state file once, with the last tag given
+        if self._pending_world_state_files is not None:
+            self._pending_world_state_files[clean_state_name] = tag
+            return
+
         # create a new state demo file
         md_file = MdUtils(file_name=self._markdown_folder + clean_state_name)
 
         # tag the new file
         md_file.new_line(tag)
 
+        # skip the write if the demo already wrote the same file
+        file_name = f"{clean_state_name}.md"
+        content_hash = hashlib.sha1(md_file.get_md_text().encode('utf-8')).hexdigest()
+        if self._world_state_file_hashes.get(file_name) == content_hash:
+            self._writes_saved += 1
+            return
+
         # write the state file to the folder
         md_file.create_md_file()
+        self._world_state_file_hashes[file_name] = content_hash
+
+    def writes_saved(self):
+        # the number of world state file writes skipped because the file already had the same content
+        return self._writes_saved
 
     def demo_goals(self, file_formatted_goal_list):
         if self._demo_mode:
@@ -112,6 +178,7 @@ class AIDemo:
 
                 # create a new goal file
                 self._create_world_state_file(goal, DemoTags['goal'])
+                self._index_world_state_file(goal_state_name, goal_state_value, DemoTags['goal'])
 
                 # link to the new goal file
                 md_file.new_line(f"[[{goal}]]")
@@ -126,24 +193,50 @@ class AIDemo:
             file_object = open(self._markdown_folder + 'goals.md', 'a')
 
             # write new content to the goals file based on the given diary entry
-            self._write_iteration_header(file_object)
-            self._write_prioritized_goal_list(diary_entry, file_object)
-            self._write_goal(diary_entry, file_object)
-            self._write_resource_list(diary_entry, file_object)
-            self._write_plan(diary_entry, file_object)
-            self._write_action(diary_entry, file_object)
-            self._write_world_state_before(diary_entry, file_object)
-            self._write_world_state_after(diary_entry, file_object)
+            self._write_goals_update(structured_diary_entry(diary_entry), file_object)
 
             # Close the file
             file_object.close()
 
+    def demo_diary_entries(self, diary_entries, world_states):
+        # demo a batch of diary entries, then retire nodes against the given world states. each world state file is
+        # written once for the whole batch and the goals file is appended to once
+        if self._demo_mode:
+            self._pending_world_state_files = {}
+            goals_updates = io.StringIO()
+            try:
+                for diary_entry in diary_entries:
+                    diary_entry = structured_diary_entry(diary_entry)
+                    self.demo_diary_entry(diary_entry)
+                    self._write_goals_update(diary_entry, goals_updates)
+            finally:
+                pending_world_state_files = self._pending_world_state_files
+                self._pending_world_state_files = None
+
+            for clean_state_name, tag in pending_world_state_files.items():
+                self._create_world_state_file(clean_state_name, tag)
+
+            with open(self._markdown_folder + 'goals.md', 'a') as file_object:
+                file_object.write(goals_updates.getvalue())
+
+            self.retire_nodes(world_states)
+
+    def _write_goals_update(self, diary_entry, file_object):
+        # write new content to the goals file based on the given diary entry
+        self._write_iteration_header(file_object)
+        self._write_prioritized_goal_list(diary_entry, file_object)
+        self._write_goal(diary_entry, file_object)
+        self._write_resource_list(diary_entry, file_object)
+        self._write_plan(diary_entry, file_object)
+        self._write_action(diary_entry, file_object)
+        self._write_world_state_before(diary_entry, file_object)
+        self._write_world_state_after(diary_entry, file_object)
+
     @staticmethod
     def _write_world_state_after(diary_entry, file_object):
         # write the world state after the action was taken
         file_object.writelines("\n")
-        for world_state in list(diary_entry['the_world_state_after'].keys()):
-            world_state_value = diary_entry['the_world_state_after'][world_state]
+        for world_state, world_state_value in diary_entry.world_state_after.items():
             after_element = f"\n<after {world_state}={world_state_value}>"
             file_object.writelines(after_element)
 
@@ -152,8 +245,7 @@ class AIDemo:
         # write the world state before the action was taken
 
         file_object.writelines("\n")
-        for world_state in list(diary_entry['the_world_state_before'].keys()):
-            world_state_value = diary_entry['the_world_state_before'][world_state]
+        for world_state, world_state_value in diary_entry.world_state_before.items():
             before_element = f"\n<before {world_state}={world_state_value}>"
             file_object.writelines(before_element)
 
@@ -161,14 +253,14 @@ class AIDemo:
     def _write_action(diary_entry, file_object):
         # create and write the action taken as part of the given diary entry
 
-        if "SUCCESS" in str(diary_entry['action_status']):
+        if diary_entry.status == ActionStatus.SUCCESS.value:
             action_status = "success"
         else:
             action_status = "fail"
-        if diary_entry['action_taken'] == "":
+        if diary_entry.action is None:
             action_name = "NONE"
         else:
-            action_name = diary_entry['action_taken']
+            action_name = diary_entry.action
         file_object.writelines(f"\n<action name={action_name} status={action_status}>")
 
     @staticmethod
@@ -179,16 +271,12 @@ class AIDemo:
         plan_close_tag = "\n<plan>"
         plan_content = ""
         # include the plan steps in the action plan
-        if diary_entry['my_plan'] is None:
+        if diary_entry.plan is None:
             # write an empty plan
             file_object.writelines(f"\n\n<plan state=NONE>")
         else:
-            # build plan content
-            for step in diary_entry['my_plan']:
-                start = '<'
-                end = ' object at'
-                step_string = str(step)
-                step_content = (step_string.split(start))[1].split(end)[0]
+            # build plan content from the class names of the actions in the plan
+            for step_content in diary_entry.plan:
                 plan_content += f"\n      {step_content}"
             # write plan and content
             file_object.writelines(plan_open_tag)
@@ -198,7 +286,7 @@ class AIDemo:
     @staticmethod
     def _write_resource_list(diary_entry, file_object):
         # create and write the list of resources currently registered with the ai
-        if len(diary_entry['my_resources']) == 0:
+        if len(diary_entry.resources) == 0:
             # there are no resources
             file_object.writelines("\n<resources status=NONE>")
         else:
@@ -206,7 +294,7 @@ class AIDemo:
             resource_list_open_tag = f"\n<resources>"
             resource_list_close_tag = f"\n<resources>"
             resources = ""
-            for resource in diary_entry['my_resources']:
+            for resource in diary_entry.resources:
                 resources += f"\n      {resource}"
 
             file_object.writelines(resource_list_open_tag)
@@ -216,18 +304,17 @@ class AIDemo:
     @staticmethod
     def _write_goal(diary_entry, file_object):
         # create and write the details of the selected goal
-        try:
-            goal_state = list(diary_entry['my_goal'].keys())[0]
-            goal_value = diary_entry['my_goal'][goal_state]
-            goal_element = f"\n\n<goal {goal_state}={goal_value}>"
-        except:
+        if diary_entry.goal is None:
             goal_element = f"\n\n<goal state=NONE>"
+        else:
+            goal_state, goal_value = diary_entry.goal
+            goal_element = f"\n\n<goal {goal_state}={goal_value}>"
         file_object.writelines(goal_element)
 
     @staticmethod
     def _write_prioritized_goal_list(diary_entry, file_object):
         # create and write the prioritized list of goal
-        if len(diary_entry['prioritized_goals']) == 0:
+        if len(diary_entry.prioritized_goals) == 0:
             # there are no goals
             file_object.writelines("\n<prioritized_goals status=NONE>")
         else:
@@ -235,11 +322,11 @@ class AIDemo:
             prioritized_goal_list_open_tag = f"\n<prioritized-goals>"
             prioritized_goal_list_close_tag = f"\n<prioritized-goals>"
             goal_content = ""
-            for goal in diary_entry['prioritized_goals']:
+            for goal_state_name, goal_state_value, priority, deferred in diary_entry.prioritized_goals:
                 goal_content += \
-                    f"\n      <goal state={goal.goal_state_name}-{goal.goal_state_value} " \
-                    f"priority={round(goal.sort_index, 2)} " \
-                    f"deferred={goal.deferred}>"
+                    f"\n      <goal state={goal_state_name}-{goal_state_value} " \
+                    f"priority={priority} " \
+                    f"deferred={deferred}>"
 
             file_object.writelines(prioritized_goal_list_open_tag)
             file_object.writelines(goal_content)
@@ -261,71 +348,79 @@ class AIDemo:
     def _world_state_changes(world_before, world_after):
         # return a dictionary of the states in the world after that are different from the world before
 
-        world_state_changes = {}
-
-        states_in_the_world_before = list(world_before.keys())
-        for world_after_state_name in world_after:
-            world_after_state_value = world_after[world_after_state_name]
+        # snapshots of the world share everything that did not change, so only the changes are visited
+        if isinstance(world_before, WorldSnapshot) and isinstance(world_after, WorldSnapshot):
+            return dict(world_after.changes_since(world_before))
 
-            # find the states in the world after but not in the world before
-            if world_after_state_name not in states_in_the_world_before:
-                world_state_changes[world_after_state_name] = world_after_state_value
-
-            # find the states with different values in the world before and after
-            elif world_before[world_after_state_name] != world_after_state_value:
+        world_state_changes = {}
+        for world_after_state_name, world_after_state_value in world_after.items():
+            # find the states in the world after but not in the world before, and the states with different values
+            if world_after_state_name not in world_before or \
+                    world_before[world_after_state_name] != world_after_state_value:
                 world_state_changes[world_after_state_name] = world_after_state_value
 
         return world_state_changes
 
     def demo_diary_entry(self, entry):
         if self._demo_mode:
+            entry = structured_diary_entry(entry)
+
             # generate a timestamp
             time_stamp = datetime.timestamp(datetime.now())
 
             # create a new diary demo file
-            md_file = MdUtils(file_name=self._markdown_folder + f'ai_action_{time_stamp}')
+            file_name = f'ai_action_{time_stamp}'
+            md_file = MdUtils(file_name=self._markdown_folder + file_name)
 
             # tag the file as a diary entry
             md_file.new_line(DemoTags['ai_action'])
 
-            no_goal = {"NONE": True}
+            preconditions = []
+            postconditions = []
 
             # if the action is an idle run of the ai, link to the idle state
-            if entry['my_goal'] == no_goal:
+            if entry.is_idle():
                 md_file.new_line('[[IDLE]]')
+                display_type = DisplayFileTypes.IDLE_AI_ACTION
 
             # if the action fails to find a viable plan, link to the blocked state
-            elif entry['my_plan'] is None:
+            elif entry.is_blocked():
                 md_file.new_line('[[BLOCKED]]')
+                display_type = DisplayFileTypes.BLOCKED_AI_ACTION
 
             # otherwise link to active world states:
             else:
 
                 # link action preconditions to the diary entry
-                self._create_and_link_world_states(DemoTags['preconditions'],
-                                                   entry['action_preconditions'],
-                                                   DemoTags[entry['action_status'].value],
-                                                   md_file)
-
-                # link 'the world states after' to the diary entry
-                world_state_changes = self._world_state_changes(entry['the_world_state_before'],
-                                                                entry['the_world_state_after'])
-                self._create_and_link_world_states(DemoTags['postconditions'],
-                                                   world_state_changes,
-                                                   DemoTags[entry['action_status'].value],
-                                                   md_file)
+                preconditions = self._create_and_link_world_states(DemoTags['preconditions'],
+                                                                   entry.preconditions,
+                                                                   DemoTags[entry.status],
+                                                                   md_file)
+
+                # link the changes the action made to the world to the diary entry
+                postconditions = self._create_and_link_world_states(DemoTags['postconditions'],
+                                                                    entry.effects,
+                                                                    DemoTags[entry.status],
+                                                                    md_file)
+
+                if entry.status == ActionStatus.FAIL.value:
+                    display_type = DisplayFileTypes.FAILED_AI_ACTION
+                else:
+                    display_type = DisplayFileTypes.GENERAL_AI_ACTION
 
             # add the post-act context to the diary entry
             md_file.new_line('')
-            formatted_context = json.dumps(entry['post_act_context'], indent=2)
+            formatted_context = json.dumps(entry.context, indent=2)
             md_file.write(formatted_context, wrap_width=0)
 
             # write the diary entry demo file to the folder
             md_file.create_md_file()
+            self._index_action_file(f"{file_name}.md", display_type, preconditions, postconditions)
 
     def _create_and_link_world_states(self, states_tag, world_states, action_status_tag, md_file):
         # tag the beginning of the states
         md_file.new_line(f"\nbegin-{states_tag}")
+        linked_world_states = []
 
         for world_state_name in world_states:
             world_state_value = world_states[world_state_name]
@@ -339,6 +434,8 @@ class AIDemo:
 
             # create a new world state file
             self._create_world_state_file(world_state, tag)
+            self._index_world_state_file(world_state_name, world_state_value, tag)
+            linked_world_states.append(world_state)
 
             # link to the new world state file
             md_file.new_line(f"[[{world_state}]]")
@@ -349,81 +446,117 @@ class AIDemo:
         # tag the status of the diary entry
         md_file.new_line(action_status_tag)
 
-    @staticmethod
-    def _read_conditions(file_content, begin_marker, end_marker):
-        refined_conditions_list = []
+        # return the world states linked to the diary entry
+        return linked_world_states
+
+    def _index_world_state_file(self, world_state_name, world_state_value, tag):
+        # add a world state file written by the demo to the demo file index
+        world_state = f"{world_state_name}-{world_state_value}"
+        file_name = f"{world_state}.md"
 
+        # a world state file rewritten as a goal stays a goal
+        if tag == DemoTags['goal']:
+            display_type = DisplayFileTypes.GOAL_STATE
+        elif file_name in self._demo_files:
+            return
+        else:
+            display_type = DisplayFileTypes.WORLD_STATE
+        self._demo_files[file_name] = DemoFile(file_name, display_type, [], [world_state], [world_state])
+        self._world_state_files[world_state] = file_name
+        self._new_demo_files.append(file_name)
+
+    def _index_action_file(self, file_name, display_type, preconditions, postconditions):
+        # add an ai action file written by the demo to the demo file index
+
+        # subtract the preconditions from the post conditions to get the net effect of the action
+        net_effects = self._net_effects(preconditions, postconditions)
+
+        self._demo_files[file_name] = DemoFile(file_name, display_type, preconditions, postconditions, net_effects)
+        if display_type == DisplayFileTypes.GENERAL_AI_ACTION:
+            for net_effect in net_effects:
+                self._action_files_by_net_effect.setdefault(net_effect, set()).add(file_name)
+        elif display_type in (DisplayFileTypes.BLOCKED_AI_ACTION, DisplayFileTypes.IDLE_AI_ACTION):
+            self._blocked_and_idle_files[file_name] = display_type
+        self._new_demo_files.append(file_name)
+
+    def _remove_demo_file(self, file_name):
+        # delete the file from the folder and from the demo file index
         try:
-            # get the indexes of the maker positions in the file content
-            idx1 = file_content.index(begin_marker)
-            idx2 = file_content.index(end_marker)
-
-            # use the indexes of the marker positions to extract the text between the beginning and end markers
-            conditions_text = file_content[idx1 + len(begin_marker) + 1: idx2]
-            raw_conditions_list = conditions_text.splitlines()
-
-            # remove the unwanted brackets from each post condition
-            for raw_condition in raw_conditions_list:
-                idx1 = raw_condition.index("[[")
-                idx2 = raw_condition.index("]]")
-                refined_condition = raw_condition[idx1 + len("[["): idx2]
-                refined_conditions_list.append(refined_condition)
-        except:
+            os.remove(self._markdown_folder + file_name)
+        except FileNotFoundError:
             pass
-
-        return refined_conditions_list
+        self._world_state_file_hashes.pop(file_name, None)
+
+        demo_file = self._demo_files.pop(file_name, None)
+        if demo_file is None:
+            return
+        self._blocked_and_idle_files.pop(file_name, None)
+        if demo_file.display_type in (DisplayFileTypes.WORLD_STATE, DisplayFileTypes.GOAL_STATE):
+            self._world_state_files.pop(demo_file.postconditions[0], None)
+        elif demo_file.display_type == DisplayFileTypes.GENERAL_AI_ACTION:
+            for net_effect in demo_file.net_effects:
+                action_files = self._action_files_by_net_effect.get(net_effect)
+                if action_files is not None:
+                    action_files.discard(file_name)
+                    if not action_files:
+                        del self._action_files_by_net_effect[net_effect]
 
     def retire_nodes(self, world_states):
         if self._demo_mode:
             # remove any node whose state is inconsistent with the known world states
             # todo put in the states that are now valid. change the method nome to something like refresh
 
-            # build a list of invalid world states
-            invalid_world_states = self._invalid_world_states(world_states)
+            # only files written since the last retirement and files linked to world states that changed since the
+            # last retirement need to be evaluated
+            files_to_evaluate = self._new_demo_files
+            self._new_demo_files = []
 
-            # step through each file, evaluate the file and remove it if necessary
-            for file_name in os.listdir(self._markdown_folder):
-
-                file_content = self._read_file_content(file_name)
-                file_display_type = self._file_display_type(file_name, file_content, invalid_world_states)
+            if world_states is not self._retired_world_states:
+                world_state_changes = self._world_state_changes(self._retired_world_states, world_states)
+                self._retired_world_states = world_states
+                for world_state_name, world_state_value in world_state_changes.items():
+                    # the opposite of a changed world state is no longer valid
+                    invalid_world_state = f"{world_state_name}-{not world_state_value}"
+                    if invalid_world_state in self._world_state_files:
+                        files_to_evaluate.append(self._world_state_files[invalid_world_state])
+                    files_to_evaluate.extend(self._action_files_by_net_effect.get(invalid_world_state, ()))
 
-                if file_display_type == DisplayFileTypes.BLOCKED_AI_ACTION:
-                    self._remove_blocked_action(file_name)
+            # invalid states are the boolean opposites of the world states
+            invalid_world_states = _InvalidWorldStates(world_states)
 
-                elif file_display_type == DisplayFileTypes.IDLE_AI_ACTION:
-                    self._remove_idle_action(file_name)
+            # step through each file, evaluate the file and remove it if necessary
+            for file_name in files_to_evaluate:
+                demo_file = self._demo_files.get(file_name)
+                if demo_file is None:
+                    continue
 
-                elif file_display_type == DisplayFileTypes.GOAL_STATE:
+                if demo_file.display_type == DisplayFileTypes.GOAL_STATE:
                     pass
 
-                elif file_display_type == DisplayFileTypes.GENERAL_AI_ACTION:
-                    self._remove_general_action(file_content, file_name, invalid_world_states)
-
-                elif file_display_type == DisplayFileTypes.INVALID_WORLD_STATE:
-                    os.remove(self._markdown_folder + file_name)
+                elif demo_file.display_type == DisplayFileTypes.WORLD_STATE:
+                    if demo_file.postconditions[0] in invalid_world_states:
+                        self._remove_demo_file(file_name)
 
-                elif file_display_type == DisplayFileTypes.FAILED_AI_ACTION:
-                    os.remove(self._markdown_folder + file_name)
+                elif demo_file.display_type == DisplayFileTypes.GENERAL_AI_ACTION:
+                    self._remove_general_action(demo_file, invalid_world_states)
 
-    def _remove_general_action(self, file_content, file_name, invalid_world_states):
-        # keep the ai action if any of the effects that it had on the world are still valid
+                elif demo_file.display_type == DisplayFileTypes.FAILED_AI_ACTION:
+                    self._remove_demo_file(file_name)
 
-        # build a list of preconditions present in the current file
-        begin_marker = "begin-" + DemoTags['preconditions']
-        end_marker = "end-" + DemoTags['preconditions']
-        preconditions = self._read_conditions(file_content, begin_marker, end_marker)
+            # blocked and idle actions are thinned out on every retirement
+            for file_name, display_type in list(self._blocked_and_idle_files.items()):
+                if display_type == DisplayFileTypes.BLOCKED_AI_ACTION:
+                    self._remove_blocked_action(file_name)
 
-        # build a list of post conditions present in the current file
-        begin_marker = "begin-" + DemoTags['postconditions']
-        end_marker = "end-" + DemoTags['postconditions']
-        post_conditions = self._read_conditions(file_content, begin_marker, end_marker)
+                elif display_type == DisplayFileTypes.IDLE_AI_ACTION:
+                    self._remove_idle_action(file_name)
 
-        # subtract the preconditions from the post conditions to get the net effect of the action
-        net_effects = self._net_effects(preconditions, post_conditions)
+    def _remove_general_action(self, demo_file, invalid_world_states):
+        # keep the ai action if any of the effects that it had on the world are still valid
 
         # count the number of valid net effects
-        valid_net_effects = len(net_effects)
-        for effect in net_effects:
+        valid_net_effects = len(demo_file.net_effects)
+        for effect in demo_file.net_effects:
             if effect in invalid_world_states:
                 valid_net_effects -= 1
 
@@ -433,7 +566,7 @@ class AIDemo:
             # keep the file
             pass
         else:
-            os.remove(self._markdown_folder + file_name)
+            self._remove_demo_file(demo_file.file_name)
 
     @staticmethod
     def _net_effects(preconditions, post_conditions):
@@ -449,7 +582,7 @@ class AIDemo:
         if self._idle_node_removed_already:
             self._idle_node_removed_already = False
         else:
-            os.remove(self._markdown_folder + file_name)
+            self._remove_demo_file(file_name)
             self._idle_node_removed_already = True
 
     def _remove_blocked_action(self, file_name):
@@ -457,52 +590,9 @@ class AIDemo:
         if self._blocked_node_removed_already:
             self._blocked_node_removed_already = False
         else:
-            os.remove(self._markdown_folder + file_name)
+            self._remove_demo_file(file_name)
             self._blocked_node_removed_already = True
 
-    @staticmethod
-    def _action_is_idle(file_content):
-        return "IDLE" in file_content
-
-    @staticmethod
-    def _file_display_type(file_name, file_content, invalid_world_states):
-        if DemoTags['goal'] in file_content or DemoTags['goals'] in file_content:
-            display_type = DisplayFileTypes.GOAL_STATE
-        elif file_name.replace(".md", "") in invalid_world_states:
-            display_type = DisplayFileTypes.INVALID_WORLD_STATE
-        elif DemoTags[ActionStatus.FAIL.value] in file_content:
-            display_type = DisplayFileTypes.FAILED_AI_ACTION
-        elif "BLOCKED" in file_content:
-            display_type = DisplayFileTypes.BLOCKED_AI_ACTION
-        elif "IDLE" in file_content:
-            display_type = DisplayFileTypes.IDLE_AI_ACTION
-        elif "ai_action" in file_name:
-            display_type = DisplayFileTypes.GENERAL_AI_ACTION
-        else:
-            display_type = DisplayFileTypes.UNKNOWN
-
-        return display_type
-
-    def _read_file_content(self, filename):
-        try:
-            with open(self._markdown_folder + filename) as file:
-                file_content = str(file.readlines())
-        except PermissionError:
-            file_content = ""
-
-        return file_content
-
-    @staticmethod
-    def _invalid_world_states(world_states):
-        # invalid states are the boolean opposites of all world states
-        invalid_world_states = []
-        world_state_names = world_states.keys()
-        for world_state_name in world_state_names:
-            invalid_world_state_value = not world_states[world_state_name]
-            invalid_world_state = f"{world_state_name}-{invalid_world_state_value}"
-            invalid_world_states.append(invalid_world_state)
-        return invalid_world_states
-
     @staticmethod
     def _is_markdown_file(filename):
         markdown_extension = ".md"
@@ -528,3 +618,15 @@ class AIDemo:
                 # We're probably on Linux. No easy way to get creation dates here,
                 # so we'll settle for when its content was last modified.
                 return stat.st_mtime
+
+
+class _InvalidWorldStates:
+    # the boolean opposites of the given world states, formatted as "world_state_name-value". membership is worked
+    # out from the world states on demand rather than building the whole list
+    def __init__(self, world_states):
+        self._world_states = world_states
+
+    def __contains__(self, world_state):
+        world_state_name, _, world_state_value = world_state.rpartition("-")
+        return world_state_name in self._world_states and \
+            world_state_value == f"{not self._world_states[world_state_name]}"
@@ -0,0 +1,115 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+# needed to queue diary entries for the writer
+from collections import deque
+
+# needed to write the demo in the background
+import threading
+
+
+class AIDemoSink:
+    """
+    Writes the demo visualization on a background thread so that the ai never waits on the demo folder.
+
+    Diary entries are put on a bounded queue and written in batches. Each batch writes every world state file and
+    the goals file once, then retires nodes against the latest world states. If the writer falls behind, only every
+    sample_every_nth_entry entry is queued once the queue is half full, and the oldest queued entry is dropped once
+    the queue is full.
+    """
+
+    def __init__(self, ai_demo, max_queued_entries=100, max_entries_per_batch=20, sample_every_nth_entry=2):
+        self._ai_demo = ai_demo
+        self._max_queued_entries = max_queued_entries
+        self._max_entries_per_batch = max_entries_per_batch
+        self._sample_every_nth_entry = sample_every_nth_entry
+
+        self._condition = threading.Condition()
+        self._queued_entries = deque()
+        self._latest_world_states = {}
+        self._entries_under_backpressure = 0
+        self._closed = False
+        self._writing = False
+
+        # counters for monitoring
+        self._entries_submitted = 0
+        self._entries_written = 0
+        self._entries_sampled_out = 0
+        self._entries_dropped = 0
+        self._batches_written = 0
+
+        self._writer = threading.Thread(target=self._write_demo)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def submit(self, diary_entry, world_states):
+        # queue a diary entry and the world states after it. never blocks on the demo folder
+        with self._condition:
+            self._entries_submitted += 1
+            self._latest_world_states = world_states
+
+            # under backpressure, keep only a sample of the entries
+            if len(self._queued_entries) >= self._max_queued_entries // 2:
+                self._entries_under_backpressure += 1
+                if self._entries_under_backpressure % self._sample_every_nth_entry != 0:
+                    self._entries_sampled_out += 1
+                    self._condition.notify()
+                    return
+            else:
+                self._entries_under_backpressure = 0
+
+            # when the queue is full, the newest entry is worth more to the demo than the oldest
+            if len(self._queued_entries) >= self._max_queued_entries:
+                self._queued_entries.popleft()
+                self._entries_dropped += 1
+
+            self._queued_entries.append(diary_entry)
+            self._condition.notify()
+
+    def _write_demo(self):
+        while True:
+            with self._condition:
+                while not self._queued_entries and not self._closed:
+                    self._condition.wait()
+                if not self._queued_entries and self._closed:
+                    return
+
+                # take the next batch of entries
+                batch_size = min(len(self._queued_entries), self._max_entries_per_batch)
+                diary_entries = [self._queued_entries.popleft() for _ in range(batch_size)]
+                world_states = self._latest_world_states
+                self._writing = True
+
+            try:
+                self._ai_demo.demo_diary_entries(diary_entries, world_states)
+            except Exception as error:
+                # a failing demo folder must not stop the writer
+                print(f"unable to write the demo: {error}")
+
+            with self._condition:
+                self._writing = False
+                self._entries_written += len(diary_entries)
+                self._batches_written += 1
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        # wait until every queued entry has been written. returns true if the queue was emptied in time
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queued_entries and not self._writing, timeout)
+
+    def close(self, timeout=None):
+        # write what is queued, then stop the writer
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join(timeout)
+
+    def statistics(self):
+        with self._condition:
+            return {"entries_submitted": self._entries_submitted,
+                    "entries_written": self._entries_written,
+                    "entries_sampled_out": self._entries_sampled_out,
+                    "entries_dropped": self._entries_dropped,
+                    "batches_written": self._batches_written,
+                    "entries_queued": len(self._queued_entries)}
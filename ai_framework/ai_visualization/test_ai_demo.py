@@ -1,6 +1,10 @@
+import os
+import tempfile
 import time
 import unittest
+from unittest import mock
 from ai_framework.ai_visualization import AIDemo
+from ai_framework.ai_infrastructure.world_snapshot import WorldSnapshot
 from ai_framework.ai_actions import ActionStatus
 
 
@@ -88,5 +92,113 @@ class TestAIDemo(unittest.TestCase):
             time.sleep(10)
 
 
+class TestAIDemoRetirement(unittest.TestCase):
+    def setUp(self):
+        self._demo_folder = tempfile.TemporaryDirectory()
+        self._ai_demo = AIDemo(demo_mode=True, markdown_folder=self._demo_folder.name + os.sep)
+        self._ai_demo.reset_demo()
+        self._ai_demo.demo_goals([{"goal_state_name": "goal_state", "goal_state_value": True}])
+
+    def tearDown(self):
+        self._demo_folder.cleanup()
+
+    def _diary_entry(self, world_state_before, world_state_after, action_status=ActionStatus.SUCCESS, my_plan="plan"):
+        return {"my_goal": {"goal_state": True},
+                "my_plan": my_plan,
+                "action_status": action_status,
+                "action_preconditions": dict(world_state_before),
+                "the_world_state_before": world_state_before,
+                "the_world_state_after": world_state_after,
+                "post_act_context": {}}
+
+    def _demo_files(self):
+        return set(os.listdir(self._demo_folder.name))
+
+    def _action_files(self):
+        return {file_name for file_name in self._demo_files() if file_name.startswith("ai_action_")}
+
+    def test_retirement_follows_world_state_changes(self):
+        world = {"condition_one": True}
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, world))
+        self._ai_demo.retire_nodes(world)
+        self.assertIn("condition_one-True.md", self._demo_files())
+        self.assertEqual(1, len(self._action_files()))
+
+        # the action and its world state are retired once the world reverses the action's effect
+        world = {"condition_one": False}
+        self._ai_demo.retire_nodes(world)
+        self.assertNotIn("condition_one-True.md", self._demo_files())
+        self.assertEqual(0, len(self._action_files()))
+
+        # goals are never retired
+        self._ai_demo.retire_nodes({"goal_state": False})
+        self.assertIn("goal_state-True.md", self._demo_files())
+
+    def test_unchanged_world_state_files_are_not_written_again(self):
+        world = {"condition_one": True}
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, world))
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, world))
+        self.assertEqual(1, self._ai_demo.writes_saved())
+
+        # a file deleted by retirement is written again the next time it is needed
+        self._ai_demo.retire_nodes({"condition_one": False})
+        self.assertNotIn("condition_one-True.md", self._demo_files())
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, world))
+        self.assertIn("condition_one-True.md", self._demo_files())
+        self.assertEqual(1, self._ai_demo.writes_saved())
+
+        # resetting the demo forgets every file written
+        self._ai_demo.reset_demo()
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, world))
+        self.assertIn("condition_one-True.md", self._demo_files())
+        self.assertEqual(1, self._ai_demo.writes_saved())
+
+    def test_failed_actions_are_retired(self):
+        world = {"condition_one": True}
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, world, action_status=ActionStatus.FAIL))
+        self._ai_demo.retire_nodes(world)
+        self.assertEqual(0, len(self._action_files()))
+
+    def test_a_single_change_does_not_rescan_the_world(self):
+        world = WorldSnapshot().updated([(f"state_{n}", True) for n in range(20000)] + [("condition_one", True)])
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, {"condition_one": True}))
+        self._ai_demo.retire_nodes(world)
+        self.assertIn("condition_one-True.md", self._demo_files())
+
+        # the next retirement visits only what changed, never the rest of the world
+        world = world.updated([("condition_one", False)])
+        rescanned = AssertionError("the whole world was scanned")
+        with mock.patch.object(WorldSnapshot, '__iter__', side_effect=rescanned), \
+                mock.patch.object(WorldSnapshot, 'items', side_effect=rescanned):
+            self._ai_demo.retire_nodes(world)
+        self.assertNotIn("condition_one-True.md", self._demo_files())
+
+    def test_world_state_changes_between_plain_worlds(self):
+        self.assertEqual({"condition_two": True, "condition_three": 3},
+                         AIDemo._world_state_changes({"condition_one": True, "condition_two": False},
+                                                     {"condition_one": True, "condition_two": True,
+                                                      "condition_three": 3}))
+
+    def test_blocked_actions_are_thinned_out(self):
+        world = {"condition_one": True}
+        for _ in range(4):
+            self._ai_demo.demo_diary_entry(self._diary_entry({}, world, my_plan=None))
+        self.assertEqual(4, len(self._action_files()))
+
+        # every other blocked action is retired
+        self._ai_demo.retire_nodes(world)
+        self.assertEqual(2, len(self._action_files()))
+
+    def test_files_not_written_by_the_demo_are_left_alone(self):
+        world = {"condition_one": True}
+        self._ai_demo.demo_diary_entry(self._diary_entry({}, world))
+
+        # retirement works from the demo file index, so files that the demo did not write are left alone
+        with open(os.path.join(self._demo_folder.name, "condition_one-False.md"), "w") as unrelated_file:
+            unrelated_file.write("#states")
+        self._ai_demo.retire_nodes(world)
+        self.assertIn("condition_one-False.md", self._demo_files())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,90 @@
+__author__ = "Jerry Overton"
+__copyright__ = "Copyright (C) 2022 appliedAIstudio LLC"
+__version__ = "0.0.1"
+
+import os
+import tempfile
+import threading
+import unittest
+
+# needed to test the background demo writer
+from ai_framework.ai_visualization import AIDemo, AIDemoSink
+from ai_framework.ai_actions import ActionStatus
+
+
+class SlowDemo:
+    # a stand-in demo that holds up the writer until it is released
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches = []
+
+    def demo_diary_entries(self, diary_entries, world_states):
+        self.release.wait()
+        self.batches.append((diary_entries, world_states))
+
+
+class CountingAIDemo(AIDemo):
+    # counts the world state files written to the demo folder
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.world_state_files_written = []
+
+    def _create_world_state_file(self, clean_state_name, tag):
+        if self._pending_world_state_files is None:
+            self.world_state_files_written.append(clean_state_name)
+        super()._create_world_state_file(clean_state_name, tag)
+
+
+class TestAIDemoSink(unittest.TestCase):
+    def test_submitting_does_not_wait_for_the_writer(self):
+        slow_demo = SlowDemo()
+        ai_demo_sink = AIDemoSink(slow_demo, max_queued_entries=10, max_entries_per_batch=100)
+
+        # the writer is stuck on the first entry while the rest queue up
+        for entry in range(50):
+            ai_demo_sink.submit(entry, {"entry": entry})
+        statistics = ai_demo_sink.statistics()
+        self.assertEqual(50, statistics["entries_submitted"])
+        self.assertLessEqual(statistics["entries_queued"], 10)
+        self.assertGreater(statistics["entries_sampled_out"], 0)
+        self.assertGreater(statistics["entries_dropped"], 0)
+
+        # once the writer catches up, recent entries are written along with the latest world states
+        slow_demo.release.set()
+        self.assertTrue(ai_demo_sink.flush(10))
+        ai_demo_sink.close(10)
+        last_diary_entries, last_world_states = slow_demo.batches[-1]
+        self.assertGreaterEqual(last_diary_entries[-1], 40)
+        self.assertEqual({"entry": 49}, last_world_states)
+
+
+class TestAIDemoBatches(unittest.TestCase):
+    def setUp(self):
+        self._demo_folder = tempfile.TemporaryDirectory()
+        self._ai_demo = CountingAIDemo(demo_mode=True, markdown_folder=self._demo_folder.name + os.sep)
+        self._ai_demo.reset_demo()
+
+    def tearDown(self):
+        self._demo_folder.cleanup()
+
+    def test_a_batch_writes_each_world_state_file_once(self):
+        world = {"condition_one": True}
+        diary_entry = {"my_goal": {"goal_state": True},
+                       "my_plan": [],
+                       "action_taken": "",
+                       "action_status": ActionStatus.SUCCESS,
+                       "action_preconditions": world,
+                       "the_world_state_before": world,
+                       "the_world_state_after": world,
+                       "prioritized_goals": [],
+                       "my_resources": [],
+                       "post_act_context": {}}
+        self._ai_demo.demo_diary_entries([diary_entry] * 5, world)
+
+        self.assertEqual(["condition_one-True"], self._ai_demo.world_state_files_written)
+        with open(os.path.join(self._demo_folder.name, "goals.md")) as goals_file:
+            self.assertEqual(5, goals_file.read().count("artificial intelligence iteration"))
+
+
+if __name__ == '__main__':
+    unittest.main()
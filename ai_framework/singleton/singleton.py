@@ -1,6 +1,10 @@
+# needed to create the singleton instance once, even when many threads ask for it at the same time
+import threading
+
+
 class Singleton:
     """
-    A non-thread-safe helper class to ease implementing singletons.
+    A thread-safe helper class to ease implementing singletons.
     This should be used as a decorator -- not a metaclass -- to the
     class that should be a singleton.
 
@@ -16,6 +20,7 @@ class Singleton:
 
     def __init__(self, decorated):
         self._decorated = decorated
+        self._instance_lock = threading.Lock()
 
     def instance(self):
         """
@@ -23,11 +28,16 @@ class Singleton:
         new instance of the decorated class and calls its `__init__` method.
         On all subsequent calls, the already created instance is returned.
 
+        The first callers wait for the instance to be created, so exactly one
+        instance is created. Later calls take no lock.
+
         """
         try:
             return self._instance
         except AttributeError:
-            self._instance = self._decorated()
+            with self._instance_lock:
+                if not hasattr(self, '_instance'):
+                    self._instance = self._decorated()
             return self._instance
 
     def __call__(self):
@@ -11,9 +11,8 @@ import os
 # needed to randomly select laundry days
 import random
 
-# needed to run laundry schedule monitoring on a non-blocking loop
-import threading
-import time
+# needed to run laundry schedule monitoring as a coroutine on the process's event loop
+from ai_framework.ai_actions import start_monitor, monitor_periodically, run_blocking
 
 # needed to read the laundry schedule from a file
 import json
@@ -22,39 +21,36 @@ import json
 from ai_framework.ai_actions import AIConnectionLost
 
 
+# the laundry schedule is checked this often
+SECONDS_TO_PAUSE_BETWEEN_MONITORING_THE_LAUNDRY_SCHEDULE = 10
+
+
 class LaundryScheduleMonitor(LaundryScheduler):
     def behavior(self):
         # update the context
         new_context = self._laundry_schedule()
         self.update_context(new_context)
 
-        # begin monitoring the laundry schedule in a separate, non-blocking thread
-        thread = threading.Thread(target=self._monitor_laundry_schedule)
-        thread.start()
+        # begin monitoring the laundry schedule on the event loop, without a thread of its own
+        start_monitor(monitor_periodically(self._check_laundry_schedule,
+                                           SECONDS_TO_PAUSE_BETWEEN_MONITORING_THE_LAUNDRY_SCHEDULE))
 
-    def _monitor_laundry_schedule(self):
-        seconds_to_pause_between_monitoring_the_laundry_schedule = 10
+    async def _check_laundry_schedule(self):
         seconds_it_takes_to_do_the_laundry = 30
 
-        # monitor the laundry schedule
-        while True:
-            if self._is_laundry_day():
-
-                # if it is laundry day, let the world know that the laundry needs to be maintained
-                print("it's laundry day")
-                try:
-                    self.update_the_world("laundry_maintained", False, self.context())
-                except AIConnectionLost:
-                    pass
-
-                # give the AI time to react to it being laundry day
-                time.sleep(seconds_it_takes_to_do_the_laundry)
-            else:
-                print("it is not laundry day")
+        if self._is_laundry_day():
+
+            # if it is laundry day, let the world know that the laundry needs to be maintained
+            print("it's laundry day")
+            try:
+                await run_blocking(self.update_the_world, "laundry_maintained", False, self.context())
+            except AIConnectionLost:
                 pass
 
-            # pause before checking the laundry schedule again
-            time.sleep(seconds_to_pause_between_monitoring_the_laundry_schedule)
+            # give the AI time to react to it being laundry day before checking the schedule again
+            return seconds_it_takes_to_do_the_laundry + SECONDS_TO_PAUSE_BETWEEN_MONITORING_THE_LAUNDRY_SCHEDULE
+        else:
+            print("it is not laundry day")
 
     @staticmethod
     def _laundry_schedule():
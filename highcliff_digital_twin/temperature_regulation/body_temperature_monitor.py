@@ -5,9 +5,8 @@ __version__ = "0.0.1"
 # needed to access host and port environment variables
 import os
 
-# needed to run temperature monitoring on a non-blocking loop
-import threading
-import time
+# needed to run temperature monitoring as a coroutine on the process's event loop
+from ai_framework.ai_actions import start_monitor, monitor_periodically, run_blocking
 
 # the Highcliff ai_actions we are going to implement
 from highcliff_sdk.temperature import MonitorBodyTemperature
@@ -19,6 +18,10 @@ from highcliff_digital_twin.temperature_regulation.temperature_sensor import Tem
 from ai_framework.ai_actions import AIConnectionLost
 
 
+# the body temperature is read this often
+SECONDS_TO_PAUSE_BETWEEN_BODY_TEMPERATURE_READINGS = 2
+
+
 class BodyTemperatureMonitor(MonitorBodyTemperature):
     def behavior(self):
 
@@ -54,38 +57,33 @@ class BodyTemperatureMonitor(MonitorBodyTemperature):
                 }
         self.update_context(new_context)
 
-        # begin monitoring the body temperature in a separate, non-blocking thread
-        thread = threading.Thread(target=self._monitor_body_temperature)
-        thread.start()
+        # begin monitoring the body temperature on the event loop, without a thread of its own
+        start_monitor(monitor_periodically(self._check_body_temperature,
+                                           SECONDS_TO_PAUSE_BETWEEN_BODY_TEMPERATURE_READINGS))
 
-    def _monitor_body_temperature(self):
-        seconds_to_pause_between_body_temperature_readings = 2
+    async def _check_body_temperature(self):
+        seconds_to_give_the_ai_to_react = 30
 
         # define the range of normal body temperature
         normal_low_body_temp_in_fahrenheit = 96.4
         normal_high_body_temp_in_fahrenheit = 99.6
 
-        # monitor the current body temperature
-        while True:
-            # get the current body temperature
-            current_body_temperature = get_body_temperature(TemperatureScale.FAHRENHEIT)
-            print("body temperature is", current_body_temperature)
-
-            # let the world know about the current state of the body temperature
-            if normal_high_body_temp_in_fahrenheit >= current_body_temperature >= normal_low_body_temp_in_fahrenheit:
-                print("the body temperature is fine")
-            else:
-                print("the body temperature is not normal")
-                try:
-                    self.update_the_world("body_temperature_is_normal", False, self.context())
-                except AIConnectionLost:
-                    pass
-
-                # give the AI time to react to the abnormal body temperature
-                time.sleep(30)
-
-            # pause before taking the next body temperature reading
-            time.sleep(seconds_to_pause_between_body_temperature_readings)
+        # get the current body temperature
+        current_body_temperature = get_body_temperature(TemperatureScale.FAHRENHEIT)
+        print("body temperature is", current_body_temperature)
+
+        # let the world know about the current state of the body temperature
+        if normal_high_body_temp_in_fahrenheit >= current_body_temperature >= normal_low_body_temp_in_fahrenheit:
+            print("the body temperature is fine")
+        else:
+            print("the body temperature is not normal")
+            try:
+                await run_blocking(self.update_the_world, "body_temperature_is_normal", False, self.context())
+            except AIConnectionLost:
+                pass
+
+            # give the AI time to react to the abnormal body temperature before the next reading
+            return seconds_to_give_the_ai_to_react + SECONDS_TO_PAUSE_BETWEEN_BODY_TEMPERATURE_READINGS
 
 
 def start_body_temperature_monitor():